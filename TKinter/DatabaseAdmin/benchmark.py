@@ -0,0 +1,289 @@
+"""
+Benchmark of the DatabaseAdmin PostgreSQL operations (PSQLEngine) against a throwaway local PostgreSQL instance
+- initdb creates a cluster in a temporary directory, the server only listens on a unix socket and is removed
+  afterwards; alternatively --config benchmarks an existing server (e.g. the RaspberryPi) in a new database
+- synthetic tables are generated server-side with generate_series (1k - 10M rows via --rows)
+- get table content (fetch + render), update, insert, delete and export are measured for latency, peak python memory
+  (tracemalloc) and rows/s; results are written to json, --compare shows the change against an older result file
+- --render-only compares render_table() with the previous formatting of get_table_content on synthetic rows in
+  memory, no database needed
+    python benchmark.py --rows 1000 100000 1000000 --output results.json
+    python benchmark.py --rows 1000 100000 --compare results.json
+    python benchmark.py --render-only 1000000
+"""
+import datetime
+import decimal
+import io
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from psql_engine import PSQLEngine, render_table
+
+
+def find_pg_binary(name):
+    """Path of a PostgreSQL server binary (initdb, pg_ctl), which are often not on PATH"""
+    path = shutil.which(name)
+    if path:
+        return path
+    try:
+        bindir = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+        if os.path.isfile(os.path.join(bindir, name)):
+            return os.path.join(bindir, name)
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    candidates = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}") + glob.glob(f"/usr/pgsql-*/bin/{name}"))
+    if candidates:
+        return candidates[-1]
+    raise FileNotFoundError(f"{name} not found, install the PostgreSQL server or use --config")
+
+
+def free_port():
+    """Unused TCP port number (used for the socket file name of the local server)"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalPostgres(object):
+    """Throwaway PostgreSQL cluster in a temporary directory, usable as context manager
+    - config is the path of a generated config.ini for PSQLEngine"""
+
+    def __init__(self, fsync=True):
+        self.fsync = fsync
+        self.directory = None
+        self.config = None
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix="dbadmin_bench_")
+        data, port = os.path.join(self.directory, "data"), free_port()
+        subprocess.run([find_pg_binary("initdb"), "-D", data, "-A", "trust", "-U", "postgres", "--no-sync"],
+                       check=True, capture_output=True)
+        options = f"-p {port} -k {self.directory} -c listen_addresses=''" + ("" if self.fsync else " -F")
+        subprocess.run([find_pg_binary("pg_ctl"), "-D", data, "-o", options, "-l",
+                        os.path.join(self.directory, "server.log"), "-w", "start"], check=True, capture_output=True)
+
+        self.config = os.path.join(self.directory, "config.ini")
+        with open(self.config, "w") as f:
+            f.write(f"[postgresql]\nserver={self.directory}\nport={port}\nuser=postgres\npass=\nsslmode=disable\n")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        subprocess.run([find_pg_binary("pg_ctl"), "-D", os.path.join(self.directory, "data"), "-m", "immediate",
+                        "stop"], capture_output=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return False
+
+
+def create_table(engine, table, rows):
+    """Create and fill a synthetic table with rows rows (integer key, text, numeric, timestamp, boolean)"""
+    engine.drop_table(table)
+    engine.create_table(f"""CREATE TABLE "{table}" (id integer PRIMARY KEY, name text, value numeric(10, 2),
+                            created timestamp, flag boolean)""")
+    engine.execute(f"""INSERT INTO "{table}" SELECT g, md5(g::text), round((random() * 1000)::numeric, 2),
+                       now() - g * interval '1 second', g %% 2 = 0 FROM generate_series(1, %s) g""", (rows, ))
+    engine.execute(f'ANALYZE "{table}"')
+
+
+def measure(function, repeat, rows, before=None, after=None):
+    """Run function repeat times, returns latency (median/min), peak python memory and rows/s
+    - peak memory is taken from one additional run under tracemalloc, which would distort the timings
+    - before/after are called around every run without being timed (e.g. to restore the table)"""
+    timings, peak = [], 0
+    for run in range(repeat + 1):
+        if before:
+            before()
+        traced = run == repeat
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if traced:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            timings.append(elapsed)
+        if after:
+            after()
+    median = statistics.median(timings)
+    return {"seconds": median, "min_seconds": min(timings), "peak_mb": peak / 1e6,
+            "rows_per_s": rows / max(median, 1e-9)}
+
+
+def benchmark_table(engine, rows, repeat, batch, directory):
+    """All operations on a table with rows rows, returns {operation: measurement}"""
+    table = f"bench_{rows}"
+    create_table(engine, table, rows)
+    batch = min(batch, rows)
+    keys = list(range(1, rows + 1, max(rows // batch, 1)))[:batch]
+    new_keys = iter(range(rows + 1, rows + 1 + batch * (repeat + 1) * 2))
+    results = {}
+
+    def update():
+        for key in keys:
+            engine.update(table, key, {"name": "benchmark"})
+
+    def update_session():
+        engine.begin_session()
+        for key in keys:
+            engine.update(table, key, {"name": "session"})
+        engine.commit_session()
+
+    inserted = []
+
+    def insert():
+        inserted.clear()
+        for _ in range(batch):
+            key = next(new_keys)
+            engine.insert(table, [key, "inserted", 1, None, True])
+            inserted.append(key)
+
+    def delete():
+        engine.delete(table, inserted)
+
+    # every repetition reads from the server, not from the result cache
+    results["fetch"] = measure(lambda: engine.fetch(table), repeat, rows, before=engine.invalidate_results)
+    columns, content = engine.fetch(table)
+    results["render"] = measure(lambda content=content: render_table(columns, content, io.StringIO(), title=table),
+                                repeat, rows)
+    del content
+    results["update"] = measure(update, repeat, batch)
+    results["update_session"] = measure(update_session, repeat, batch)
+    # inserted rows are deleted again (and vice versa), so the table keeps its size
+    results["insert"] = measure(insert, repeat, batch, after=delete)
+    results["delete"] = measure(delete, repeat, batch, before=insert)
+    path = os.path.join(directory, f"{table}.csv.gz")
+    results["export"] = measure(lambda: engine.export(table, path, compress=True), repeat, rows)
+
+    engine.drop_table(table)
+    return results
+
+
+def legacy_render(columns, content):
+    """Formatting of get_table_content before render_table(): every cell converted twice, widths looked up per cell,
+    output built with += (kept as baseline for --render-only, printing left out)"""
+    col_lengths = {k: 0 for k in columns}
+    for row in content:
+        for col_content, col_key_in_dict in zip(row, col_lengths.keys()):
+            if len(str(col_content)) >= col_lengths[col_key_in_dict]:
+                col_lengths[col_key_in_dict] = len(str(col_content))
+
+    max_sep_length = sum(col_lengths.values()) + (len(columns)-1)*3
+    file_content = ""
+    file_content += " | ".join([columns[i].center(list(col_lengths.values())[i]) for i in range(len(columns))]) + "\n"
+    file_content += "-" * max_sep_length + "\n"
+    for row in content:
+        file_content += " | ".join([str(row[i]).center(list(col_lengths.values())[i])
+                                    for i in range(len(columns))]) + "\n"
+    return file_content
+
+
+def benchmark_render(rows, repeat):
+    """Compare legacy_render() and render_table() on rows synthetic rows, returns the result document"""
+    columns = ["id", "name", "value", "created", "flag"]
+    now = datetime.datetime.now()
+    content = [(i, f"name {i}", decimal.Decimal(i % 1000) / 7, now - datetime.timedelta(seconds=i), i % 2 == 0)
+               for i in range(rows)]
+    document = {"revision": git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(), "platform": platform.platform(), "repeat": repeat,
+                "results": []}
+    for operation, function in (("render_legacy", lambda: legacy_render(columns, content)),
+                                ("render", lambda: render_table(columns, content, io.StringIO()))):
+        print(f"Benchmarking {operation} on {rows} rows ..", file=sys.stderr)
+        document["results"].append({"rows": rows, "operation": operation, **measure(function, repeat, rows)})
+    return document
+
+
+def git_revision():
+    """Commit of the working tree, None outside of git"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(config, sizes, repeat, batch):
+    """Benchmark all sizes in a new database on the server of config, returns the result document"""
+    db_name = f"dbadmin_bench_{os.getpid()}"
+    engine = PSQLEngine(config=config, verbose=False)
+    engine.open("postgres")
+    engine.create_database(db_name)
+    document = {"revision": git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(), "platform": platform.platform(),
+                "postgres": engine.version()[0], "repeat": repeat, "batch": batch, "results": []}
+    try:
+        engine.open(db_name)
+        with tempfile.TemporaryDirectory() as directory:
+            for rows in sizes:
+                print(f"Benchmarking {rows} rows ..", file=sys.stderr)
+                for operation, result in benchmark_table(engine, rows, repeat, batch, directory).items():
+                    document["results"].append({"rows": rows, "operation": operation, **result})
+    finally:
+        engine.open("postgres")
+        engine.drop_database(db_name)
+        engine.close()
+    return document
+
+
+def print_results(document, previous=None):
+    """Table of the results, with the change of the latency against previous (a result document) if given"""
+    before = {(f["rows"], f["operation"]): f for f in previous["results"]} if previous else {}
+    print(f"{'rows':>10} {'operation':<16} {'seconds':>10} {'rows/s':>12} {'peak MB':>9}"
+          + (f" {'change':>8}" if previous else ""))
+    for result in document["results"]:
+        line = f"{result['rows']:>10} {result['operation']:<16} {result['seconds']:>10.4f} " \
+               f"{result['rows_per_s']:>12.0f} {result['peak_mb']:>9.1f}"
+        old = before.get((result["rows"], result["operation"]))
+        if old:
+            line += f" {(result['seconds'] / max(old['seconds'], 1e-9) - 1) * 100:>+7.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DatabaseAdmin PostgreSQL operations")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000], help="table sizes (1k - 10M)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation, the median is reported")
+    parser.add_argument("--batch", type=int, default=1000, help="rows per update/insert/delete run")
+    parser.add_argument("--config", help="benchmark the server of this config.ini instead of a local instance")
+    parser.add_argument("--no-fsync", action="store_true", help="local instance without fsync (less noise)")
+    parser.add_argument("--output", help="write results to this json file")
+    parser.add_argument("--compare", help="json result file of an earlier run")
+    parser.add_argument("--render-only", type=int, metavar="ROWS",
+                        help="only benchmark the table renderer on ROWS synthetic rows (no database)")
+    args = parser.parse_args(argv)
+
+    if args.render_only:
+        document = benchmark_render(args.render_only, args.repeat)
+    elif args.config:
+        document = run(args.config, args.rows, args.repeat, args.batch)
+    else:
+        with LocalPostgres(fsync=not args.no_fsync) as server:
+            document = run(server.config, args.rows, args.repeat, args.batch)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+    print_results(document, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,24 +6,47 @@ Updated: 13.05.2022
 Author: Matthias Ley
 """
 
-from tkinter import ttk, simpledialog, messagebox, StringVar, Listbox, Scrollbar, Toplevel, BooleanVar
+from tkinter import ttk, simpledialog, messagebox, filedialog, StringVar, Listbox, Scrollbar, Toplevel, BooleanVar
+from tkinter import Canvas
 from tkinter.ttk import Entry, Label, Button, Frame, Checkbutton
 from tkinter.constants import HORIZONTAL
 import tkinter
+import sys
+import atexit
 from functools import partial
+from itertools import chain
 import time
+import re
 import os
 import tempfile
+import subprocess
+import platform
+import io
+import csv
+import json
+import uuid
+import decimal
+import datetime
 from concurrent.futures import ThreadPoolExecutor
-from configparser import ConfigParser
+from collections import OrderedDict, deque
+import threading
+import queue
+import select
 
 import psycopg2
+import psycopg2.extras
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, AutoReconnect
+from bson import json_util
+from bson.decimal128 import Decimal128
+
+from psql_engine import PSQLEngine, read_config, render_table, ddl_pattern, write_pattern
+from psql_engine import backup_database, restore_database
 
 gui_version = "1.3"
 
 """ ###################################################################################################################
-############################### Dictionaries for main classes (PostgreSQLTab, MongoDBTab) ############################# 
+##################### Dictionaries for main classes (PostgreSQLTab, QueryConsoleTab, MongoDBTab) ###################### 
 ################################################################################################################### """
 psql = {"btns": {},
         "lbls": {},
@@ -31,7 +54,22 @@ psql = {"btns": {},
         "frms": {},
         "vars": {},
         "oths": {},
-        "connection": None}
+        "engine": None,  # PSQLEngine, runs all PostgreSQL operations of the tab
+        "connection": None,  # main connection of the engine
+        "schema": None,
+        "statements": None,
+        "progress": (0, ""),  # (percent, text) written by run_background() workers, polled by the UI
+        "where_log": deque(maxlen=500)}  # (table, columns) filtered on by the tool, used by the index advisor
+
+console = {"btns": {},
+           "lbls": {},
+           "frms": {},
+           "vars": {},
+           "oths": {},
+           "connection": None,
+           "cursor": None,
+           "pages": [],
+           "page": 0}
 
 mongo = {"btns": {},
          "lbls": {},
@@ -39,126 +77,290 @@ mongo = {"btns": {},
          "frms": {},
          "vars": {},
          "oths": {},
-         "progress": 0,
+         "progress": (0, 0),  # (percent, documents) written by the worker of run_bulk()
          "conn": None,
-         "db": None}
+         "db": None,
+         "collection": None,
+         "cursor": None,
+         "pages": [],
+         "page": 0,
+         "nodes": {}}  # {tree item id: value} for lazy expansion of documents
 
 """ ###################################################################################################################
 ############################################ Threadpool executor ###################################################### 
 ################################################################################################################### """
 executor = ThreadPoolExecutor(max_workers=4)
 
+# temporary files opened with the default application, they are removed at exit (the viewer may still read them)
+temporary_files = []
+
 
 """ ###################################################################################################################
 ########################################## Supplementary classes ###################################################### 
 ################################################################################################################### """
 
 
+class RowPicker(Frame):
+    """Virtualized listbox to pick rows of large tables
+    - only the visible rows are inserted into the listbox; rows are fetched page-wise from the database while
+      scrolling (keyset pagination on the primary key, OFFSET only when jumping via the scrollbar)
+    - without a single-column primary key (prim_key is a fallback column, which may contain duplicates) rows are
+      ordered by (prim_key, ctid) and always paged with OFFSET
+    - the filter entry is applied server-side (ILIKE over the whole row as text)
+    - selection is tracked by primary key, so it survives scrolling and filtering"""
+
+    def __init__(self, parent, query, table, entry, prim_key, selectmode="browse", command=None,
+                 visible_rows=10, page_size=200, max_pages=20):
+        """query is PostgreSQLTab.query_all, entry the cached catalog entry of table (SchemaCache.table)"""
+        Frame.__init__(self, parent)
+        # custom arguments
+        self.query = query
+        self.table = table
+        self.entry = entry
+        self.headers = entry["columns"]
+        self.prim_key = prim_key
+        self.pk_idx = self.headers.index(prim_key)
+        self.unique = entry["pk"] == [prim_key]  # keyset pagination needs a unique key
+        self.order = f'"{prim_key}"' if self.unique else f'"{prim_key}", ctid'
+        self.command = command
+        self.visible_rows = visible_rows
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        # class vars
+        self.pages = OrderedDict()  # {page number: rows}, least recently used first
+        self.total = 0  # number of rows matching the filter (estimated for large unfiltered tables)
+        self.estimated = False
+        self.first = 0  # index of first visible row
+        self.shown = []  # rows currently inserted into listbox
+        self.selected = {}  # {primary key value: row}
+        self.filter = ""
+
+        # filter entry on top
+        filter_frame = Frame(self)
+        filter_frame.pack(side="top", fill="x")
+        Label(filter_frame, text="Filter:").pack(side="left", padx=2)
+        self.filter_entry = Entry(filter_frame)
+        self.filter_entry.pack(side="left", fill="x", expand=True, padx=2)
+        self.filter_entry.bind("<Return>", self.apply_filter)
+        create_tooltip(self.filter_entry, "Press enter to filter rows on the server")
+        self.count_label = Label(filter_frame, text="")
+        self.count_label.pack(side="left", padx=2)
+
+        # scrollbars; the vertical one scrolls the virtual row range instead of the listbox itself
+        h_scrollbar = Scrollbar(self, orient="horizontal")
+        h_scrollbar.pack(side="bottom", fill="x")
+        self.v_scrollbar = Scrollbar(self, orient="vertical", command=self.yview)
+        self.v_scrollbar.pack(side="right", fill="y")
+
+        self.listbox = Listbox(self, selectmode=selectmode, width=100, height=visible_rows, exportselection=False,
+                               xscrollcommand=h_scrollbar.set)
+        self.listbox.pack(side="top", fill="x", expand=True)
+        h_scrollbar.config(command=self.listbox.xview)
+
+        # bind events
+        self.listbox.bind("<<ListboxSelect>>", self.listbox_event)
+        self.listbox.bind("<MouseWheel>", lambda e: self.yview("scroll", int(-1 * (e.delta / 120)), "units"))
+        self.listbox.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.listbox.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+
+        self.apply_filter()
+
+    def where(self):
+        """WHERE clause and params of the current filter"""
+        if not self.filter:
+            return "", ()
+        return " WHERE t::text ILIKE %s", (f"%{self.filter}%",)
+
+    def apply_filter(self, event=None):
+        """Reset pages and count rows matching the filter; large unfiltered tables use the planner estimate"""
+        self.filter = self.filter_entry.get().strip()
+        self.pages.clear()
+        self.first = 0
+        self.estimated = False
+
+        where, params = self.where()
+        if not where:
+            estimate = self.query(f"""SELECT reltuples::bigint FROM pg_class WHERE oid = '"{self.table}"'::regclass""")
+            if estimate and estimate[0][0] >= 100000:
+                self.total, self.estimated = estimate[0][0], True
+        if not self.estimated:
+            self.total = self.query(f"""SELECT count(*) FROM "{self.table}" AS t{where}""", params)[0][0]
+
+        self.render()
+        return "break"  # do not trigger the <Return> binding (ok) of the parent dialog
+
+    def fetch_page(self, page):
+        """Return rows of page from cache or database"""
+        if page in self.pages:
+            self.pages.move_to_end(page)
+            return self.pages[page]
+
+        where, params = self.where()
+        previous = self.pages.get(page - 1)
+        if previous and self.unique:
+            # keyset pagination: continue after last primary key of the previous page (uses the pk index)
+            where = f"""{where} AND "{self.prim_key}" > %s""" if where else f""" WHERE "{self.prim_key}" > %s"""
+            rows = self.query(f"""SELECT t.* FROM "{self.table}" AS t{where} ORDER BY "{self.prim_key}" LIMIT %s""",
+                              (*params, previous[-1][self.pk_idx], self.page_size))
+        else:
+            rows = self.query(f"""SELECT t.* FROM "{self.table}" AS t{where} ORDER BY {self.order}
+                                  LIMIT %s OFFSET %s""", (*params, self.page_size, page * self.page_size))
+
+        # correct estimated row count when reaching the end of the table
+        if not rows and page:
+            # jumped past the real end (reltuples overestimated the table): count the rows
+            where, params = self.where()
+            self.total = self.query(f"""SELECT count(*) FROM "{self.table}" AS t{where}""", params)[0][0]
+            self.estimated = False
+        elif len(rows) < self.page_size:
+            self.total = page * self.page_size + len(rows)
+        elif self.estimated and (page + 1) * self.page_size >= self.total:
+            self.total = (page + 1) * self.page_size + 1
+
+        self.pages[page] = rows
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return rows
+
+    def render(self):
+        """Insert the visible rows into the listbox and update scrollbar and row count"""
+        self.first = max(0, min(self.first, self.total - self.visible_rows))
+        rows = self.visible()
+        if len(rows) < self.visible_rows and self.first > max(0, self.total - self.visible_rows):
+            # the row count was corrected by fetch_page(), move back to the real end
+            self.first = max(0, self.total - self.visible_rows)
+            rows = self.visible()
+        self.shown = rows
+
+        self.listbox.delete(0, "end")
+        self.listbox.insert(0, *[" | ".join("" if f is None else str(f) for f in row) for row in rows])
+        for idx, row in enumerate(rows):
+            if row[self.pk_idx] in self.selected:
+                self.listbox.selection_set(idx)
+
+        if self.total:
+            self.v_scrollbar.set(self.first / self.total, (self.first + len(rows)) / self.total)
+        else:
+            self.v_scrollbar.set(0, 1)
+        self.count_label.config(text=f"{'~' if self.estimated else ''}{self.total} rows")
+
+    def visible(self):
+        """Rows from self.first on (at most visible_rows), fetched page-wise"""
+        rows = []
+        for idx in range(self.first, min(self.first + self.visible_rows, self.total)):
+            page_rows = self.fetch_page(idx // self.page_size)
+            if idx % self.page_size >= len(page_rows):
+                break
+            rows.append(page_rows[idx % self.page_size])
+        return rows
+
+    def yview(self, *args):
+        """Scrollbar / mousewheel command: moveto fraction or scroll n units/pages"""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            self.first += int(args[1]) * (self.visible_rows if args[2] == "pages" else 1)
+        self.render()
+
+    def listbox_event(self, event):
+        """Listbox click event, keeps self.selected in sync with the visible rows"""
+        current = self.listbox.curselection()
+        if self.listbox.cget("selectmode") in ["browse", "single"]:
+            if not current:
+                return
+            self.selected = {}
+
+        for idx, row in enumerate(self.shown):
+            if idx in current:
+                self.selected[row[self.pk_idx]] = row
+            else:
+                self.selected.pop(row[self.pk_idx], None)
+
+        if self.command and current:
+            self.command(self.shown[current[0]])
+
+    def fetch_row(self, pk_value):
+        """Fetch a single row by its primary key (as entered by the user); None if invalid or not existing"""
+        if not cast_search_value(pk_value, self.entry["base_types"][self.prim_key]):
+            return None
+        pk_type = self.entry["types"][self.prim_key]
+        rows = self.query(f"""SELECT * FROM "{self.table}" WHERE "{self.prim_key}" = %s::{pk_type}""", (pk_value,))
+        return rows[0] if rows else None
+
+    def selected_rows(self):
+        """All selected rows, including rows which are currently scrolled out of view"""
+        return list(self.selected.values())
+
+
 class DialogUpdatePSQLTable(simpledialog.Dialog):
     """Supplementary class used by PostgreSQL.update_table() to enter multiple fields in popup"""
 
-    def __init__(self, parent, title, table, content, headers):
+    def __init__(self, parent, title, table, entry, prim_key, query):
         """init"""
         # custom arguments
         self.table = table
-        self.content = content
-        self.headers = headers
-        self.prim_key = headers[0]
+        self.entry = entry
+        self.headers = entry["columns"]
+        self.prim_key = prim_key
+        self.query = query
 
         # class vars
         self.ents = {}
+        self.selection = None
 
         # forward default arguments to init
         simpledialog.Dialog.__init__(self, parent, title)
 
-    def listbox_event(self, event):
-        """Listbox click event"""
-        selection = None
-        if event.widget.curselection():
-            selection = event.widget.get(event.widget.curselection()[0])
+    def picker_event(self, row):
+        """RowPicker click event"""
+        self.selection = row
 
         # delete all entries, insert data from selection
-        if selection:
-            for col_entry, col_data in zip(self.ents, selection):
-                self.ents[col_entry].configure(state="normal")
-                self.ents[col_entry].delete(0, "end")
-                if col_data:
-                    self.ents[col_entry].insert(0, col_data)
-                    if col_entry == self.prim_key:
-                        self.ents[col_entry].configure(state="disabled")
+        for col_entry, col_data in zip(self.ents, row):
+            self.ents[col_entry].configure(state="normal")
+            self.ents[col_entry].delete(0, "end")
+            if col_data is not None:
+                self.ents[col_entry].insert(0, col_data)
+                if col_entry == self.prim_key:
+                    self.ents[col_entry].configure(state="disabled")
 
     def body(self, master):
         """Body of popup"""
         # header for listbox
         Label(master, text=" | ".join(self.headers)).grid(row=0, column=0, columnspan=2, padx=2, pady=2)
 
-        # scrollable listbox inside a frame
-        frame = Frame(master)
-        frame.grid(row=1, column=0, columnspan=2, padx=2, pady=2)
-
-        # scrollbars
-        v_scrollbar = Scrollbar(frame, orient="horizontal")
-        v_scrollbar.pack(side="bottom", fill="x")
-        h_scrollbar = Scrollbar(frame, orient="vertical")
-        h_scrollbar.pack(side="right", fill="y")
-
-        # # create listbox, insert values from self.content
-        listbox_width = max([len("".join(str(f))) for f in self.content]) if self.content else 10
-        listbox_height = max(min(len(self.content), 10), 5) if self.content else 4
-        self.listbox = Listbox(frame, width=listbox_width, height=listbox_height)
-        self.listbox.insert(0, *self.content)
-        self.listbox.pack(side="top", fill="x", expand=True)
-
-        # config scrollbar and listbox
-        v_scrollbar.config(command=self.listbox.xview)
-        h_scrollbar.config(command=self.listbox.yview)
-        self.listbox.config(xscrollcommand=v_scrollbar.set,
-                            yscrollcommand=h_scrollbar.set)
-
-        # bind click-event to listbox
-        self.listbox.bind("<<ListboxSelect>>", self.listbox_event)
+        # virtualized row picker, pages rows from the database while scrolling
+        self.picker = RowPicker(master, self.query, self.table, self.entry, self.prim_key, selectmode="browse",
+                                command=self.picker_event)
+        self.picker.grid(row=1, column=0, columnspan=2, padx=2, pady=2, sticky="ew")
 
         # separator
         ttk.Separator(master, orient=HORIZONTAL).grid(row=2, column=0, columnspan=99, sticky="ew", pady=10)
 
         # iterate over column names to create entries + labels for actual modification
-        # calculate maximum possible length of a field, set as default width for entries
-        max_allowed_entry_width = max(len(str(elem)) for row in self.content for elem in row) + 10 \
-            if self.content else 10  # 10 is a buffer
         # create widgets in loop, store in self.ents with column header name as key
         for idx, column in enumerate(self.headers):
             Label(master, text=f"{column}:").grid(row=3+idx, column=0, padx=2)
-            self.ents[column] = Entry(master, width=max_allowed_entry_width)
+            self.ents[column] = Entry(master, width=60)
             self.ents[column].grid(row=3+idx, column=1, padx=2)
 
     def ok(self, event=None):
-        """Overrides ok method to only accept integers for self.table_id"""
-
-        # if a column id exists in headers, verify the entry
-        if "id" in [x.lower() for x in self.headers]:
-            error = None
-            try:
-                int(self.ents["id"].get())
-                # check if entered ID exists in self.content column for id
-                if int(self.ents["id"].get()) not in [f[self.headers.index("id")] for f in self.content]:
-                    error = "ID doesnt exist!"
-            except Exception as e:
-                print(e)
-                error = "Only int allowed!"
-
-            # halt on error, write error text to entry, focus and select text
-            if error:
-                self.ents["id"].delete(0, "end")
-                self.ents["id"].insert(0, error)
-                self.ents["id"].focus()
-                self.ents["id"].select_range(0, "end")
-                return
-
-        # # if a column entry is empty, focus and return
-        # for column in self.headers:
-        #     if self.ents[column].get() == "":
-        #         self.ents[column].focus()
-        #         return
+        """Overrides ok method to only accept existing primary keys"""
+
+        # if no row was picked (or the primary key was typed), look up the row by the entered primary key
+        pk_value = self.ents[self.prim_key].get()
+        if not self.selection or str(self.selection[self.headers.index(self.prim_key)]) != pk_value:
+            self.selection = self.picker.fetch_row(pk_value)
+
+        # halt on error, write error text to entry, focus and select text
+        if not self.selection:
+            self.ents[self.prim_key].configure(state="normal")
+            self.ents[self.prim_key].delete(0, "end")
+            self.ents[self.prim_key].insert(0, f"{self.prim_key} doesnt exist!")
+            self.ents[self.prim_key].focus()
+            self.ents[self.prim_key].select_range(0, "end")
+            return
 
         # not sure what this does honestly, comes from original class
         if not self.validate():
@@ -175,28 +377,16 @@ class DialogUpdatePSQLTable(simpledialog.Dialog):
 
     def apply(self):
         """Hand over results"""
-        # iterate over text in entries, current listbox selection and headers(column names) to find modified data
+        # iterate over text in entries, selected row and headers(column names) to find modified data
         modified_data = {}
-
-        # check if something is selected in listbox
-        try:
-            selection = self.listbox.get(self.listbox.curselection())
-        # if not, try to find per ID entered
-        except Exception as e:
-            selection = [f for f in self.listbox.get(0, "end") if str(f[0]) == self.ents[self.prim_key].get()][0]
-
-        for entry, orig_value, header in zip(self.ents, selection, self.headers):
+        for entry, orig_value, header in zip(self.ents, self.selection, self.headers):
             # if entry value does not match original value, append to dict by header(column name)
-            if self.ents[entry].get() != orig_value:
-                # if column is id and values match as ints, continue
-                if header == "id":
-                    if int(self.ents[entry].get()) == orig_value:
-                        continue
+            if self.ents[entry].get() != ("" if orig_value is None else str(orig_value)):
                 modified_data[header] = self.ents[entry].get()
 
         self.result = {
             "prim_key": (self.prim_key, self.ents[self.prim_key].get()),
-            "orig_values": selection,
+            "orig_values": self.selection,
             "mod_values": modified_data
         }
 
@@ -204,15 +394,14 @@ class DialogUpdatePSQLTable(simpledialog.Dialog):
 class DialogDeleteFromPSQLTable(simpledialog.Dialog):
     """Supplementary class used by PostgreSQL.delete_from_table() to delete certain IDs from table"""
 
-    def __init__(self, parent, title, table, content, headers):
-        """table and content are custom arguments handed over from GUI class"""
+    def __init__(self, parent, title, table, entry, prim_key, query):
+        """table, entry (cached catalog entry), prim_key and query are custom arguments handed over from GUI class"""
         # custom arguments
         self.table = table
-        # content_mod = []
-        # for line in content:
-        #     content_mod.append("   ".join([f"{col}" for col in line if type(col) in [int, str] and col != ""]))
-        self.content = content
-        self.headers = headers
+        self.entry = entry
+        self.headers = entry["columns"]
+        self.prim_key = prim_key
+        self.query = query
 
         # forward default arguments to init
         simpledialog.Dialog.__init__(self, parent, title)
@@ -222,28 +411,9 @@ class DialogDeleteFromPSQLTable(simpledialog.Dialog):
         # header for listbox
         Label(master, text=" | ".join(self.headers)).grid(row=0, column=0, columnspan=2, padx=2, pady=2)
 
-        # scrollable listbox inside a frame
-        frame = Frame(master)
-        frame.grid(row=1, column=0, columnspan=2, padx=2, pady=2)
-
-        # scrollbars
-        v_scrollbar = Scrollbar(frame, orient="horizontal")
-        v_scrollbar.pack(side="bottom", fill="x")
-        h_scrollbar = Scrollbar(frame, orient="vertical")
-        h_scrollbar.pack(side="right", fill="y")
-
-        # # create listbox, insert values from self.content
-        listbox_width = max([len("".join(str(f))) for f in self.content]) if self.content else 10
-        listbox_height = max(min(len(self.content), 10), 5) if self.content else 4
-        self.listbox = Listbox(frame, selectmode="multiple", width=listbox_width, height=listbox_height)
-        self.listbox.insert(0, *self.content)
-        self.listbox.pack(side="top", fill="x", expand=True)
-
-        # config scrollbar and listbox
-        v_scrollbar.config(command=self.listbox.xview)
-        h_scrollbar.config(command=self.listbox.yview)
-        self.listbox.config(xscrollcommand=v_scrollbar.set,
-                            yscrollcommand=h_scrollbar.set)
+        # virtualized row picker, pages rows from the database while scrolling
+        self.picker = RowPicker(master, self.query, self.table, self.entry, self.prim_key, selectmode="multiple")
+        self.picker.grid(row=1, column=0, columnspan=2, padx=2, pady=2, sticky="ew")
 
         # separator
         ttk.Separator(master, orient=HORIZONTAL).grid(row=2, column=0, columnspan=99, sticky="ew", pady=10)
@@ -252,16 +422,17 @@ class DialogDeleteFromPSQLTable(simpledialog.Dialog):
         Label(master, text="Delete by Value:").grid(row=3, column=0, padx=2)
         self.values = Entry(master)
         self.values.grid(row=3, column=1, padx=2)
+        create_tooltip(self.values, "Value to search in all columns (e.g. Matzl) or in one column (e.g. name=Matzl)")
+        self.fuzzy = BooleanVar(value=False)
+        Checkbutton(master, text="Fuzzy (pg_trgm)", variable=self.fuzzy, onvalue=True, offvalue=False).\
+            grid(row=4, column=1, padx=2, sticky="W")
 
     def apply(self):
         """Hand over results"""
-        selected_ids = []
-        for idx in self.listbox.curselection():
-            selected_ids.append(self.listbox.get(idx))
-
         self.result = {
-            "selected_ids": selected_ids,
-            "passed_values": self.values.get()
+            "selected_ids": self.picker.selected_rows(),
+            "passed_values": self.values.get(),
+            "fuzzy": self.fuzzy.get()
         }
 
 
@@ -406,6 +577,638 @@ class CreatePSQLTable(simpledialog.Dialog):
         self.destroy()
 
 
+class DialogBatchEditPSQLTable(simpledialog.Dialog):
+    """Supplementary class used by PostgreSQL.batch_edit_table() to edit and delete many rows in a grid"""
+
+    def __init__(self, parent, title, table, content, headers, prim_key):
+        """table, content, headers and prim_key are custom arguments handed over from GUI class"""
+        # custom arguments
+        self.table = table
+        self.content = content
+        self.headers = headers
+        self.prim_key = prim_key
+        self.pk_idx = headers.index(prim_key)
+
+        # class vars
+        self.ents = []  # one list of entries per row
+        self.delete_vars = []  # one BooleanVar per row
+
+        # forward default arguments to init
+        simpledialog.Dialog.__init__(self, parent, title)
+
+    def body(self, master):
+        """Body of popup: scrollable grid with one entry per cell and a delete checkbox per row"""
+        canvas = Canvas(master, width=min(140 * (len(self.headers) + 1), 1000), height=400, highlightthickness=0)
+        v_scrollbar = Scrollbar(master, orient="vertical", command=canvas.yview)
+        h_scrollbar = Scrollbar(master, orient="horizontal", command=canvas.xview)
+        canvas.config(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        canvas.grid(row=0, column=0, sticky="nsew")
+        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        h_scrollbar.grid(row=1, column=0, sticky="ew")
+        grid = Frame(canvas)
+
+        # header row
+        Label(grid, text="Delete", font=("arial", 9, "bold")).grid(row=0, column=0, padx=2)
+        for col_idx, column in enumerate(self.headers):
+            Label(grid, text=column, font=("arial", 9, "bold")).grid(row=0, column=col_idx + 1, padx=2)
+
+        # one line per row, primary key is read-only
+        for row_idx, row in enumerate(self.content):
+            self.delete_vars.append(BooleanVar(value=False))
+            Checkbutton(grid, variable=self.delete_vars[-1]).grid(row=row_idx + 1, column=0)
+            self.ents.append([])
+            for col_idx, value in enumerate(row):
+                entry = Entry(grid, width=18)
+                entry.insert(0, "" if value is None else value)
+                if col_idx == self.pk_idx:
+                    entry.configure(state="disabled")
+                entry.grid(row=row_idx + 1, column=col_idx + 1, padx=1, pady=1)
+                self.ents[-1].append(entry)
+
+        canvas.create_window(0, 0, anchor="nw", window=grid)
+        grid.update_idletasks()
+        canvas.config(scrollregion=canvas.bbox("all"))
+
+    def apply(self):
+        """Hand over results: changed cells per primary key and primary keys to delete"""
+        updates, deletes = {}, []
+        for row, entries, delete_var in zip(self.content, self.ents, self.delete_vars):
+            pk_value = row[self.pk_idx]
+            if delete_var.get():
+                deletes.append(pk_value)
+                continue
+
+            changes = {}
+            for column, orig_value, entry in zip(self.headers, row, entries):
+                new_value = entry.get()
+                if new_value != ("" if orig_value is None else str(orig_value)):
+                    changes[column] = new_value if new_value != "" else None
+            if changes:
+                updates[pk_value] = changes
+
+        self.result = {
+            "updates": updates,
+            "deletes": deletes
+        }
+
+
+class DialogExportPSQLTable(simpledialog.Dialog):
+    """Supplementary class used by PostgreSQL.export_table_content() to select columns, filter and file format"""
+
+    def __init__(self, parent, title, table, headers):
+        """table and headers are custom arguments handed over from GUI class"""
+        # custom arguments
+        self.table = table
+        self.headers = headers
+
+        # class vars
+        self.file_format = StringVar(value="csv")
+        self.compress = BooleanVar(value=False)
+
+        # forward default arguments to init
+        simpledialog.Dialog.__init__(self, parent, title)
+
+    def body(self, master):
+        """Body of popup"""
+        Label(master, text="Columns:").grid(row=0, column=0, padx=2, pady=2, sticky="NW")
+
+        # listbox with all columns, preselected
+        frame = Frame(master)
+        frame.grid(row=0, column=1, padx=2, pady=2, sticky="W")
+        scrollbar = Scrollbar(frame, orient="vertical")
+        scrollbar.pack(side="right", fill="y")
+        self.listbox = Listbox(frame, selectmode="multiple", exportselection=False,
+                               height=max(min(len(self.headers), 10), 3), yscrollcommand=scrollbar.set)
+        self.listbox.insert(0, *self.headers)
+        self.listbox.selection_set(0, "end")
+        self.listbox.pack(side="left", fill="both")
+        scrollbar.config(command=self.listbox.yview)
+
+        Label(master, text="WHERE:").grid(row=1, column=0, padx=2, pady=2, sticky="W")
+        self.where = Entry(master, width=40)
+        self.where.grid(row=1, column=1, padx=2, pady=2, sticky="W")
+        create_tooltip(self.where, "Optional filter, e.g. id > 100 AND name = 'Matzl'")
+
+        # file format and compression
+        frame = Frame(master)
+        frame.grid(row=2, column=1, padx=2, pady=2, sticky="W")
+        Label(master, text="Format:").grid(row=2, column=0, padx=2, pady=2, sticky="W")
+        for file_format in ["csv", "tsv"]:
+            ttk.Radiobutton(frame, text=file_format.upper(), value=file_format,
+                            variable=self.file_format).pack(side="left", padx=2)
+        Checkbutton(frame, text="gzip", variable=self.compress, onvalue=True, offvalue=False).pack(side="left", padx=2)
+
+        return self.where
+
+    def validate(self):
+        """At least one column has to be selected"""
+        if not self.listbox.curselection():
+            messagebox.showerror("Error", "Please select at least one column.")
+            return False
+        return True
+
+    def apply(self):
+        """Hand over results"""
+        self.result = {
+            "columns": [self.listbox.get(idx) for idx in self.listbox.curselection()],
+            "where": self.where.get().strip(),
+            "format": self.file_format.get(),
+            "gzip": self.compress.get()
+        }
+
+
+class StatsDashboard(Toplevel):
+    """Live server activity and table statistics of the current database
+    - a background thread polls pg_stat_activity, pg_stat_database, pg_stat_user_tables, pg_statio_user_tables,
+      pg_locks and pg_stat_statements (if installed) on its own connection every interval seconds
+    - snapshots are handed to the Tk thread via a queue; metric history is kept in ring buffers for the sparklines"""
+
+    history_size = 120
+    metrics = {"active": "Active queries", "tps": "Transactions/s", "cache_hit": "Cache hit %", "seq_ratio": "Seq scan %"}
+
+    def __init__(self, parent, connect, interval=2):
+        """connect is a function returning a new psycopg2 connection to the database to monitor"""
+        Toplevel.__init__(self, parent)
+        self.title("PostgreSQL Dashboard")
+        self.connect = connect
+
+        # class vars
+        self.interval = StringVar(value=str(interval))
+        self.interval.trace_add("write", self.change_interval)
+        self.poll_interval = interval  # plain float read by the poller thread (Tk variables are not thread-safe)
+        self.history = {k: deque(maxlen=self.history_size) for k in self.metrics}
+        self.snapshots = queue.Queue()
+        self.stop_event = threading.Event()
+        self.last_xacts = None
+        self.trees = {}
+        self.sparklines = {}
+
+        self.build_dashboard()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        # start poller thread and queue polling
+        self.thread = threading.Thread(target=self.poll_stats, daemon=True)
+        self.thread.start()
+        self.after(200, self.process_snapshots)
+
+    def build_dashboard(self):
+        """Interval selection, sparklines and one tree view per statistics view"""
+        top = Frame(self)
+        top.pack(side="top", fill="x", padx=5, pady=5)
+        Label(top, text="Interval [s]:").pack(side="left", padx=2)
+        ttk.Combobox(top, textvariable=self.interval, values=["1", "2", "5", "10", "30"], width=4).pack(side="left")
+        self.status = Label(top, text="Connecting ..")
+        self.status.pack(side="left", padx=10)
+
+        # sparklines
+        sparks = Frame(self)
+        sparks.pack(side="top", fill="x", padx=5)
+        for idx, (key, text) in enumerate(self.metrics.items()):
+            frame = Frame(sparks)
+            frame.grid(row=0, column=idx, padx=5)
+            self.sparklines[key] = (Label(frame, text=text), Canvas(frame, width=180, height=40, bg="white"))
+            self.sparklines[key][0].pack(anchor="w")
+            self.sparklines[key][1].pack()
+
+        # tree views
+        notebook = ttk.Notebook(self)
+        notebook.pack(side="top", fill="both", expand=True, padx=5, pady=5)
+        views = {"Activity": ["pid", "user", "state", "duration", "wait", "query"],
+                 "Tables": ["table", "seq_scan", "idx_scan", "seq_%", "live", "dead", "bloat_%", "hit_%", "size"],
+                 "Statements": ["calls", "total_ms", "mean_ms", "rows", "query"],
+                 "Locks": ["pid", "locktype", "relation", "mode", "granted"]}
+        for name, columns in views.items():
+            frame = Frame(notebook)
+            tree = ttk.Treeview(frame, columns=columns, show="headings", height=12)
+            for column in columns:
+                tree.heading(column, text=column)
+                tree.column(column, width=400 if column == "query" else 80, anchor="w")
+            tree.tag_configure("warning", foreground="red")
+            scrollbar = Scrollbar(frame, orient="vertical", command=tree.yview)
+            tree.config(yscrollcommand=scrollbar.set)
+            scrollbar.pack(side="right", fill="y")
+            tree.pack(side="left", fill="both", expand=True)
+            notebook.add(frame, text=name)
+            self.trees[name] = tree
+
+    def change_interval(self, *args):
+        """Interval combobox changed"""
+        try:
+            self.poll_interval = max(float(self.interval.get()), 0.5)
+        except ValueError:
+            pass
+
+    def poll_stats(self):
+        """Poller thread: collect a snapshot every interval seconds until the window is closed"""
+        try:
+            connection = self.connect()
+            connection.autocommit = True
+        except Exception as e:
+            self.snapshots.put({"error": str(e)})
+            return
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.snapshots.put(collect_stats(connection))
+                except Exception as e:
+                    self.snapshots.put({"error": str(e)})
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def process_snapshots(self):
+        """Tk thread: apply all queued snapshots, reschedule itself while the window is open"""
+        if self.stop_event.is_set():
+            return
+        while not self.snapshots.empty():
+            snapshot = self.snapshots.get()
+            if "error" in snapshot:
+                self.status.config(text=f"Error: {snapshot['error']}")
+            else:
+                self.apply_snapshot(snapshot)
+        self.after(200, self.process_snapshots)
+
+    def apply_snapshot(self, snapshot):
+        """Update ring buffers, sparklines and tree views"""
+        xacts, timestamp = snapshot["database"]["xacts"], snapshot["time"]
+        if self.last_xacts:
+            elapsed = max(timestamp - self.last_xacts[1], 1e-9)
+            self.history["tps"].append((xacts - self.last_xacts[0]) / elapsed)
+        self.last_xacts = (xacts, timestamp)
+        self.history["active"].append(sum(1 for f in snapshot["activity"] if f[2] == "active"))
+        self.history["cache_hit"].append(snapshot["database"]["cache_hit"])
+        self.history["seq_ratio"].append(snapshot["database"]["seq_ratio"])
+
+        for key, (label, canvas) in self.sparklines.items():
+            values = self.history[key]
+            if values:
+                label.config(text=f"{self.metrics[key]}: {values[-1]:.1f}")
+            draw_sparkline(canvas, values)
+
+        def fill(name, rows, warning=None):
+            tree = self.trees[name]
+            tree.delete(*tree.get_children())
+            for row in rows:
+                tree.insert("", "end", values=row, tags=["warning"] if warning and warning(row) else [])
+
+        fill("Activity", snapshot["activity"])
+        fill("Tables", snapshot["tables"], warning=lambda row: row[3] > 50 and row[4] > 10000 or row[6] > 20)
+        fill("Statements", snapshot["statements"] or [["-", "-", "-", "-", "pg_stat_statements not installed"]])
+        fill("Locks", snapshot["locks"], warning=lambda row: not row[4])
+
+        self.status.config(text=f"Updated {time.strftime('%H:%M:%S')} ({snapshot['duration'] * 1000:.0f} ms)")
+
+    def close(self):
+        """Stop poller thread and close window"""
+        self.stop_event.set()
+        self.destroy()
+
+
+class LiveTableView(Toplevel):
+    """Table view which stays up to date via LISTEN/NOTIFY
+    - the table is loaded once (as json, max_rows rows), afterwards a background thread LISTENs on channel with its
+      own autocommit connection, waiting with select() on the connection socket instead of polling the server
+    - changes are handed to the Tk thread via a queue and applied row by row, the table is never re-queried
+    - requires the trigger installed by install_notify_trigger()"""
+
+    max_rows = 10000
+
+    def __init__(self, parent, connect, table, columns, prim_key, pk_type, channel, on_change=None):
+        """connect is a function returning a new psycopg2 connection to the database of table, pk_type the formatted
+        type of prim_key, on_change(table) is called for every applied change (e.g. to invalidate cached results)"""
+        Toplevel.__init__(self, parent)
+        self.title(f"{table} (live)")
+        self.connect = connect
+        self.table = table
+        self.columns = columns
+        self.prim_key = prim_key
+        self.pk_type = pk_type
+        self.channel = channel
+        self.on_change = on_change
+
+        # class vars
+        self.changes = queue.Queue()
+        self.stop_event = threading.Event()
+        self.items = {}  # {primary key value (json text): tree item}
+        self.applied = 0
+
+        self.build_view()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        # start listener thread and queue polling
+        self.thread = threading.Thread(target=self.listen, daemon=True)
+        self.thread.start()
+        self.after(200, self.process_changes)
+
+    def build_view(self):
+        """Status line and tree view with one column per table column"""
+        top = Frame(self)
+        top.pack(side="top", fill="x", padx=5, pady=5)
+        remove = Button(top, text="Remove Trigger", command=self.remove_trigger)
+        create_tooltip(remove, "Drop the notification trigger of the table and close the view")
+        remove.pack(side="left", padx=2)
+        self.status = Label(top, text="Loading ..")
+        self.status.pack(side="left", padx=10)
+
+        frame = Frame(self)
+        frame.pack(side="top", fill="both", expand=True, padx=5, pady=5)
+        self.tree = ttk.Treeview(frame, columns=self.columns, show="headings", height=20)
+        for column in self.columns:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=100, anchor="w")
+        self.tree.tag_configure("changed", background="light yellow")
+        scrollbar = Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+    def listen(self):
+        """Listener thread: LISTEN before the initial load (no change is missed), then wait for notifications"""
+        try:
+            connection = self.connect()
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+                cursor.execute(f"""SELECT row_to_json(t)::text FROM "{self.table}" t LIMIT %s""", (self.max_rows,))
+                self.changes.put(("LOAD", [json.loads(f[0]) for f in cursor.fetchall()]))
+        except Exception as e:
+            self.changes.put(("ERROR", str(e)))
+            return
+
+        try:
+            while not self.stop_event.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue  # timeout, check stop_event
+                connection.poll()
+                while connection.notifies:
+                    payload = json.loads(connection.notifies.pop(0).payload)
+                    if payload.get("table") != self.table:
+                        continue
+                    if "row" not in payload and payload["op"] != "DELETE":
+                        # payload exceeded the NOTIFY limit, fetch the single row by primary key (the constant is
+                        # cast to the key type, not the column to text, so the primary key index is used)
+                        with connection.cursor() as cursor:
+                            cursor.execute(f"""SELECT row_to_json(t)::text FROM "{self.table}" t
+                                               WHERE "{self.prim_key}" = %s::{self.pk_type}""", (str(payload["pk"]),))
+                            row = cursor.fetchone()
+                        payload["row"] = json.loads(row[0]) if row else None
+                    self.changes.put((payload["op"], payload))
+        except Exception as e:
+            self.changes.put(("ERROR", str(e)))
+        finally:
+            connection.close()
+
+    def process_changes(self):
+        """Tk thread: apply all queued changes, reschedule itself while the window is open"""
+        if self.stop_event.is_set():
+            return
+        while not self.changes.empty():
+            op, data = self.changes.get()
+            if op == "ERROR":
+                self.status.config(text=f"Error: {data}")
+            elif op == "LOAD":
+                for row in data:
+                    self.apply_row(row)
+                truncated = f" (first {self.max_rows})" if len(data) >= self.max_rows else ""
+                self.status.config(text=f"{len(data)} rows{truncated}, listening on '{self.channel}'")
+            else:
+                self.apply_change(op, data)
+        self.after(200, self.process_changes)
+
+    def apply_row(self, row, tags=()):
+        """Insert or update the tree item of row"""
+        key = json.dumps(row.get(self.prim_key))
+        values = ["" if row.get(f) is None else row[f] for f in self.columns]
+        if key in self.items:
+            self.tree.item(self.items[key], values=values, tags=tags)
+        else:
+            self.items[key] = self.tree.insert("", "end", values=values, tags=tags)
+
+    def apply_change(self, op, payload):
+        """Apply a single INSERT/UPDATE/DELETE notification"""
+        key, old_key = json.dumps(payload.get("pk")), json.dumps(payload.get("old_pk"))
+        if op == "DELETE" or (op == "UPDATE" and old_key != key):
+            item = self.items.pop(key if op == "DELETE" else old_key, None)
+            if item:
+                self.tree.delete(item)
+        if op != "DELETE" and payload.get("row"):
+            self.apply_row(payload["row"], tags=("changed", ))
+            self.tree.see(self.items[key])
+        self.applied += 1
+        if self.on_change:
+            self.on_change(self.table)
+        self.status.config(text=f"{len(self.items)} rows, {self.applied} change(s) applied, last: {op} "
+                                f"{self.prim_key}={payload.get('pk')} at {time.strftime('%H:%M:%S')}")
+
+    def remove_trigger(self):
+        """Drop the notification trigger and close the view"""
+        if not messagebox.askokcancel(title="Remove trigger", parent=self,
+                                      message=f"Drop trigger 'dbadmin_notify_{self.table}' from {self.table}?"):
+            return
+        connection = self.connect()
+        try:
+            remove_notify_trigger(connection, self.table)
+        except Exception as e:
+            messagebox.showerror(title="Remove trigger", message=f"{e}", parent=self)
+            return
+        finally:
+            connection.close()
+        self.close()
+
+    def close(self):
+        """Stop listener thread and close window"""
+        self.stop_event.set()
+        self.destroy()
+
+
+class IndexAdvisor(Toplevel):
+    """Recommend missing and unused indexes of the current database and apply them
+    - recommendations come from advise_indexes() (pg_stat_user_tables, pg_stat_user_indexes, psql["where_log"])
+    - selected recommendations run as CREATE/DROP/REINDEX INDEX CONCURRENTLY on an autocommit connection in a
+      background thread; progress is polled from pg_stat_progress_create_index on a second connection
+    - an invalid index (left by an interrupted CREATE INDEX CONCURRENTLY) of the same name is dropped before
+      creating, IF NOT EXISTS would skip it otherwise"""
+
+    def __init__(self, parent, connect, recommendations, on_done=None):
+        """connect returns a new psycopg2 connection, on_done is called after indexes were changed"""
+        Toplevel.__init__(self, parent)
+        self.title("Index Advisor")
+        self.connect = connect
+        self.recommendations = recommendations
+        self.on_done = on_done
+
+        # class vars
+        self.queue = []
+        self.future = None
+        self.worker_pid = None
+        self.monitor = None
+
+        # recommendations
+        columns = ["action", "table", "columns", "reason"]
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=12, selectmode="extended")
+        for column, width in zip(columns, [60, 120, 160, 420]):
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=width, anchor="w")
+        for idx, rec in enumerate(recommendations):
+            self.tree.insert("", "end", iid=str(idx), values=[rec["action"], rec["table"], ", ".join(rec["columns"]),
+                                                              rec["reason"]])
+        self.tree.pack(side="top", fill="both", expand=True, padx=5, pady=5)
+        if not recommendations:
+            self.tree.insert("", "end", values=["-", "-", "-", "No recommendations"])
+
+        # actions and progress
+        bottom = Frame(self)
+        bottom.pack(side="top", fill="x", padx=5, pady=5)
+        self.apply_button = Button(bottom, text="Apply selected", command=self.apply_selected)
+        self.apply_button.pack(side="left", padx=2)
+        self.progress = ttk.Progressbar(bottom, length=200, mode="determinate", orient="horizontal")
+        self.progress.pack(side="left", padx=5)
+        self.status = Label(bottom, text="")
+        self.status.pack(side="left", padx=5)
+
+    def apply_selected(self):
+        """Queue selected recommendations and start the first one"""
+        selected = [self.recommendations[int(f)] for f in self.tree.selection() if f.isdigit()]
+        if not selected:
+            return
+        if not messagebox.askokcancel(title="Apply indexes", parent=self,
+                                      message="\n".join(f["sql"] for f in selected)):
+            return
+        self.apply_button.configure(state="disabled")
+        self.queue = selected
+        self.monitor = self.connect()
+        self.monitor.autocommit = True
+        self.next_statement()
+
+    def next_statement(self):
+        """Run next queued statement in the executor and poll its progress"""
+        if not self.queue:
+            self.monitor.close()
+            self.apply_button.configure(state="normal")
+            self.status.config(text="Done")
+            if self.on_done:
+                self.on_done()
+            return
+
+        rec = self.queue.pop(0)
+        self.status.config(text=rec["sql"])
+        self.progress["value"] = 0
+        self.worker_pid = None
+
+        def work():
+            connection = self.connect()
+            connection.autocommit = True  # CONCURRENTLY can not run inside a transaction block
+            try:
+                self.worker_pid = connection.get_backend_pid()
+                with connection.cursor() as cursor:
+                    if rec["action"] == "create":
+                        cursor.execute("""SELECT x.indisvalid FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+                                           WHERE i.relname = %s AND pg_table_is_visible(i.oid)""", (rec["index"], ))
+                        row = cursor.fetchone()
+                        if row and not row[0]:
+                            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{rec["index"]}"')
+                    cursor.execute(rec["sql"])
+            finally:
+                connection.close()
+
+        self.future = executor.submit(work)
+        self.after(500, self.poll_progress)
+
+    def poll_progress(self):
+        """Show phase and progress of the running CREATE INDEX, continue with the next statement when done"""
+        if self.future.done():
+            error = self.future.exception()
+            if error:
+                messagebox.showerror(title="Index Advisor", message=f"{error}", parent=self)
+            self.progress["value"] = 100
+            self.next_statement()
+            return
+
+        if self.monitor.server_version >= 120000 and self.worker_pid is not None:
+            with self.monitor.cursor() as cursor:
+                cursor.execute("""SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total
+                                    FROM pg_stat_progress_create_index WHERE pid = %s""", (self.worker_pid,))
+                row = cursor.fetchone()
+            if row:
+                phase, blocks_done, blocks_total, tuples_done, tuples_total = row
+                if blocks_total:
+                    self.progress["value"] = blocks_done / blocks_total * 100
+                elif tuples_total:
+                    self.progress["value"] = tuples_done / tuples_total * 100
+                self.status.config(text=f"{phase}")
+        self.after(500, self.poll_progress)
+
+
+class DialogReplicate(simpledialog.Dialog):
+    """Supplementary class used by MongoDBTab.replicate() to configure a copy between PostgreSQL and MongoDB"""
+
+    def __init__(self, parent, title, tables, collection):
+        """tables are the tables of the current PostgreSQL DB, collection the name of the selected collection"""
+        # custom arguments
+        self.tables = tables
+        self.collection = collection
+
+        # class vars
+        self.direction = StringVar(value="to_mongo")
+        self.mapper = StringVar(value="default")
+        self.workers = StringVar(value="4")
+
+        # forward default arguments to init
+        simpledialog.Dialog.__init__(self, parent, title)
+
+    def body(self, master):
+        """Body of popup"""
+        Label(master, text="Direction:").grid(row=0, column=0, padx=2, pady=2, sticky="W")
+        frame = Frame(master)
+        frame.grid(row=0, column=1, padx=2, pady=2, sticky="W")
+        ttk.Radiobutton(frame, text="PostgreSQL > MongoDB", value="to_mongo", variable=self.direction).pack(side="left")
+        ttk.Radiobutton(frame, text="MongoDB > PostgreSQL", value="to_psql", variable=self.direction).pack(side="left")
+
+        Label(master, text="Table:").grid(row=1, column=0, padx=2, pady=2, sticky="W")
+        self.table = ttk.Combobox(master, values=self.tables, state="readonly")
+        if self.tables:
+            self.table.current(0)
+        self.table.grid(row=1, column=1, padx=2, pady=2, sticky="W")
+
+        Label(master, text="Collection:").grid(row=2, column=0, padx=2, pady=2, sticky="W")
+        self.collection_entry = Entry(master, width=30)
+        self.collection_entry.insert(0, self.collection)
+        self.collection_entry.grid(row=2, column=1, padx=2, pady=2, sticky="W")
+
+        Label(master, text="Mapper:").grid(row=3, column=0, padx=2, pady=2, sticky="W")
+        ttk.Combobox(master, textvariable=self.mapper, values=sorted(set(row_mappers) | set(document_mappers)),
+                     state="readonly").grid(row=3, column=1, padx=2, pady=2, sticky="W")
+
+        Label(master, text="Parallel workers:").grid(row=4, column=0, padx=2, pady=2, sticky="W")
+        ttk.Combobox(master, textvariable=self.workers, values=["1", "2", "4", "8"], width=4).\
+            grid(row=4, column=1, padx=2, pady=2, sticky="W")
+
+        Label(master, text="Checkpoint file:").grid(row=5, column=0, padx=2, pady=2, sticky="W")
+        self.checkpoint = Entry(master, width=40)
+        self.checkpoint.insert(0, "replication_checkpoint.json")
+        self.checkpoint.grid(row=5, column=1, padx=2, pady=2, sticky="W")
+        create_tooltip(self.checkpoint, "Rerun with the same file to resume an interrupted copy, empty to disable")
+
+    def validate(self):
+        """Number of workers has to be a positive integer"""
+        if not self.workers.get().strip().isdigit() or int(self.workers.get()) < 1:
+            messagebox.showerror("Error", "Parallel workers has to be a positive integer.")
+            return False
+        return True
+
+    def apply(self):
+        """Hand over results"""
+        self.result = {
+            "direction": self.direction.get(),
+            "table": self.table.get(),
+            "collection": self.collection_entry.get().strip(),
+            "mapper": self.mapper.get(),
+            "workers": int(self.workers.get()),
+            "checkpoint": self.checkpoint.get().strip() or None
+        }
+
+
 class ToolTip(object):
     """Tooltip class
     - Call with create_tooltip(widget, text)"""
@@ -443,38 +1246,36 @@ class ToolTip(object):
 ################################################################################################################### """
 
 
-def read_config(filename="config.ini", section=None):
-    """Parse DB config from .ini file"""
-    parser = ConfigParser()
-    if not os.path.isfile(filename):
-        print(f"Couldnt find {os.path.abspath(filename)}. Creating default config ..")
-        with open(filename, "w") as f:
-            f.write("""[postgresql]
-server=0.0.0.0
-port=5432
-user=postgresadmin
-pass=123
-sslmode=require
-
-[mongodb]
-server=0.0.0.0
-port=27017
-user=mongoadmin
-pass=123
-""")
-
-    ret = parser.read(filename)
-    print("Parsed:", ret)
-
-    content = {}
-    if parser.has_section(section):
-        params = parser.items(section)
-        for param in params:
-            content[param[0]] = param[1]
+@atexit.register
+def remove_temporary_files():
+    """Remove the temporary files written for viewing (files still locked by a viewer are left)"""
+    for path in temporary_files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def open_file(filename):
+    """Open a file with the default application of the OS (os.startfile is only available on Windows)"""
+    if platform.system() == "Windows":
+        os.startfile(filename)
+    elif platform.system() == "Darwin":
+        subprocess.Popen(["open", filename])
     else:
-        raise Exception(f'Section {section} not found in {filename}')
+        subprocess.Popen(["xdg-open", filename])
+
+
+class TeeSink(object):
+    """Sink for render_table() which writes every chunk to all targets (e.g. sys.stdout and a file)"""
+
+    def __init__(self, *targets):
+        self.targets = targets
 
-    return content
+    def write(self, text):
+        for target in self.targets:
+            target.write(text)
+        return len(text)
 
 
 def create_tooltip(widget, text):
@@ -498,6 +1299,768 @@ def create_tooltip(widget, text):
     widget.bind('<Leave>', leave)
 
 
+def read_import_rows(raw_file, path):
+    """Generator over the rows of a .csv, .tsv or .jsonl file opened in binary mode
+    - first yield is the header (list of column names; None for csv/tsv files without a header matching a column)
+    - following yields are (line number, row) with row being a list (csv/tsv) or a dict (jsonl); jsonl lines which
+      are no valid json object yield a ValueError as row, so the caller reports them like other invalid rows
+    - raw_file.tell() can be used by the caller to report progress"""
+    text = io.TextIOWrapper(raw_file, encoding="utf-8", newline="")
+    extension = os.path.splitext(path)[1].lower()
+
+    try:
+        if extension in [".jsonl", ".ndjson"]:
+            yield None
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, ValueError(f"invalid json: {e}")
+                    continue
+                yield line_no, row if isinstance(row, dict) else ValueError(
+                    f"expected a json object, got {type(row).__name__}")
+            return
+
+        reader = csv.reader(text, delimiter="\t" if extension in [".tsv", ".tab"] else ",")
+        for line_no, row in enumerate(reader, start=1):
+            if line_no == 1:
+                yield row
+                continue
+            yield line_no, row
+    finally:
+        # hand raw_file back to the caller instead of closing it with the wrapper
+        text.detach()
+
+
+def convert_import_value(value, base_type):
+    """Validate a single value against the base type of its column (pg_type.typname) and return it as string for COPY
+    - empty strings and None are imported as NULL
+    - raises ValueError if the value can not be converted"""
+    if value is None or value == "":
+        return None
+
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif isinstance(value, bool):
+        value = "true" if value else "false"
+    else:
+        value = str(value)
+
+    if base_type in integer_ranges:
+        check_integer(value, base_type)
+    elif "_" in value and base_type in ["float4", "float8", "numeric"]:
+        raise ValueError(f"invalid number '{value}'")  # accepted by float(), not by PostgreSQL
+    elif base_type in ["float4", "float8", "numeric"]:
+        float(value)
+    elif base_type == "bool":
+        if value.lower() not in ["t", "f", "true", "false", "y", "n", "yes", "no", "on", "off", "1", "0"]:
+            raise ValueError(f"invalid boolean '{value}'")
+    elif base_type in ["json", "jsonb"]:
+        json.loads(value)
+    elif base_type == "uuid":
+        uuid.UUID(value)
+    elif base_type == "date":
+        datetime.date.fromisoformat(value)
+
+    return value
+
+
+def import_table_rows(connect, table, entry, path, chunk_size=10000, progress=None):
+    """Bulk import a .csv/.tsv (first line = header) or .jsonl file into table on a new connection (connect())
+    - entry is the cached catalog entry of table (SchemaCache.table); rows are validated against its column types,
+      invalid rows are skipped and returned with their line number
+    - valid rows are streamed in chunks of chunk_size via COPY FROM STDIN and committed in one transaction, the
+      import is rolled back on any other error
+    - progress(percent, text) is called after every chunk
+    - returns {"imported", "invalid": [(line number, error)], "seconds"}"""
+    file_size = max(os.path.getsize(path), 1)
+    imported, invalid = 0, []
+    start = time.perf_counter()
+    connection = connect()
+
+    def copy_chunk(chunk, columns):
+        """Stream one chunk of rows into the table"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(chunk)
+        buffer.seek(0)
+        cols = ", ".join(f'"{f}"' for f in columns)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"""COPY "{table}" ({cols}) FROM STDIN WITH (FORMAT csv)""", buffer)
+
+    try:
+        with open(path, "rb") as raw_file:
+            rows = read_import_rows(raw_file, path)
+            header = next(rows, None)
+
+            # csv/tsv: use header if it names table columns, otherwise expect all columns in table order
+            if header is not None and set(header) <= set(entry["columns"]):
+                columns = header
+            elif header is not None:
+                columns = entry["columns"]
+                rows = chain([(1, header)], rows)
+            else:
+                columns = []  # jsonl: union of the keys (table columns) of the documents read so far
+
+            chunk = []
+            for line_no, row in rows:
+                if isinstance(row, ValueError):
+                    invalid.append((line_no, row))
+                    continue
+                if isinstance(row, dict):
+                    if any(f in row and f not in columns for f in entry["columns"]):
+                        # new keys: copy the rows read so far with the previous columns, continue with all
+                        if chunk:
+                            copy_chunk(chunk, columns)
+                            imported += len(chunk)
+                            chunk = []
+                        columns = [f for f in entry["columns"] if f in row or f in columns]
+                    row = [row.get(f) for f in columns]
+
+                try:
+                    if not columns:
+                        raise ValueError("no value for a column of the table")
+                    if len(row) != len(columns):
+                        raise ValueError(f"expected {len(columns)} values, got {len(row)}")
+                    chunk.append([convert_import_value(v, entry["base_types"][c]) for v, c in zip(row, columns)])
+                except ValueError as e:
+                    invalid.append((line_no, e))
+                    continue
+
+                if len(chunk) >= chunk_size:
+                    copy_chunk(chunk, columns)
+                    imported += len(chunk)
+                    chunk = []
+                    if progress:
+                        elapsed = time.perf_counter() - start
+                        progress(raw_file.tell() / file_size * 100,
+                                 f"{imported} rows imported ({imported / elapsed:.0f} rows/s)")
+
+            if chunk:
+                copy_chunk(chunk, columns)
+                imported += len(chunk)
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return {"imported": imported, "invalid": invalid, "seconds": time.perf_counter() - start}
+
+
+# value ranges of the integer types, [-range, range)
+integer_ranges = {"int2": 2 ** 15, "int4": 2 ** 31, "int8": 2 ** 63}
+
+
+def check_integer(value, base_type):
+    """int(value) if value is an integer within the range of base_type, raises ValueError otherwise (also for
+    digits separated by '_', which int() accepts but PostgreSQL does not)"""
+    if "_" in value:
+        raise ValueError(f"invalid integer '{value}'")
+    number = int(value)
+    if not -integer_ranges[base_type] <= number < integer_ranges[base_type]:
+        raise ValueError(f"'{value}' is out of range for {base_type}")
+    return number
+
+
+def cast_search_value(value, base_type):
+    """Check if a searched string can be compared to a column of base_type (pg_type.typname)
+    - returns "text" for text columns (usable with pg_trgm), "exact" for other compatible columns, None otherwise
+    - only columns which pass this check are searched, so the query never fails on invalid casts"""
+    try:
+        if base_type in ["text", "varchar", "bpchar", "name", "citext"]:
+            return "text"
+        if base_type in integer_ranges:
+            check_integer(value, base_type)
+            return "exact"
+        if base_type in ["float4", "float8", "numeric"]:
+            float(value)
+        elif base_type == "bool":
+            if value.lower() not in ["t", "f", "true", "false", "y", "n", "yes", "no", "on", "off", "1", "0"]:
+                return None
+        elif base_type == "uuid":
+            uuid.UUID(value)
+        elif base_type == "date":
+            datetime.date.fromisoformat(value)
+        elif base_type in ["timestamp", "timestamptz"]:
+            datetime.datetime.fromisoformat(value)
+        else:
+            return None
+    except ValueError:
+        return None
+    return "exact"
+
+
+def build_search_query(entry, table, prim_key, value, columns=None, fuzzy=False):
+    """Build a single query returning (primary key, matched column) for every match of value
+    - entry is the cached catalog entry of table (SchemaCache.table)
+    - indexed columns get their own UNION ALL branch so the planner can use their index, all other compatible
+      columns are checked together in one sequential scan
+    - with fuzzy=True text columns are compared with the pg_trgm similarity operator instead of equality
+    - returns (sql, params, searched columns) or (None, None, []) if no column is compatible"""
+    indexed = {f["columns"][0] for f in entry["indexes"] if f["columns"]}
+    branches, params, searched, scanned = [], [], [], []
+
+    for column in (columns or entry["columns"]):
+        category = cast_search_value(value, entry["base_types"].get(column))
+        if not category:
+            continue
+        searched.append(column)
+        # the column name is returned as string literal; % is doubled for the parameter formatting
+        quoted, literal = column.replace("%", "%%"), column.replace("'", "''").replace("%", "%%")
+
+        if fuzzy and category == "text":
+            condition = f'"{quoted}" %% %s'
+        else:
+            # cast the constant (not the column) to the column type, keeps indexes usable
+            condition = f'"{quoted}" = %s::{entry["types"][column]}'
+
+        if column in indexed:
+            branches.append(f"""SELECT "{prim_key}", '{literal}' FROM "{table}" WHERE {condition}""")
+            params.append(value)
+        else:
+            scanned.append((literal, condition))
+
+    if scanned:
+        cases = ", ".join(f"""CASE WHEN {c} THEN '{col}' END""" for col, c in scanned)
+        conditions = " OR ".join(c for _, c in scanned)
+        branches.append(f"""SELECT "{prim_key}", unnest(array_remove(ARRAY[{cases}], NULL)) FROM "{table}"
+                            WHERE {conditions}""")
+        params.extend([value] * len(scanned) * 2)
+
+    if not branches:
+        return None, None, []
+    return "\nUNION ALL\n".join(branches), params, searched
+
+
+def collect_stats(connection):
+    """Collect one statistics snapshot of the database behind connection (used by StatsDashboard)
+    - activity: running backends except the own one
+    - tables: seq vs index scans, live/dead tuples, dead tuple ratio as bloat estimate, heap cache hit ratio, size
+    - statements: top 10 of pg_stat_statements by total time, None if the extension is not installed
+    - locks: all locks of the database, not granted ones are waiting"""
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("""SELECT pid, usename, state, date_trunc('second', now() - query_start)::text,
+                                 coalesce(wait_event_type || ':' || wait_event, ''), left(query, 200)
+                            FROM pg_stat_activity
+                           WHERE datname = current_database() AND pid <> pg_backend_pid()
+                           ORDER BY query_start NULLS LAST""")
+        activity = cursor.fetchall()
+
+        cursor.execute("""SELECT xact_commit + xact_rollback,
+                                 round(100.0 * blks_hit / greatest(blks_hit + blks_read, 1), 2)
+                            FROM pg_stat_database WHERE datname = current_database()""")
+        xacts, cache_hit = cursor.fetchone()
+
+        cursor.execute("""SELECT s.relname, s.seq_scan, coalesce(s.idx_scan, 0),
+                                 round(100.0 * s.seq_scan / greatest(s.seq_scan + coalesce(s.idx_scan, 0), 1), 1),
+                                 s.n_live_tup, s.n_dead_tup,
+                                 round(100.0 * s.n_dead_tup / greatest(s.n_live_tup + s.n_dead_tup, 1), 1),
+                                 round(100.0 * io.heap_blks_hit / greatest(io.heap_blks_hit + io.heap_blks_read, 1), 1),
+                                 pg_size_pretty(pg_total_relation_size(s.relid))
+                            FROM pg_stat_user_tables s JOIN pg_statio_user_tables io ON io.relid = s.relid
+                           ORDER BY pg_total_relation_size(s.relid) DESC""")
+        tables = [[float(f) if isinstance(f, decimal.Decimal) else f for f in row] for row in cursor.fetchall()]
+
+        statements = None
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+        if cursor.fetchone():
+            # column names changed with PostgreSQL 13
+            total = "total_exec_time" if connection.server_version >= 130000 else "total_time"
+            mean = "mean_exec_time" if connection.server_version >= 130000 else "mean_time"
+            cursor.execute(f"""SELECT calls, round({total}::numeric, 1), round({mean}::numeric, 3), rows,
+                                      left(query, 200)
+                                 FROM pg_stat_statements
+                                WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+                                ORDER BY {total} DESC LIMIT 10""")
+            statements = cursor.fetchall()
+
+        cursor.execute("""SELECT l.pid, l.locktype, coalesce(c.relname, ''), l.mode, l.granted
+                            FROM pg_locks l LEFT JOIN pg_class c ON c.oid = l.relation
+                           WHERE l.database = (SELECT oid FROM pg_database WHERE datname = current_database())
+                           ORDER BY l.granted, l.pid""")
+        locks = cursor.fetchall()
+
+    seq_scans = sum(f[1] for f in tables)
+    scans = seq_scans + sum(f[2] for f in tables)
+    return {
+        "time": time.time(),
+        "duration": time.perf_counter() - start,
+        "activity": activity,
+        "database": {"xacts": xacts, "cache_hit": float(cache_hit),
+                     "seq_ratio": 100.0 * seq_scans / scans if scans else 0.0},
+        "tables": tables,
+        "statements": statements,
+        "locks": locks
+    }
+
+
+def draw_sparkline(canvas, values):
+    """Draw values as a line scaled to the size of canvas"""
+    canvas.delete("all")
+    if len(values) < 2:
+        return
+    width, height = int(canvas.cget("width")), int(canvas.cget("height"))
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    step = width / (len(values) - 1)
+    points = []
+    for idx, value in enumerate(values):
+        points.extend([idx * step, height - 2 - (value - low) / span * (height - 4)])
+    canvas.create_line(*points, fill="blue")
+
+
+def columns_in_clause(clause, columns):
+    """Columns of a table which are referenced in a free-form WHERE clause (quoted or unquoted identifiers)"""
+    clause = re.sub(r"'(?:''|[^'])*'", "", clause)  # ignore string literals
+    tokens = set(re.findall(r'"([^"]+)"|([A-Za-z_][A-Za-z0-9_]*)', clause))
+    tokens = {f[0] or f[1].lower() for f in tokens}
+    return [f for f in columns if f in tokens]
+
+
+def advise_indexes(catalog, table_stats, index_stats, where_log, min_rows=10000):
+    """Derive index recommendations from usage statistics and the WHERE clauses run through the tool
+    - catalog: SchemaCache.load(), table_stats: {table: (seq_scan, seq_tup_read, idx_scan, n_live_tup)},
+      index_stats: {index name: (table, idx_scan, size in bytes)}, where_log: iterable of (table, columns)
+    - create: columns filtered on by the tool which are not the leading column of an index, on tables with at least
+      min_rows rows which are mostly read sequentially
+    - drop: indexes which were never scanned and are not backing a primary key or unique constraint
+    - rebuild: invalid indexes (interrupted CREATE INDEX CONCURRENTLY), which are maintained but never used
+    - returns a list of dicts with action, table, columns, reason and sql"""
+    recommendations = []
+
+    # count filtered columns per table
+    usage = {}
+    for table, columns in where_log:
+        for column in columns:
+            usage.setdefault(table, {}).setdefault(column, 0)
+            usage[table][column] += 1
+
+    for table, columns in usage.items():
+        if table not in catalog or table not in table_stats:
+            continue
+        seq_scan, seq_tup_read, idx_scan, live = table_stats[table]
+        indexed = {f["columns"][0] for f in catalog[table]["indexes"] if f["columns"]}  # invalid ones are rebuilt
+        if live < min_rows or seq_scan <= idx_scan:
+            continue
+        for column, count in sorted(columns.items(), key=lambda f: -f[1]):
+            if column in indexed:
+                continue
+            recommendations.append({
+                "action": "create", "table": table, "columns": [column], "index": f"{table}_{column}_idx",
+                "reason": f"filtered {count}x by the tool; {seq_scan} seq scans read "
+                          f"{seq_tup_read // max(seq_scan, 1)} rows each, {idx_scan} index scans",
+                "sql": f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{table}_{column}_idx" ON "{table}" ("{column}")'
+            })
+
+    for index, (table, idx_scan, size) in index_stats.items():
+        entry = [f for f in catalog.get(table, {}).get("indexes", []) if f["name"] == index]
+        if idx_scan or not entry or entry[0]["primary"] or entry[0]["unique"] or not entry[0]["valid"]:
+            continue
+        recommendations.append({
+            "action": "drop", "table": table, "columns": entry[0]["columns"],
+            "reason": f"{index} was never scanned since the last stats reset, wastes {size / 1e6:.1f} MB and slows "
+                      f"down writes",
+            "sql": f'DROP INDEX CONCURRENTLY IF EXISTS "{index}"'
+        })
+
+    for table, entry in catalog.items():
+        for index in [f for f in entry["indexes"] if not f["valid"]]:
+            recommendations.append({
+                "action": "rebuild", "table": table, "columns": index["columns"] or [],
+                "reason": f"{index['name']} is invalid (interrupted CREATE INDEX CONCURRENTLY), it is not used by "
+                          f"queries but still updated on writes",
+                "sql": f'REINDEX INDEX CONCURRENTLY "{index["name"]}"'
+            })
+
+    return recommendations
+
+
+def import_documents(collection, path, batch_size=1000, retries=3, progress=None):
+    """Stream a .jsonl (MongoDB extended JSON per line) or .csv (header = field names, values stay strings) file
+    into collection with insert_many(ordered=False) in batches of batch_size
+    - a .json file starting with '[' is read as one array of documents (not streamed), otherwise like .jsonl
+    - lines which are no valid json object are skipped and returned with their line number (like read_import_rows)
+    - documents failing with a non-duplicate write error or a connection error are retried up to retries times
+    - progress(percent, inserted) is called after every batch
+    - returns {"inserted", "failed", "invalid": [(line number, error)], "seconds"}"""
+    stats = {"inserted": 0, "failed": 0, "invalid": [], "seconds": 0}
+    start = time.perf_counter()
+    file_size = max(os.path.getsize(path), 1)
+
+    def insert(batch):
+        """Insert one batch, retry failed documents"""
+        for attempt in range(retries + 1):
+            try:
+                stats["inserted"] += len(collection.insert_many(batch, ordered=False).inserted_ids)
+                return
+            except BulkWriteError as e:
+                stats["inserted"] += e.details["nInserted"]
+                errors = e.details["writeErrors"]
+                # duplicate keys (11000) fail again on retry, count them as failed right away
+                stats["failed"] += sum(1 for f in errors if f["code"] == 11000)
+                batch = [batch[f["index"]] for f in errors if f["code"] != 11000]
+            except AutoReconnect:
+                pass  # batch is retried; ordered=False inserts are not rolled back, duplicates then count as failed
+            if not batch:
+                return
+            time.sleep(0.5 * 2 ** attempt)
+        stats["failed"] += len(batch)
+
+    def parse_lines(text):
+        """(line number, document or ValueError) of every non-empty line"""
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                doc = json_util.loads(line)
+            except ValueError as e:
+                yield line_no, ValueError(f"invalid json: {e}")
+                continue
+            yield line_no, doc if isinstance(doc, dict) else ValueError(
+                f"expected a json object, got {type(doc).__name__}")
+
+    with open(path, "rb") as raw_file:
+        text = io.TextIOWrapper(raw_file, encoding="utf-8", newline="")
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            docs = enumerate(csv.DictReader(text), start=2)
+        elif extension == ".json" and text.read(1024).lstrip().startswith("["):
+            text.seek(0)
+            docs = enumerate(json_util.loads(text.read()), start=1)  # number of the document in the array
+        else:
+            text.seek(0)
+            docs = parse_lines(text)
+
+        batch = []
+        for line_no, doc in docs:
+            if not isinstance(doc, dict):
+                stats["invalid"].append((line_no, doc if isinstance(doc, ValueError)
+                                         else ValueError(f"expected a json object, got {type(doc).__name__}")))
+                continue
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                insert(batch)
+                batch = []
+                if progress:
+                    progress(raw_file.tell() / file_size * 100, stats["inserted"])
+        if batch:
+            insert(batch)
+        text.detach()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def export_documents(collection, path, query=None, projection=None, batch_size=1000, progress=None):
+    """Stream documents matching query to .jsonl (extended JSON) or .csv (fields of the first batch as columns)
+    - the cursor is iterated with batch_size, documents are written one by one (constant memory)
+    - progress(percent, exported) is called every batch_size documents
+    - returns {"exported", "seconds"}"""
+    start = time.perf_counter()
+    query = query or {}
+    total = collection.count_documents(query) if query else collection.estimated_document_count()
+    exported = 0
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        cursor = collection.find(query, projection).batch_size(batch_size)
+        if os.path.splitext(path)[1].lower() == ".csv":
+            first = [f for _, f in zip(range(batch_size), cursor)]
+            fields = list(OrderedDict.fromkeys(k for doc in first for k in doc))
+            writer = csv.DictWriter(file, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            write = writer.writerow
+            docs = chain(first, cursor)
+        else:
+            write = lambda doc: file.write(json_util.dumps(doc) + "\n")
+            docs = cursor
+
+        for doc in docs:
+            write(doc)
+            exported += 1
+            if progress and exported % batch_size == 0:
+                progress(min(exported / max(total, 1) * 100, 99), exported)
+
+    return {"exported": exported, "seconds": time.perf_counter() - start}
+
+
+def default_row_mapper(columns, row, prim_key):
+    """Map a PostgreSQL row to a MongoDB document; the primary key becomes _id so copies can be resumed/repeated
+    - converts values BSON can not encode (Decimal, date, time, UUID, memoryview)"""
+    doc = {}
+    for column, value in zip(columns, row):
+        if isinstance(value, decimal.Decimal):
+            value = Decimal128(value)
+        elif isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+            value = datetime.datetime.combine(value, datetime.time())
+        elif isinstance(value, (datetime.time, uuid.UUID)):
+            value = str(value)
+        elif isinstance(value, memoryview):
+            value = bytes(value)
+        doc["_id" if column == prim_key else column] = value
+    return doc
+
+
+def default_document_mapper(columns, doc, prim_key):
+    """Map a MongoDB document to a row for the given columns; _id fills the primary key column, nested documents
+    and arrays are stored as JSON, other BSON types as string"""
+    row = []
+    for column in columns:
+        value = doc.get("_id" if column == prim_key and column not in doc else column)
+        if isinstance(value, (dict, list)):
+            value = psycopg2.extras.Json(json.loads(json_util.dumps(value)))
+        elif isinstance(value, Decimal128):
+            value = value.to_decimal()
+        elif value is not None and not isinstance(value, (str, int, float, bool, datetime.datetime, bytes)):
+            value = str(value)
+        row.append(value)
+    return tuple(row)
+
+
+# pluggable mappers for replication, selectable by name in DialogReplicate
+row_mappers = {"default": default_row_mapper}
+document_mappers = {"default": default_document_mapper}
+
+
+class Checkpoint(object):
+    """Thread-safe, resumable progress of a replication, persisted as json (atomic write via os.replace)"""
+
+    def __init__(self, path, job):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {"job": job, "chunks": {}}
+        if path and os.path.isfile(path):
+            with open(path, "r") as f:
+                state = json.load(f)
+            if state.get("job") == job:
+                self.state = state
+                print(f"Resuming from checkpoint {path}")
+
+    def get(self, chunk):
+        return self.state["chunks"].get(chunk)
+
+    def ranges(self, ranges):
+        """Key ranges of the job: the stored ones when resuming (chunks are named after them), extended by ranges
+        for keys below/above them; otherwise ranges, which are stored"""
+        stored = [tuple(f) for f in self.state.get("ranges", [])]
+        if stored and stored[0][0] is not None and ranges[0][0] is not None:
+            low, high = ranges[0][0], ranges[-1][1]
+            if low < stored[0][0]:
+                stored.insert(0, (low, stored[0][0]))
+            if high > stored[-1][1]:
+                stored.append((stored[-1][1], high))
+            ranges = stored
+        elif stored == ranges:
+            return ranges
+        with self.lock:
+            self.state["ranges"] = ranges
+        self.save()
+        return ranges
+
+    def set(self, chunk, value):
+        with self.lock:
+            self.state["chunks"][chunk] = value
+        self.save()
+
+    def save(self):
+        with self.lock:
+            if self.path:
+                with open(self.path + ".tmp", "w") as f:
+                    json.dump(self.state, f)
+                os.replace(self.path + ".tmp", self.path)
+
+
+def replicate_table_to_collection(connect, table, prim_key, collection, mapper=default_row_mapper, workers=4,
+                                  batch_size=1000, checkpoint_path=None, progress=None):
+    """Copy a PostgreSQL table into a MongoDB collection
+    - integer primary keys are split into workers * 4 key ranges which are copied in parallel, each on its own
+      connection with a server-side cursor; other primary keys are copied as one range
+    - every range stores the last copied primary key in the checkpoint after each insert_many, so an interrupted
+      copy continues where it stopped; duplicates (already copied _id) are ignored
+    - the checkpoint keeps the key ranges, a resumed copy uses them regardless of workers or new min/max keys
+    - after a batch with failed rows (other than duplicates) its range is not checkpointed any further, a rerun
+      copies it again from the last complete batch
+    - returns {"inserted", "skipped" (duplicates), "failed", "seconds"}"""
+    start = time.perf_counter()
+    stats = {"inserted": 0, "skipped": 0, "failed": 0}
+    stats_lock = threading.Lock()
+    checkpoint = Checkpoint(checkpoint_path, f"{table}>{collection.full_name}")
+
+    with connect() as connection, connection.cursor() as cursor:
+        cursor.execute(f"""SELECT min("{prim_key}"), max("{prim_key}"), count(*) FROM "{table}" """)
+        low, high, total = cursor.fetchone()
+    connection.close()
+
+    if isinstance(low, int) and isinstance(high, int):
+        step = max((high - low + 1) // (workers * 4), 1)
+        ranges = [(f, min(f + step, high + 1)) for f in range(low, high + 1, step)]
+    else:
+        ranges, workers = [(None, None)], 1
+    ranges = checkpoint.ranges(ranges)
+
+    def copy_range(lo, hi):
+        chunk = f"{lo}-{hi}"
+        last = checkpoint.get(chunk)
+        if last == "done":
+            return
+        conditions, params = [], []
+        if lo is not None:
+            conditions.append(f'"{prim_key}" >= %s AND "{prim_key}" < %s')
+            params.extend([lo, hi])
+        if last is not None:
+            conditions.append(f'"{prim_key}" > %s')
+            params.append(last)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        connection = connect()
+        try:
+            with connection.cursor(name=f"replicate_{chunk}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(f"""SELECT * FROM "{table}"{where} ORDER BY "{prim_key}" """, params)
+                columns, complete = None, True
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if columns is None:
+                        columns = [f[0] for f in cursor.description]
+                    if not rows:
+                        break
+                    docs = [mapper(columns, row, prim_key) for row in rows]
+                    inserted, skipped, failed = len(docs), 0, 0
+                    try:
+                        collection.insert_many(docs, ordered=False)
+                    except BulkWriteError as e:
+                        inserted = e.details["nInserted"]
+                        skipped = sum(1 for f in e.details["writeErrors"] if f["code"] == 11000)
+                        failed = len(e.details["writeErrors"]) - skipped
+                    with stats_lock:
+                        stats["inserted"] += inserted
+                        stats["skipped"] += skipped
+                        stats["failed"] += failed
+                    complete = complete and not failed
+                    if complete:
+                        checkpoint.set(chunk, rows[-1][columns.index(prim_key)])
+                    if progress:
+                        progress(min(stats["inserted"] / max(total, 1) * 100, 99), stats["inserted"])
+            if complete:
+                checkpoint.set(chunk, "done")
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(copy_range, lo, hi) for lo, hi in ranges]:
+            future.result()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def replicate_collection_to_table(collection, connect, table, columns, prim_key, mapper=default_document_mapper,
+                                  batch_size=1000, checkpoint_path=None, progress=None):
+    """Copy a MongoDB collection into an existing PostgreSQL table
+    - documents are read sorted by _id from a batched cursor and inserted with execute_values,
+      ON CONFLICT DO NOTHING makes repeated runs idempotent; every batch is committed and checkpointed (last _id)
+    - returns {"inserted", "skipped" (rows which already existed), "failed", "seconds"}; other errors are raised"""
+    start = time.perf_counter()
+    stats = {"inserted": 0, "skipped": 0, "failed": 0}
+    checkpoint = Checkpoint(checkpoint_path, f"{collection.full_name}>{table}")
+    last = checkpoint.get("all")
+    if last == "done":
+        stats["seconds"] = 0
+        return stats
+
+    query = {"_id": {"$gt": json_util.loads(last)}} if last else {}
+    total = collection.count_documents(query) if query else collection.estimated_document_count()
+    cols = ", ".join(f'"{f}"' for f in columns)
+    sql = f"""INSERT INTO "{table}" ({cols}) VALUES %s ON CONFLICT DO NOTHING"""
+
+    connection = connect()
+    try:
+        cursor = collection.find(query).sort("_id", 1).batch_size(batch_size)
+        batch = []
+        for doc in chain(cursor, [None]):
+            if doc is not None:
+                batch.append(doc)
+            if batch and (doc is None or len(batch) >= batch_size):
+                with connection.cursor() as pg_cursor:
+                    psycopg2.extras.execute_values(pg_cursor, sql, [mapper(columns, f, prim_key) for f in batch],
+                                                   page_size=len(batch))
+                    stats["inserted"] += pg_cursor.rowcount
+                    stats["skipped"] += len(batch) - pg_cursor.rowcount
+                connection.commit()
+                checkpoint.set("all", json_util.dumps(batch[-1]["_id"]))
+                if progress:
+                    progress(min(stats["inserted"] / max(total, 1) * 100, 99), stats["inserted"])
+                batch = []
+        checkpoint.set("all", "done")
+    finally:
+        connection.close()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+notify_function_sql = """
+CREATE OR REPLACE FUNCTION dbadmin_notify() RETURNS trigger AS $$
+DECLARE
+    rec record;
+    payload text;
+BEGIN
+    IF TG_OP = 'DELETE' THEN rec := OLD; ELSE rec := NEW; END IF;
+    payload := json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'pk', to_json(rec) -> TG_ARGV[1],
+                                 'old_pk', CASE WHEN TG_OP = 'UPDATE' THEN to_json(OLD) -> TG_ARGV[1] END,
+                                 'row', to_json(rec))::text;
+    IF octet_length(payload) > 7900 THEN  -- NOTIFY payloads are limited to 8000 bytes, send the key only
+        payload := json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'pk', to_json(rec) -> TG_ARGV[1],
+                                     'old_pk', CASE WHEN TG_OP = 'UPDATE' THEN to_json(OLD) -> TG_ARGV[1] END)::text;
+    END IF;
+    PERFORM pg_notify(TG_ARGV[0], payload);
+    RETURN NULL;
+END $$ LANGUAGE plpgsql"""
+
+
+def notify_trigger_installed(connection, table):
+    """True if the change notification trigger of install_notify_trigger() exists on table"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_trigger WHERE tgname = %s AND tgrelid = %s::regclass",
+                       (f"dbadmin_notify_{table}", f'"{table}"'))
+        return cursor.fetchone() is not None
+
+
+def install_notify_trigger(connection, table, prim_key, channel):
+    """Install a row level trigger on table which NOTIFYs channel with a json payload
+    {"table", "op", "pk", "old_pk", "row"} on every INSERT/UPDATE/DELETE (row is omitted if too big)"""
+    with connection.cursor() as cursor:
+        cursor.execute(notify_function_sql)
+        cursor.execute(f"""DROP TRIGGER IF EXISTS "dbadmin_notify_{table}" ON "{table}";
+                           CREATE TRIGGER "dbadmin_notify_{table}" AFTER INSERT OR UPDATE OR DELETE ON "{table}"
+                           FOR EACH ROW EXECUTE PROCEDURE dbadmin_notify(%s, %s)""", (channel, prim_key))
+    connection.commit()
+
+
+def remove_notify_trigger(connection, table):
+    """Remove the trigger installed by install_notify_trigger()"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER IF EXISTS "dbadmin_notify_{table}" ON "{table}"')
+    connection.commit()
+
+
+def flatten_plan(plan, depth=0):
+    """Flatten an EXPLAIN (ANALYZE, FORMAT JSON) plan tree into a list of (depth, node, self time in ms)
+    - self time is the inclusive time of the node minus the inclusive time of its children (times loops)"""
+    total = plan.get("Actual Total Time", 0) * plan.get("Actual Loops", 1)
+    children = plan.get("Plans", [])
+    child_time = sum(f.get("Actual Total Time", 0) * f.get("Actual Loops", 1) for f in children)
+
+    nodes = [(depth, plan, max(total - child_time, 0))]
+    for child in children:
+        nodes.extend(flatten_plan(child, depth + 1))
+    return nodes
+
+
 """ ###################################################################################################################
 ################################################ PSQL main class ###################################################### 
 ################################################################################################################### """
@@ -506,11 +2069,16 @@ def create_tooltip(widget, text):
 class PostgreSQLTab(ttk.Frame):
     """Tab for PSQL Control"""
 
+    cell_width = 100  # longer cells are truncated by get_table_content
+
     def __init__(self, parent, *args, **kwargs):
         global psql
         ttk.Frame.__init__(self, parent, *args, **kwargs)
         self.root = parent
         self.show_output = BooleanVar(value=False)
+        psql["engine"] = PSQLEngine()
+        psql["schema"] = psql["engine"].schema
+        psql["statements"] = psql["engine"].statements
         self.build_psql_tab()
         self.disable_ui()
 
@@ -527,8 +2095,12 @@ class PostgreSQLTab(ttk.Frame):
         # psql["btns"]["close"] = Button(psql["frms"]["init"], text="Close", command=self.close_connection)
         psql["btns"]["get_version"] = Button(psql["frms"]["init"], text="Info", width=4,  command=self.get_info)
         psql["btns"]["rollback"] = Button(psql["frms"]["init"], text="Rollback", width=8,  command=self.rollback_db)
+        psql["btns"]["dashboard"] = Button(psql["frms"]["init"], text="Stats", width=5, command=self.open_dashboard)
+        create_tooltip(psql["btns"]["dashboard"], "Live server activity and table statistics")
+        psql["btns"]["advisor"] = Button(psql["frms"]["init"], text="Advisor", width=7, command=self.open_index_advisor)
+        create_tooltip(psql["btns"]["advisor"], "Recommend missing and unused indexes")
         psql["btns"]["open_cfg"] = Button(psql["frms"]["init"], text="CFG", width=4,
-                                          command=partial(os.startfile, "database.ini"))
+                                          command=partial(open_file, "database.ini"))
         # psql["btns"]["get_tables"] = Button(psql["frms"]["init"], text="Tables in DB", command=self.get_all_tables)
         # psql["btns"]["get_dbs"] = Button(psql["frms"]["init"], text="List DBs", command=self.get_all_dbs)
 
@@ -536,6 +2108,8 @@ class PostgreSQLTab(ttk.Frame):
         psql["btns"]["init"].pack(side="left", padx=2)
         psql["btns"]["get_version"].pack(side="left", padx=2)
         psql["btns"]["rollback"].pack(side="left", padx=2)
+        psql["btns"]["dashboard"].pack(side="left", padx=2)
+        psql["btns"]["advisor"].pack(side="left", padx=2)
         psql["btns"]["open_cfg"].pack(side="left", padx=2)
 
         ttk.Separator(self, orient=HORIZONTAL).grid(row=19, column=0, columnspan=99, sticky="ew", pady=10)
@@ -557,6 +2131,10 @@ class PostgreSQLTab(ttk.Frame):
         psql["btns"]["select_db"].grid(row=0, column=2, padx=2, pady=2, sticky="W")
         psql["btns"]["drop_db"] = Button(psql["frms"]["select_db"], text="Drop DB", command=self.drop_db)
         psql["btns"]["drop_db"].grid(row=0, column=3, padx=2, pady=2, sticky="W")
+        psql["btns"]["backup_db"] = Button(psql["frms"]["select_db"], text="Backup DB", command=self.backup_db)
+        psql["btns"]["backup_db"].grid(row=0, column=4, padx=2, pady=2, sticky="W")
+        psql["btns"]["restore_db"] = Button(psql["frms"]["select_db"], text="Restore DB", command=self.restore_db)
+        psql["btns"]["restore_db"].grid(row=0, column=5, padx=2, pady=2, sticky="W")
 
         # combobox to select table and button to create a new table
         psql["lbls"]["select_table_title"] = Label(psql["frms"]["select_db"], text="Select Table:")
@@ -580,6 +2158,10 @@ class PostgreSQLTab(ttk.Frame):
         psql["btns"]["table_content"] = Button(psql["frms"]["table_ops"], text="Get Content",
                                                command=self.get_table_content)
         psql["btns"]["table_content"].pack(side="left", padx=2)
+        psql["btns"]["table_live"] = Button(psql["frms"]["table_ops"], text="Live", width=5,
+                                            command=self.open_live_view)
+        create_tooltip(psql["btns"]["table_live"], "Table view refreshed by LISTEN/NOTIFY (installs a trigger)")
+        psql["btns"]["table_live"].pack(side="left", padx=2)
         psql["btns"]["table_insert"] = Button(psql["frms"]["table_ops"], text="Insert",
                                               command=self.insert_table_content)
         psql["btns"]["table_insert"].pack(side="left", padx=2)
@@ -589,6 +2171,46 @@ class PostgreSQLTab(ttk.Frame):
         psql["btns"]["table_delete"] = Button(psql["frms"]["table_ops"], text="Delete",
                                               command=self.delete_from_table)
         psql["btns"]["table_delete"].pack(side="left", padx=2)
+        psql["btns"]["table_batch"] = Button(psql["frms"]["table_ops"], text="Batch Edit",
+                                             command=self.batch_edit_table)
+        create_tooltip(psql["btns"]["table_batch"], "Edit and delete many rows in a grid, applied in one transaction")
+        psql["btns"]["table_batch"].pack(side="left", padx=2)
+        psql["btns"]["table_import"] = Button(psql["frms"]["table_ops"], text="Import",
+                                              command=self.import_table_content)
+        create_tooltip(psql["btns"]["table_import"], "Bulk import a .csv, .tsv or .jsonl file via COPY")
+        psql["btns"]["table_import"].pack(side="left", padx=2)
+        psql["btns"]["table_export"] = Button(psql["frms"]["table_ops"], text="Export",
+                                              command=self.export_table_content)
+        create_tooltip(psql["btns"]["table_export"], "Stream table to a .csv or .tsv file (optionally gzipped) via COPY")
+        psql["btns"]["table_export"].pack(side="left", padx=2)
+
+        # edit session: group changes of Insert/Update/Delete/Batch Edit into one transaction
+        psql["frms"]["session"] = Frame(self)
+        psql["frms"]["session"].grid(row=24, column=0, padx=5, pady=5, sticky="W", columnspan=3)
+        psql["btns"]["session"] = Button(psql["frms"]["session"], text="Begin Session", command=self.toggle_session)
+        create_tooltip(psql["btns"]["session"], "Collect changes in one transaction, commit them at once")
+        psql["btns"]["session"].grid(row=0, column=0, padx=2, pady=2, sticky="W")
+        psql["btns"]["session_undo"] = Button(psql["frms"]["session"], text="Undo", width=5, command=self.undo_session)
+        create_tooltip(psql["btns"]["session_undo"], "Roll back the last pending change")
+        psql["btns"]["session_undo"].grid(row=0, column=1, padx=2, pady=2, sticky="W")
+        psql["btns"]["session_discard"] = Button(psql["frms"]["session"], text="Discard", width=7,
+                                                 command=self.discard_session)
+        psql["btns"]["session_discard"].grid(row=0, column=2, padx=2, pady=2, sticky="W")
+        psql["vars"]["session"] = StringVar(value="")
+        psql["lbls"]["session"] = Label(psql["frms"]["session"], textvariable=psql["vars"]["session"])
+        psql["lbls"]["session"].grid(row=0, column=3, padx=2, pady=2, sticky="W")
+        psql["oths"]["session"] = Listbox(psql["frms"]["session"], height=4, width=80)
+        psql["oths"]["session"].grid(row=1, column=0, columnspan=4, padx=2, pady=2, sticky="W")
+
+        # progress of bulk operations (import, export) and throughput report
+        psql["frms"]["progress"] = Frame(self)
+        psql["frms"]["progress"].grid(row=25, column=0, padx=5, pady=5, sticky="W", columnspan=3)
+        psql["oths"]["progress"] = ttk.Progressbar(psql["frms"]["progress"], length=200, mode="determinate",
+                                                   orient="horizontal")
+        psql["oths"]["progress"].pack(side="left", padx=2)
+        psql["vars"]["progress"] = StringVar(value="")
+        psql["lbls"]["progress"] = Label(psql["frms"]["progress"], textvariable=psql["vars"]["progress"])
+        psql["lbls"]["progress"].pack(side="left", padx=2)
 
     def disable_ui(self):
         """Disables all 1st level frame-children except Connect button"""
@@ -606,29 +2228,31 @@ class PostgreSQLTab(ttk.Frame):
                 for c in child.winfo_children():
                     if c.widgetName in ["ttk::button", "ttk::combobox", "ttk::checkbutton"]:
                         c.configure(state="normal")
+        self.update_session_ui()
 
     """ ########################################### PSQL Functions ########################################### """
 
-    def query_all(self, qry=None, debug=False):
-        """Open cursor, execute query and return all fetch results"""
+    def query_all(self, qry=None, params=None, debug=False, prepare_key=None, cache_tables=None):
+        """Execute query (with optional bound params) and return all fetch results (see PSQLEngine.query)"""
         if debug:
             print(f"EXECUTING: {qry}")
-        with psql["connection"].cursor() as cursor:  # create cursor
-            cursor.execute(qry)  # execute query
-            ret = cursor.fetchall()  # fetch all results
+        return psql["engine"].query(qry, params, prepare_key=prepare_key, cache_tables=cache_tables)
 
-        return ret
+    def run_statement(self, cursor, sql, params=None, description=None, prepare_key=None):
+        """Execute a modifying statement on cursor and commit it, or keep it pending if an edit session is active;
+        rolls back the statement and raises on failure (see PSQLEngine.run)"""
+        psql["engine"].run(cursor, sql, params, description=description, prepare_key=prepare_key)
+        if psql["engine"].session:
+            self.update_session_ui()
 
-    def execute(self, sql=None, return_cursor=False):
+    def execute(self, sql=None, params=None, return_cursor=False, prepare_key=None):
         """Open cursor, execute sql command, rollback if failed; do nothing with return; Close cursor afterwards!"""
         cursor = psql["connection"].cursor()
 
         try:
-            cursor.execute(sql)
-            psql["connection"].commit()
+            self.run_statement(cursor, sql, params, prepare_key=prepare_key)
         except Exception as e:
             print(e)
-            psql["connection"].rollback()
 
         if return_cursor:
             return cursor
@@ -638,24 +2262,22 @@ class PostgreSQLTab(ttk.Frame):
     def init_connection(self):
         """Read config parameters from database.ini and try to establish a connection"""
         if psql["btns"]["init"]["text"] == "Disconnect":
-            psql["connection"].close()
-            psql["btns"]["init"].config(text="Connect")
-            self.disable_ui()
+            if self.session_active("Disconnect"):
+                return
+            self.close_connection(silent=True)
             return
 
-        cfg = read_config(section="postgresql")
-
         try:
             # Establish connection
-            psql["connection"] = psycopg2.connect(user=cfg["user"], password=cfg["pass"],
-                                                  host=cfg["server"], port=cfg["port"], sslmode=cfg["sslmode"])
+            psql["connection"] = psql["engine"].open()
+            psql["schema"].invalidate()
 
             # Fetch db names
-            dbs = self.query_all("select datname from pg_database;")
-            psql["oths"]["select_db"].config(values=[f[0] for f in dbs])
+            dbs = psql["engine"].list_databases()
+            psql["oths"]["select_db"].config(values=dbs)
             psql["oths"]["select_db"].current(0)
 
-            print(f"Available DBs: {[f[0] for f in dbs]}")
+            print(f"Available DBs: {dbs}")
             psql["btns"]["init"].config(text="Disconnect")
             self.enable_ui()
 
@@ -670,20 +2292,22 @@ class PostgreSQLTab(ttk.Frame):
 
         if not silent:
             print("CLOSING CONNECTION")
-        psql["connection"].close()
+        psql["engine"].close()
+        psql["connection"] = None
         psql["btns"]["init"].config(text="Connect")
         self.disable_ui()
 
     def change_db(self, event, target_db=None):
         """Change current database (open new connection)"""
+        if self.session_active("Change DB"):
+            psql["oths"]["select_db"].set(psql["connection"].info.dbname)
+            return
         self.close_connection(silent=True)
-        cfg = read_config(section="postgresql")
         db_name = psql["oths"]["select_db"].get()
         if target_db:
             db_name = target_db
         # print(f"CONNECTING TO DB {db_name}")
-        psql["connection"] = psycopg2.connect(dbname=db_name, user=cfg["user"], password=cfg["pass"],
-                                              host=cfg["server"], port=cfg["port"], sslmode=cfg["sslmode"])
+        psql["connection"] = psql["engine"].open(db_name)
         psql["btns"]["init"].config(text="Disconnect")
         self.enable_ui()
         # print("FETCHING TABLES")
@@ -691,6 +2315,8 @@ class PostgreSQLTab(ttk.Frame):
 
     def create_db(self):
         """Create a new database"""
+        if self.session_active("New DB"):
+            return
         new_db_name = simpledialog.askstring(title="New DB", prompt="Enter new database name:")
         if not new_db_name or new_db_name == "":
             return
@@ -700,13 +2326,11 @@ class PostgreSQLTab(ttk.Frame):
         if not confirm:
             return
 
-        # set autocommit stuff
-        auto_commit = psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT
-        psql["connection"].set_isolation_level(auto_commit)
-
-        # create database
-        sql = f"CREATE DATABASE {new_db_name}"
-        self.execute(sql)
+        # create database (outside of a transaction block)
+        try:
+            psql["engine"].create_database(new_db_name)
+        except Exception as e:
+            print(e)
 
         # reopen connection
         self.close_connection(silent=True)
@@ -714,6 +2338,8 @@ class PostgreSQLTab(ttk.Frame):
 
     def drop_db(self):
         """Drop a database"""
+        if self.session_active("Drop DB"):
+            return
         db_name = psql["oths"]["select_db"].get()
         confirm = messagebox.askokcancel(title="Confirm drop DB", message=f"Please confirm drop of database: {db_name}")
         if not confirm:
@@ -722,22 +2348,104 @@ class PostgreSQLTab(ttk.Frame):
         # switch to default db
         self.change_db(None, "postgres")
 
-        # revoke future connections, terminate all connections to the database except my own
-        self.execute(f"REVOKE CONNECT ON DATABASE {db_name} FROM PUBLIC;")
-        self.execute(f"SELECT pid, pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{db_name}';")
-
-        # set autocommit stuff
-        auto_commit = psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT
-        psql["connection"].set_isolation_level(auto_commit)
-
-        # drop desired database
-        sql = f"""DROP DATABASE IF EXISTS {db_name}"""
-        self.execute(sql)
+        # revoke future connections, terminate all connections to the database except my own, drop it
+        try:
+            psql["engine"].drop_database(db_name)
+        except Exception as e:
+            print(e)
 
         # reopen connection
         self.close_connection(silent=True)
         self.init_connection()
 
+    def run_background(self, function, title):
+        """Run function(progress=...) in the executor; the worker writes (percent, text) to psql["progress"], which is
+        polled into the progress bar, so no Tk call happens outside the Tk thread; returns the future
+        - the controls of the tab are disabled until function is done, so no operation is started twice"""
+        psql["progress"] = (0, f"{title} ..")
+        self.disable_ui()
+
+        def progress(percent, text):
+            psql["progress"] = (percent, text)
+
+        def poll():
+            percent, text = psql["progress"]
+            psql["oths"]["progress"]["value"] = percent
+            psql["vars"]["progress"].set(f"{title}: {text}")
+            if not future.done():
+                self.after(200, poll)
+                return
+            self.enable_ui()
+            try:
+                report = future.result()
+            except Exception as e:
+                psql["oths"]["progress"]["value"] = 0
+                psql["vars"]["progress"].set(f"{title} failed")
+                messagebox.showerror(title=title, message=f"{e}")
+                return
+            psql["oths"]["progress"]["value"] = 100
+            psql["vars"]["progress"].set(f"{title}: {report}")
+            print(f"{title}: {report}")
+
+        future = executor.submit(partial(function, progress=progress))
+        self.after(200, poll)
+        return future
+
+    def backup_db(self):
+        """Parallel snapshot backup of the current database into a directory (see backup_database)"""
+        db_name = psql["connection"].info.dbname
+        if self.session_active(f"Backup {db_name}"):
+            return
+        directory = filedialog.askdirectory(title=f"Backup {db_name} into directory")
+        if not directory:
+            return
+        workers = simpledialog.askinteger(title=f"Backup {db_name}", prompt="Number of parallel connections:",
+                                          initialvalue=4, minvalue=1, maxvalue=16)
+        if not workers:
+            return
+
+        def backup(progress):
+            # db_name is bound now, the worker connections must not follow a database change in the meantime
+            manifest = backup_database(partial(psql["engine"].connect, db_name), directory, workers=workers,
+                                       progress=progress)
+            return f"{sum(f['rows'] for f in manifest['tables'])} rows of {len(manifest['tables'])} tables " \
+                   f"in {manifest['seconds']:.2f}s > {directory}"
+
+        self.run_background(backup, f"Backup {db_name}")
+
+    def restore_db(self):
+        """Restore a backup directory (see restore_database) into a new database"""
+        if self.session_active("Restore DB"):
+            return
+        directory = filedialog.askdirectory(title="Restore backup directory")
+        if not directory:
+            return
+        if not os.path.isfile(os.path.join(directory, "manifest.json")):
+            messagebox.showerror(title="Restore DB", message=f"No backup (manifest.json) found in {directory}")
+            return
+        target = simpledialog.askstring(title="Restore DB", prompt="Enter new database name:")
+        if not target:
+            return
+        workers = simpledialog.askinteger(title=f"Restore {target}", prompt="Number of parallel connections:",
+                                          initialvalue=4, minvalue=1, maxvalue=16)
+        if not workers:
+            return
+
+        try:
+            psql["engine"].create_database(target)
+        except Exception as e:
+            messagebox.showerror(title=f"Restore {target}", message=f"{e}")
+            return
+
+        def restore(progress):
+            result = restore_database(partial(psql["engine"].connect, target), directory, workers=workers,
+                                      progress=progress)
+            return f"{result['rows']} rows of {result['tables']} tables in {result['seconds']:.2f}s"
+
+        self.run_background(restore, f"Restore {target}")
+        dbs = list(psql["oths"]["select_db"]["values"])
+        psql["oths"]["select_db"].config(values=dbs + [target])
+
     def change_table(self, event):
         """Change table in current database"""
         table = psql["oths"]["select_table"].get()
@@ -767,8 +2475,10 @@ class PostgreSQLTab(ttk.Frame):
         if not confirm:
             return
 
-        sql = f"DROP TABLE IF EXISTS {table}"
-        self.execute(sql)
+        try:
+            psql["engine"].drop_table(table)
+        except Exception as e:
+            print(e)
 
         # refresh tables
         self.get_all_tables(populate_combobox=True)
@@ -776,113 +2486,183 @@ class PostgreSQLTab(ttk.Frame):
 
     def get_available_types(self):
         """Get available types from pg_catalog.pg_types (not sure how this works and i dont see all types i expect)"""
-        # query to get all available PostgreSQL datatypes
-        sql = "SELECT typname FROM pg_catalog.pg_type"
-        dtypes = self.query_all(sql)
-        return [f[0] for f in dtypes if not f[0].startswith("_")]
+        return psql["engine"].available_types()
 
     def rollback_db(self, silent=False):
-        """Rollback DB on invalid query"""
+        """Rollback DB on invalid query; discards the pending changes if an edit session is active"""
+        if psql["engine"].session:
+            self.discard_session()
+            return
         psql["connection"].rollback()
         if not silent:
             print("Last query rolled back")
 
+    def session_active(self, title):
+        """Show an error and return True if an edit session is active (for actions which end the transaction)"""
+        if not psql["engine"].session:
+            return False
+        messagebox.showerror(title=title, message="Commit or discard the pending changes of the edit session first.")
+        return True
+
+    def update_session_ui(self):
+        """Show pending changes of the edit session, enable undo/discard only while a session is active"""
+        session = psql["engine"].session
+        psql["oths"]["session"].delete(0, "end")
+        for savepoint, description in session.pending if session else []:
+            psql["oths"]["session"].insert("end", description)
+        psql["btns"]["session"].config(text=f"Commit ({len(session.pending)})" if session else "Begin Session")
+        psql["vars"]["session"].set("Edit session active" if session else "")
+        state = "normal" if session and psql["btns"]["init"]["text"] == "Disconnect" else "disabled"
+        psql["btns"]["session_undo"].config(state=state)
+        psql["btns"]["session_discard"].config(state=state)
+
+    def toggle_session(self):
+        """Begin an edit session, or commit all its pending changes in one transaction"""
+        if not psql["engine"].session:
+            psql["engine"].begin_session()
+            print("Edit session started, changes are committed with 'Commit'")
+            self.update_session_ui()
+            return
+
+        try:
+            count = psql["engine"].commit_session()
+            print(f"Edit session committed: {count} change(s)")
+        except Exception as e:
+            messagebox.showerror(title="Commit", message=f"Commit failed, changes rolled back:\n{e}")
+        self.update_session_ui()
+
+    def undo_session(self):
+        """Roll back the last pending change of the edit session"""
+        if not psql["engine"].session:
+            return
+        description = psql["engine"].undo()
+        if description:
+            print(f"Undone: {description}")
+        self.update_session_ui()
+
+    def discard_session(self):
+        """Discard all pending changes and end the edit session"""
+        if not psql["engine"].session:
+            return
+        count = len(psql["engine"].session.pending)
+        if count and not messagebox.askokcancel(title="Discard", message=f"Discard {count} pending change(s)?"):
+            return
+        psql["engine"].discard_session()
+        print(f"Edit session discarded: {count} change(s) rolled back")
+        self.update_session_ui()
+
     def get_info(self):
         """Get DB version info and current DB user"""
-        version = self.query_all("SELECT version()")
-        current_user = self.query_all("SELECT current_user")
-        print(f"Version: {version[0][0]}\nCurrent User: {current_user[0][0]}")
+        version, current_user = psql["engine"].version()
+        statements, results = psql["statements"], psql["engine"].results
+        print(f"Version: {version}\nCurrent User: {current_user}\n"
+              f"Schema cache: {len(psql['schema'].catalogs)} DB(s) cached, {psql['schema'].loads} catalog queries\n"
+              f"Prepared statements: {sum(len(f) for f in statements.prepared.values())} prepared, "
+              f"{statements.hits} hits, {statements.misses} misses\n"
+              f"Result cache: {len(results.entries)} results ({results.size / 1e6:.1f} of "
+              f"{results.max_bytes / 1e6:.0f} MB), {results.hits} hits, {results.misses} misses, "
+              f"{results.invalidations} invalidated")
+
+    def connect(self, db_name=None):
+        """Open an additional connection to db_name (default: current database), e.g. for background threads"""
+        return psql["engine"].connect(db_name)
+
+    def open_dashboard(self):
+        """Open live statistics dashboard for the current database"""
+        StatsDashboard(self, connect=partial(self.connect, psql["connection"].info.dbname))
+
+    def open_index_advisor(self):
+        """Collect usage statistics and open the index advisor"""
+        if self.session_active("Index advisor"):
+            return
+        table_stats = {f[0]: f[1:] for f in self.query_all(
+            """SELECT relname, seq_scan, seq_tup_read, coalesce(idx_scan, 0), n_live_tup FROM pg_stat_user_tables""")}
+        index_stats = {f[0]: f[1:] for f in self.query_all(
+            """SELECT indexrelname, relname, idx_scan, pg_relation_size(indexrelid) FROM pg_stat_user_indexes""")}
+        catalog = psql["schema"].load(psql["connection"])
+        recommendations = advise_indexes(catalog, table_stats, index_stats, psql["where_log"])
+
+        # end the open transaction of the main connection, CONCURRENTLY waits for transactions holding snapshots
+        self.rollback_db(silent=True)
+        IndexAdvisor(self, connect=partial(self.connect, psql["connection"].info.dbname),
+                     recommendations=recommendations,
+                     on_done=partial(psql["schema"].invalidate, psql["connection"]))
 
     def get_all_tables(self, populate_combobox=False):
         """Get all tables in DB"""
-        tables = self.query_all("select relname from pg_class where relkind='r' and relname !~ '^(pg_|sql_)';")
+        tables = psql["engine"].list_tables()
 
         if populate_combobox:
-            psql["oths"]["select_table"].config(values=[f[0] for f in tables])
+            psql["oths"]["select_table"].config(values=tables)
             if tables:
                 psql["oths"]["select_table"].current(0)
             else:
                 psql["oths"]["select_table"].set("")
 
         else:
-            print([f[0] for f in tables])
+            print(tables)
 
     def get_table_content(self):
         """List whole content of table"""
-        # query column names
         table = psql["oths"]["select_table"].get()
-        sql = f"""SELECT COLUMN_NAME from information_schema.columns WHERE table_name = '{table}'"""
-        columns = self.query_all(sql)
-        columns = [col[0] for col in columns]
-
-        # query content
-        sql = f"""SELECT * FROM {table}"""
-        content = self.query_all(sql)
-
-        # max length of columns
-        col_lengths = {k: 0 for k in columns}  # dict from list with strings with default value 0
-        for row in content:
-            for col_content, col_key_in_dict in zip(row, col_lengths.keys()):
-                # if length of string in one of the columns in each row is longer than the value in the dict, overwrite
-                if len(str(col_content)) >= col_lengths[col_key_in_dict]:
-                    col_lengths[col_key_in_dict] = len(str(col_content))
-
-        max_sep_length = sum(col_lengths.values()) + (len(columns)-1)*3
-        file_content = ""
-
-        # first line
-        tmp_first_line = f" start of {table} ".center(max_sep_length if max_sep_length >= 40 else 40, "*")
-        print(tmp_first_line)
-        file_content += tmp_first_line + "\n"
-
-        # print header
-        tmp_header = " | ".join([columns[i].center(list(col_lengths.values())[i]) for i in range(len(columns))])
-        print(tmp_header)
-        file_content += tmp_header + "\n"
-        # print separator
-        tmp_sep = "-" * max_sep_length
-        print(tmp_sep)
-        file_content += tmp_sep + "\n"
-
-        # print content
-        for row in content:
-            tmp_content = " | ".join([str(row[i]).center(list(col_lengths.values())[i]) for i in range(len(columns))])
-            print(tmp_content)
-            file_content += tmp_content + "\n"
-
-        # end line
-        tmp_end_line = f" end of {table} ".center(max_sep_length if max_sep_length >= 40 else 40, "*")
-        print(tmp_end_line)
-        file_content += tmp_end_line + "\n"
-
-        # write to temporary file
-        if self.show_output.get():
-            executor.submit(partial(self.write_temporary_file, file_content, ".txt"))
-
-    def write_temporary_file(self, data=None, suffix=".txt"):
-        """Write to temporary file"""
-        temp_file = tempfile.NamedTemporaryFile(suffix=suffix)
-        temp_file.write(data.encode())
-        temp_file.flush()
-        os.startfile(temp_file.name)
-        time.sleep(1)
-        print("Launched temporary file:", temp_file.name)
-        temp_file.close()
+
+        # query column names and content
+        columns, content = psql["engine"].fetch(table)
+
+        # render once (each cell converted once) straight to the console and optionally a temporary file
+        if not self.show_output.get():
+            render_table(columns, content, sys.stdout, title=table, max_width=self.cell_width)
+            return
+        # delete=False: the file has to stay after closing, otherwise it can not be opened by the viewer (Windows)
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", encoding="utf-8", delete=False) as temp_file:
+            temporary_files.append(temp_file.name)
+            render_table(columns, content, TeeSink(sys.stdout, temp_file), title=table, max_width=self.cell_width)
+        executor.submit(partial(self.launch_temporary_file, temp_file.name))
+
+    def open_live_view(self):
+        """Open a table view which applies changes of the table as they are committed (LISTEN/NOTIFY)"""
+        table = psql["oths"]["select_table"].get()
+        if not table or self.session_active(f"Live view of {table}"):
+            return
+
+        prim_key = psql["schema"].primary_key(psql["connection"], table)
+        channel = f"dbadmin_{table}"
+        if not notify_trigger_installed(psql["connection"], table):
+            if not messagebox.askokcancel(title=f"Live view of {table}",
+                                          message=f"Install trigger 'dbadmin_notify_{table}' on {table} which "
+                                                  f"notifies channel '{channel}' on every change?"):
+                return
+            try:
+                install_notify_trigger(psql["connection"], table, prim_key, channel)
+            except Exception as e:
+                self.rollback_db(silent=True)
+                messagebox.showerror(title=f"Live view of {table}", message=f"{e}")
+                return
+            print(f"Installed trigger dbadmin_notify_{table}, remove it with "
+                  f'DROP TRIGGER "dbadmin_notify_{table}" ON "{table}"')
+
+        entry = psql["schema"].table(psql["connection"], table)
+        LiveTableView(self, connect=partial(self.connect, psql["connection"].info.dbname), table=table,
+                      columns=entry["columns"], prim_key=prim_key, pk_type=entry["types"][prim_key], channel=channel,
+                      on_change=lambda changed: psql["engine"].invalidate_results(tables=[changed]))
+
+    def launch_temporary_file(self, path):
+        """Open a written temporary file with the default application, it is removed at exit"""
+        open_file(path)
+        print("Launched temporary file:", path)
 
     def update_table(self):
         """Update table depending on input"""
         table = psql["oths"]["select_table"].get()
 
-        # fetch headers from selected table
-        sql = f"""SELECT COLUMN_NAME from information_schema.columns WHERE table_name = '{table}'"""
-        headers = [col[0] for col in self.query_all(sql)]
-
-        # fetch content from selected table
-        sql = f"""SELECT * FROM {table}"""
-        content = self.query_all(sql)
+        # fetch headers and primary key from selected table
+        entry = psql["schema"].table(psql["connection"], table)
+        headers = entry["columns"]
+        prim_key = psql["schema"].primary_key(psql["connection"], table)
 
-        # create popup
-        prompt = DialogUpdatePSQLTable(self, title=f"Update {table}", table=table, content=content, headers=headers)
+        # create popup, rows are paged from the database by the row picker
+        prompt = DialogUpdatePSQLTable(self, title=f"Update {table}", table=table, entry=entry, prim_key=prim_key,
+                                       query=partial(self.query_all, cache_tables=(table, )))
         if not prompt.result:
             return
 
@@ -902,26 +2682,24 @@ class PostgreSQLTab(ttk.Frame):
                                                                                   f"{mods_confirm_txt}"):
             return
 
-        # update query
-        sql = f"""UPDATE "{table}" SET {', '.join([f'"{f[0]}"=(%s)' for f in mods])} WHERE {prim_key[0]}=(%s)"""
-        cursor = psql["connection"].cursor()
-        # hand over modified column values and prim. key value as (*args)
-        cursor.execute(sql, (*[f[1] for f in mods], prim_key[1]))
-        print(f"Number of rows updated: {cursor.rowcount}")
-        psql["connection"].commit()
-        cursor.close()
+        # update modified column values of the row with the prim. key value
+        try:
+            count = psql["engine"].update(table, prim_key[1], dict(mods))
+        except Exception as e:
+            print(e)
+            return
+        print(f"Number of rows updated: {count}")
+        self.update_session_ui()
 
     def insert_table_content(self):
         """Insert table content"""
         table = psql["oths"]["select_table"].get()
 
         # fetch headers from selected table
-        sql = f"""SELECT COLUMN_NAME from information_schema.columns WHERE table_name = '{table}'"""
-        headers = [col[0] for col in self.query_all(sql)]
+        headers = psql["schema"].columns(psql["connection"], table)
 
         # fetch types from selected table
-        sql = f"""SELECT DATA_TYPE from information_schema.columns WHERE table_name = '{table}'"""
-        types = [col[0] for col in self.query_all(sql)]
+        types = psql["schema"].types(psql["connection"], table)
 
         # join headers and types to string in format "header [type]"
         headers_types = [f"{h} [{t}]" for h, t in zip(headers, types)]
@@ -942,19 +2720,90 @@ class PostgreSQLTab(ttk.Frame):
             messagebox.showerror(title=f"Insert {table}", message=f"Number of values does not match number of headers")
             return
 
-        # create query
-        sql = f"""INSERT INTO {table} VALUES ({', '.join(['%s' for _ in range(len(headers))])})"""
-        cursor = None
+        # insert row
         try:
-            cursor = psql["connection"].cursor()
-            cursor.execute(sql, values)
-            psql["connection"].commit()
-            print("Command OK: " + sql % tuple(values))
+            psql["engine"].insert(table, values)
+            print(f"Command OK: INSERT INTO {table} VALUES {tuple(values)}")
         except Exception as e:
             messagebox.showerror(title=f"Insert {table}", message=f"{e}")
-            self.rollback_db()
-        finally:
-            cursor.close()
+        self.update_session_ui()
+
+    def import_table_content(self, path=None, chunk_size=10000):
+        """Bulk import a .csv/.tsv (first line = header) or .jsonl file into the selected table
+        - rows are validated against the cached column types, invalid rows are skipped and reported
+        - valid rows are streamed in chunks of chunk_size via COPY FROM STDIN and committed in one transaction"""
+        table = psql["oths"]["select_table"].get()
+        if not table or self.session_active(f"Import into {table}"):
+            return
+
+        if not path:
+            path = filedialog.askopenfilename(title=f"Import into {table}",
+                                              filetypes=(("Data files", "*.csv *.tsv *.jsonl *.ndjson"),
+                                                         ("All files", "*.*")))
+        if not path:
+            return
+
+        entry = psql["schema"].table(psql["connection"], table)
+        db_name = psql["connection"].info.dbname
+
+        def work(progress):
+            stats = import_table_rows(partial(psql["engine"].connect, db_name), table, entry, path,
+                                      chunk_size=chunk_size, progress=progress)
+            psql["engine"].invalidate_results(tables=[table])
+            report = f"{stats['imported']} rows imported in {stats['seconds']:.2f}s " \
+                     f"({stats['imported'] / max(stats['seconds'], 1e-9):.0f} rows/s)"
+            if stats["invalid"]:
+                report += f", {len(stats['invalid'])} invalid rows skipped"
+                for line_no, error in stats["invalid"][:10]:
+                    print(f"Line {line_no}: {error}")
+            return report
+
+        self.run_background(work, f"Import {os.path.basename(path)} > {table}")
+
+    def export_table_content(self):
+        """Export selected columns of the table (optionally filtered) to .csv/.tsv(.gz)
+        - COPY ... TO STDOUT is streamed straight to disk via ExportSink, rows are never held in memory
+        - progress is estimated from pg_class.reltuples"""
+        table = psql["oths"]["select_table"].get()
+        if not table or self.session_active(f"Export {table}"):
+            return
+
+        headers = psql["schema"].columns(psql["connection"], table)
+        prompt = DialogExportPSQLTable(self, title=f"Export {table}", table=table, headers=headers)
+        if not prompt.result:
+            return
+
+        extension = f".{prompt.result['format']}" + (".gz" if prompt.result["gzip"] else "")
+        path = filedialog.asksaveasfilename(title=f"Export {table}", initialfile=f"{table}{extension}",
+                                            defaultextension=extension)
+        if not path:
+            return
+
+        psql["where_log"].append((table, columns_in_clause(prompt.result["where"], headers)))
+
+        # row estimate for progress bar (avoids a count(*) over the whole table)
+        estimate = max(psql["engine"].row_estimate(table), 1)
+        db_name = psql["connection"].info.dbname
+
+        def work(progress):
+            start = time.perf_counter()
+
+            def progress_rows(rows):
+                elapsed = max(time.perf_counter() - start, 1e-9)
+                progress(min(rows / estimate * 100, 99), f"~{rows} rows exported ({rows / elapsed:.0f} rows/s)")
+
+            connection = psql["engine"].connect(db_name)
+            try:
+                rows, size = psql["engine"].export(table, path, columns=prompt.result["columns"],
+                                                   where=prompt.result["where"], fmt=prompt.result["format"],
+                                                   compress=prompt.result["gzip"], progress=progress_rows,
+                                                   connection=connection)
+            finally:
+                connection.close()
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            return f"{rows} rows exported in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s, {size / 1e6:.1f} MB)"
+
+        self.run_background(work, f"Export {table} > {os.path.basename(path)}")
 
     def delete_from_table(self):
         """Delete entire ids from table based on input"""
@@ -962,17 +2811,14 @@ class PostgreSQLTab(ttk.Frame):
         if not table:
             return
 
-        # fetch headers from selected table
-        sql = f"""SELECT COLUMN_NAME from information_schema.columns WHERE table_name = '{table}'"""
-        headers = [col[0] for col in self.query_all(sql)]
-
-        # fetch content from selected table
-        sql = f"""SELECT * FROM {table}"""
-        content = self.query_all(sql)
+        # fetch headers and primary key from selected table
+        entry = psql["schema"].table(psql["connection"], table)
+        headers = entry["columns"]
+        prim_key = psql["schema"].primary_key(psql["connection"], table)
 
-        # prompt Popup containing Listbox and entry to specify which data to delete
-        prompt = DialogDeleteFromPSQLTable(self, title=f"Delete from {table}", table=table,
-                                           content=content, headers=headers)
+        # prompt Popup containing row picker and entry to specify which data to delete
+        prompt = DialogDeleteFromPSQLTable(self, title=f"Delete from {table}", table=table, entry=entry,
+                                           prim_key=prim_key, query=partial(self.query_all, cache_tables=(table, )))
 
         # return on cancel action
         if not prompt.result:
@@ -990,52 +2836,34 @@ class PostgreSQLTab(ttk.Frame):
 
         # if IDs are selected in combobox
         if selected_ids:
-            # prepare data & strip to ids
-            if len(selected_ids) == 1:
-                matches = f"({selected_ids[0][0]})"
-            else:
-                matches = tuple([f[0] for f in selected_ids])
+            # strip selected rows to primary key values
+            matches = [f[headers.index(prim_key)] for f in selected_ids]
 
             # confirm delete
             if not messagebox.askokcancel(title=f"Delete {table}", message=f"Confirm deleting ID(s): {matches}"):
                 return
 
         if passed_values:
-            # if something like name=Matzl was entered
+            # if something like name=Matzl was entered, search only this column
+            columns = None
             if "=" in passed_values:
-                col, val = passed_values.split("=")
-                print(f"Argument detected - trying to find value {val} in column {col} ..")
-                if col in headers:
-                    # sql = f"""SELECT id from {table} where {col} = '{val}'"""
-                    sql = f"""SELECT {col} from {table} where {col} = '{val}'"""
-                    matches = self.query_all(sql)
-                    if not matches:
-                        print(f"No matches found by checking column '{col}' for value '{val}'")
-                        return
-
-            # if only Matzl was entered
-            else:
-                for column in headers:
-                    # try to fetch matching ids
-                    try:
-                        # sql = f"""SELECT id from {table} where {column} = '{passed_values}'"""
-                        sql = f"""SELECT {column} from {table} where {column} = '{passed_values}'"""
-                        matches = self.query_all(sql)
-                    except Exception as e:
-                        self.rollback_db(silent=True)
-
-                if not matches:
-                    print(f"No matches found by checking all columns for value '{passed_values}'")
+                col, passed_values = passed_values.split("=", 1)
+                print(f"Argument detected - trying to find value {passed_values} in column {col} ..")
+                if col not in headers:
+                    print(f"Column '{col}' does not exist in {table}")
                     return
+                columns = [col]
 
-            # cleanup return
-            matches = tuple([f[0] for f in matches])
-            if len(matches) == 1:
-                matches = f"({matches[0]})"
+            found = self.search_table(table, passed_values, columns=columns, fuzzy=prompt.result["fuzzy"])
+            if not found:
+                print(f"No matches found by checking {columns or 'all columns'} for value '{passed_values}'")
+                return
+            for pk_value, matched_columns in found.items():
+                print(f"{prim_key}={pk_value} matched in {', '.join(matched_columns)}")
+            matches = list(found)
 
             # confirm delete
-            sql = f"""SELECT * FROM {table} where ID in {matches}"""
-            delete_content = self.query_all(sql)
+            delete_content = psql["engine"].fetch_by_keys(table, matches)
             delete_header = " | ".join(headers)
             delete_body = "".join([str(" | ".join(str(i) for i in t) + "\n") for t in delete_content])
 
@@ -1045,14 +2873,391 @@ class PostgreSQLTab(ttk.Frame):
                 return
 
         # delete command
-        sql = f"""DELETE from {table} where ID in {matches}"""
-        cursor = self.execute(sql, return_cursor=True)
-        print(f"Number of rows deleted: {cursor.rowcount}")
-        cursor.close()
+        try:
+            count = psql["engine"].delete(table, matches)
+        except Exception as e:
+            print(e)
+            return
+        print(f"Number of rows deleted: {count}")
+        self.update_session_ui()
+
+    def search_table(self, table, value, columns=None, fuzzy=False):
+        """Search value in all type-compatible columns (or only in columns) of table with a single query
+        - returns {primary key value: [matched columns]}
+        - fuzzy=True uses pg_trgm similarity on text columns if the extension is installed"""
+        entry = psql["schema"].table(psql["connection"], table)
+        prim_key = psql["schema"].primary_key(psql["connection"], table)
+
+        if fuzzy and not self.query_all("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"):
+            print("pg_trgm is not installed (CREATE EXTENSION pg_trgm), falling back to exact search")
+            fuzzy = False
+
+        sql, params, searched = build_search_query(entry, table, prim_key, value, columns=columns, fuzzy=fuzzy)
+        if not sql:
+            print(f"No column of {table} is compatible with value '{value}'")
+            return {}
+        if columns:
+            psql["where_log"].append((table, searched))
+
+        indexed = psql["schema"].indexed_columns(psql["connection"], table)
+        print(f"Searching '{value}' in {', '.join(f'{f} (indexed)' if f in indexed else f for f in searched)}")
+
+        found = {}
+        for pk_value, column in self.query_all(sql, params):
+            found.setdefault(pk_value, []).append(column)
+        return found
+
+    def batch_edit_table(self, limit=500):
+        """Edit and delete many rows in a grid; all changes are applied in one transaction
+        - updates are grouped by changed column set and sent with execute_values (UPDATE ... FROM VALUES)
+        - deletes are sent as one DELETE ... WHERE pk = ANY(%s)
+        - affected row counts are previewed before committing"""
+        table = psql["oths"]["select_table"].get()
+        if not table:
+            return
+
+        entry = psql["schema"].table(psql["connection"], table)
+        headers = entry["columns"]
+        prim_key = psql["schema"].primary_key(psql["connection"], table)
+
+        # select rows to edit
+        where = simpledialog.askstring(title=f"Batch edit {table}",
+                                       prompt=f"Optional WHERE clause to select rows (max. {limit} rows):")
+        if where is None:
+            return
+        psql["where_log"].append((table, columns_in_clause(where, headers)))
+        where = f" WHERE {where.replace('%', '%%')}" if where.strip() else ""  # escape % for param binding
+        content = self.query_all(f"""SELECT * FROM "{table}"{where} ORDER BY "{prim_key}" LIMIT %s""", (limit,))
+
+        prompt = DialogBatchEditPSQLTable(self, title=f"Batch edit {table}", table=table, content=content,
+                                          headers=headers, prim_key=prim_key)
+        if not prompt.result:
+            return
+        updates, deletes = prompt.result["updates"], prompt.result["deletes"]
+        if not updates and not deletes:
+            return
+
+        # preview: count rows which still exist for the selected primary keys
+        pk_type = entry["types"][prim_key]
+        sql = f"""SELECT count(*) FROM "{table}" WHERE "{prim_key}" = ANY(%s::{pk_type}[])"""
+        update_count = self.query_all(sql, (list(updates),))[0][0] if updates else 0
+        delete_count = self.query_all(sql, (deletes,))[0][0] if deletes else 0
+        cells = sum(len(f) for f in updates.values())
+        if not messagebox.askokcancel(title=f"Confirm batch edit of {table}",
+                                      message=f"Update: {update_count} row(s), {cells} cell(s)\n"
+                                              f"Delete: {delete_count} row(s)\n\nApply in one transaction?"):
+            return
+
+        # group updates by changed column set
+        groups = {}
+        for pk_value, changes in updates.items():
+            groups.setdefault(tuple(sorted(changes)), []).append((pk_value, *[changes[f] for f in sorted(changes)]))
+
+        updated = deleted = 0
+        session = psql["engine"].session
+        try:
+            with session.statement(f"Batch edit {table}: {cells} cell(s), {len(deletes)} delete(s)") if session \
+                    else psql["connection"].cursor() as cursor:
+                for columns, rows in groups.items():
+                    sets = ", ".join(f'"{f}" = v."{f}"::{entry["types"][f]}' for f in columns)
+                    names = ", ".join(["__pk"] + [f'"{f}"' for f in columns])
+                    sql = f"""UPDATE "{table}" AS t SET {sets} FROM (VALUES %s) AS v({names})
+                              WHERE t."{prim_key}" = v.__pk::{pk_type}"""
+                    psycopg2.extras.execute_values(cursor, sql, rows, page_size=len(rows))
+                    updated += cursor.rowcount
+
+                if deletes:
+                    cursor.execute(f"""DELETE FROM "{table}" WHERE "{prim_key}" = ANY(%s::{pk_type}[])""",
+                                   (deletes,))
+                    deleted = cursor.rowcount
+            if not session:
+                psql["connection"].commit()
+            psql["engine"].invalidate_results(tables=[table])
+        except Exception as e:
+            if not session:
+                self.rollback_db(silent=True)
+            messagebox.showerror(title=f"Batch edit {table}", message=f"Batch rolled back:\n{e}")
+            return
+        self.update_session_ui()
+
+        print(f"Batch edit {table}: {updated} row(s) updated, {deleted} row(s) deleted")
 
     def get_all_dbs(self):
-        dbs = self.query_all("select datname from pg_database;")
-        print([f[0] for f in dbs])
+        print(psql["engine"].list_databases())
+
+
+""" ###################################################################################################################
+############################################# Query console class ##################################################### 
+################################################################################################################### """
+
+
+class QueryConsoleTab(ttk.Frame):
+    """Tab to run arbitrary SQL and profile it with EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+    - statements run on a separate background connection (console["connection"]) in the threadpool executor, the UI
+      polls the future via after() so it never blocks
+    - result sets are read through a server-side cursor and shown page-wise"""
+
+    page_size = 100
+    big_table_rows = 10000  # sequential scans on tables with more (estimated) rows are highlighted
+
+    def __init__(self, parent, *args, **kwargs):
+        global console
+        ttk.Frame.__init__(self, parent, *args, **kwargs)
+        self.root = parent
+        self.build_console_tab()
+
+    """ ########################################### BUILD UI ########################################### """
+
+    def build_console_tab(self):
+        """Build query console tab"""
+        self.columnconfigure(0, weight=1)
+
+        # SQL INPUT (10+) ####################################################################################### #
+        console["lbls"]["sql_title"] = Label(self, text="Query", font=("arial", 10, "bold"))
+        console["lbls"]["sql_title"].grid(row=10, column=0, padx=5, sticky="W")
+        console["oths"]["sql"] = tkinter.Text(self, height=8, width=100, undo=True)
+        console["oths"]["sql"].grid(row=11, column=0, padx=5, pady=2, sticky="ew")
+        console["oths"]["sql"].bind("<Control-Return>", lambda e: (self.run_query(), "break")[1])
+
+        console["frms"]["actions"] = Frame(self)
+        console["frms"]["actions"].grid(row=12, column=0, padx=5, pady=2, sticky="W")
+        console["btns"]["run"] = Button(console["frms"]["actions"], text="Run", command=self.run_query)
+        create_tooltip(console["btns"]["run"], "Run statement (Ctrl+Enter)")
+        console["btns"]["explain"] = Button(console["frms"]["actions"], text="Explain Analyze",
+                                            command=self.explain_query)
+        create_tooltip(console["btns"]["explain"], "Run EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) inside a transaction "
+                                                   "which is rolled back afterwards")
+        console["btns"]["cancel"] = Button(console["frms"]["actions"], text="Cancel", command=self.cancel_query)
+        console["btns"]["prev"] = Button(console["frms"]["actions"], text="<", width=3,
+                                         command=partial(self.change_page, -1))
+        console["btns"]["next"] = Button(console["frms"]["actions"], text=">", width=3,
+                                         command=partial(self.change_page, 1))
+        for key in ["run", "explain", "cancel", "prev", "next"]:
+            console["btns"][key].pack(side="left", padx=2)
+        console["vars"]["status"] = StringVar(value="Not connected - statements use the DB selected in PostgreSQL")
+        console["lbls"]["status"] = Label(console["frms"]["actions"], textvariable=console["vars"]["status"])
+        console["lbls"]["status"].pack(side="left", padx=5)
+
+        ttk.Separator(self, orient=HORIZONTAL).grid(row=19, column=0, columnspan=99, sticky="ew", pady=10)
+
+        # RESULTS (20+) ########################################################################################## #
+        console["frms"]["results"] = Frame(self)
+        console["frms"]["results"].grid(row=20, column=0, padx=5, sticky="nsew")
+        console["oths"]["results"] = ttk.Treeview(console["frms"]["results"], show="headings", height=10)
+        y_scrollbar = Scrollbar(console["frms"]["results"], orient="vertical",
+                                command=console["oths"]["results"].yview)
+        x_scrollbar = Scrollbar(console["frms"]["results"], orient="horizontal",
+                                command=console["oths"]["results"].xview)
+        console["oths"]["results"].config(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
+        y_scrollbar.pack(side="right", fill="y")
+        x_scrollbar.pack(side="bottom", fill="x")
+        console["oths"]["results"].pack(side="left", fill="both", expand=True)
+
+        ttk.Separator(self, orient=HORIZONTAL).grid(row=29, column=0, columnspan=99, sticky="ew", pady=10)
+
+        # PLAN (30+) ############################################################################################# #
+        console["lbls"]["plan_title"] = Label(self, text="Plan", font=("arial", 10, "bold"))
+        console["lbls"]["plan_title"].grid(row=30, column=0, padx=5, sticky="W")
+        console["frms"]["plan"] = Frame(self)
+        console["frms"]["plan"].grid(row=31, column=0, padx=5, pady=2, sticky="nsew")
+        columns = ["relation", "est_rows", "act_rows", "loops", "total_ms", "self_ms", "buffers"]
+        console["oths"]["plan"] = ttk.Treeview(console["frms"]["plan"], columns=columns, height=10)
+        console["oths"]["plan"].heading("#0", text="Node")
+        console["oths"]["plan"].column("#0", width=260)
+        for column, text in zip(columns, ["Relation", "Est. rows", "Actual rows", "Loops", "Total ms", "Self ms",
+                                          "Buffers hit/read"]):
+            console["oths"]["plan"].heading(column, text=text)
+            console["oths"]["plan"].column(column, width=100, anchor="e")
+        console["oths"]["plan"].tag_configure("seq_scan_big", foreground="red")
+        console["oths"]["plan"].tag_configure("misestimate", foreground="#ff5501")
+        y_scrollbar = Scrollbar(console["frms"]["plan"], orient="vertical", command=console["oths"]["plan"].yview)
+        console["oths"]["plan"].config(yscrollcommand=y_scrollbar.set)
+        y_scrollbar.pack(side="right", fill="y")
+        console["oths"]["plan"].pack(side="left", fill="both", expand=True)
+
+    """ ########################################### Console Functions ########################################### """
+
+    def get_connection(self):
+        """Open (or reuse) the background connection to the database selected in the PostgreSQL tab"""
+        db_name = psql["connection"].info.dbname if psql["connection"] and not psql["connection"].closed else None
+        if console["connection"] and not console["connection"].closed:
+            if db_name is None or console["connection"].info.dbname == db_name:
+                return console["connection"]
+            console["connection"].close()
+
+        console["connection"] = psql["engine"].connect(db_name or "postgres")
+        return console["connection"]
+
+    def close_cursor(self):
+        """Close open server-side cursor and end its transaction"""
+        if console["cursor"] and not console["cursor"].closed:
+            console["cursor"].close()
+            console["connection"].rollback()
+        console["cursor"] = None
+        console["pages"], console["page"] = [], 0
+
+    def run_in_background(self, function, callback, status):
+        """Submit function to the executor and call callback(result) or show the error on the Tk thread"""
+        console["vars"]["status"].set(status)
+        for key in ["run", "explain"]:
+            console["btns"][key].configure(state="disabled")
+        start = time.perf_counter()
+        future = executor.submit(function)
+
+        def poll():
+            if not future.done():
+                self.after(50, poll)
+                return
+            for key in ["run", "explain"]:
+                console["btns"][key].configure(state="normal")
+            try:
+                result = future.result()
+            except Exception as e:
+                if console["connection"] and not console["connection"].closed:
+                    console["connection"].rollback()
+                console["vars"]["status"].set(f"Error: {str(e).strip()}")
+                return
+            callback(result, time.perf_counter() - start)
+
+        self.after(50, poll)
+
+    def run_query(self):
+        """Run the statement; result sets are fetched page-wise via a server-side cursor"""
+        sql = console["oths"]["sql"].get("1.0", "end").strip()
+        if not sql:
+            return
+        self.close_cursor()
+
+        def work():
+            connection = self.get_connection()
+            # only read-only statements are paged with a named cursor, its transaction is rolled back when closed
+            if re.match(r"^\s*(SELECT|WITH|VALUES|TABLE)\b", sql, re.IGNORECASE) and not write_pattern.search(sql):
+                console["cursor"] = connection.cursor(name="console")
+                console["cursor"].execute(sql)
+                rows = console["cursor"].fetchmany(self.page_size)
+                return [f[0] for f in console["cursor"].description], rows, None
+
+            # statement without result set (or returning one from e.g. INSERT ... RETURNING, a data-modifying WITH)
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                rows = cursor.fetchmany(self.page_size) if cursor.description else None
+                headers = [f[0] for f in cursor.description] if cursor.description else None
+                rowcount = cursor.rowcount
+            connection.commit()
+            if psql["engine"]:
+                psql["engine"].invalidate_results(sql)  # cached table contents of the PostgreSQL tab
+            if ddl_pattern.match(sql) and psql["engine"]:
+                psql["schema"].invalidate(connection)
+                psql["statements"].invalidate()  # prepared statements of the main connection might be outdated
+            return headers, rows, rowcount
+
+        def done(result, elapsed):
+            headers, rows, rowcount = result
+            if rows is not None:
+                console["pages"] = [rows]
+                self.show_rows(headers, rows)
+            if rowcount is not None:
+                console["vars"]["status"].set(f"OK, {rowcount} row(s) affected in {elapsed * 1000:.1f} ms")
+            else:
+                console["vars"]["status"].set(f"Page 1 ({len(rows)} rows) in {elapsed * 1000:.1f} ms")
+
+        self.run_in_background(work, done, "Running ..")
+
+    def show_rows(self, headers, rows):
+        """Fill result grid with one page of rows"""
+        tree = console["oths"]["results"]
+        if headers is not None:
+            tree.delete(*tree.get_children())
+            tree["columns"] = list(range(len(headers)))
+            for idx, header in enumerate(headers):
+                tree.heading(idx, text=header)
+                tree.column(idx, width=120, stretch=False)
+        tree.delete(*tree.get_children())
+        for row in rows:
+            tree.insert("", "end", values=["NULL" if f is None else str(f) for f in row])
+
+    def change_page(self, step):
+        """Show previous page from memory or fetch the next page from the server-side cursor"""
+        page = console["page"] + step
+        if page < 0 or not console["pages"]:
+            return
+
+        if page < len(console["pages"]):
+            console["page"] = page
+            self.show_rows(None, console["pages"][page])
+            console["vars"]["status"].set(f"Page {page + 1} ({len(console['pages'][page])} rows)")
+            return
+
+        if not console["cursor"] or console["cursor"].closed or len(console["pages"][-1]) < self.page_size:
+            return  # no more rows
+
+        def done(rows, elapsed):
+            if not rows:
+                return
+            console["pages"].append(rows)
+            console["page"] = page
+            self.show_rows(None, rows)
+            console["vars"]["status"].set(f"Page {page + 1} ({len(rows)} rows) in {elapsed * 1000:.1f} ms")
+
+        self.run_in_background(partial(console["cursor"].fetchmany, self.page_size), done, "Fetching ..")
+
+    def cancel_query(self):
+        """Cancel the statement currently running on the background connection"""
+        if console["connection"] and not console["connection"].closed:
+            console["connection"].cancel()
+            console["vars"]["status"].set("Cancel requested")
+
+    def explain_query(self):
+        """Run EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) and render the plan tree
+        - the statement really runs, so it is wrapped in a transaction which is always rolled back
+        - sequential scans on tables with more than big_table_rows rows are highlighted red, nodes whose actual row
+          count is off by more than 10x from the estimate orange"""
+        sql = console["oths"]["sql"].get("1.0", "end").strip().rstrip(";")
+        if not sql:
+            return
+        self.close_cursor()
+
+        def work():
+            connection = self.get_connection()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+                    plan = cursor.fetchone()[0][0]
+                    relations = list({f[1]["Relation Name"] for f in flatten_plan(plan["Plan"])
+                                      if f[1].get("Node Type") == "Seq Scan" and "Relation Name" in f[1]})
+                    cursor.execute("SELECT relname, reltuples FROM pg_class WHERE relname = ANY(%s)", (relations,))
+                    sizes = dict(cursor.fetchall())
+            finally:
+                connection.rollback()
+            return plan, sizes
+
+        def done(result, elapsed):
+            plan, sizes = result
+            self.show_plan(plan, sizes)
+            console["vars"]["status"].set(f"Planning {plan.get('Planning Time', 0):.2f} ms, "
+                                          f"execution {plan.get('Execution Time', 0):.2f} ms (rolled back)")
+
+        self.run_in_background(work, done, "Explaining ..")
+
+    def show_plan(self, plan, sizes):
+        """Render flattened plan nodes into the plan tree view"""
+        tree = console["oths"]["plan"]
+        tree.delete(*tree.get_children())
+        parents = {-1: ""}
+        for depth, node, self_time in flatten_plan(plan["Plan"]):
+            est_rows, act_rows = node.get("Plan Rows", 0), node.get("Actual Rows", 0)
+            tags = []
+            if node.get("Node Type") == "Seq Scan" and sizes.get(node.get("Relation Name"), 0) > self.big_table_rows:
+                tags.append("seq_scan_big")
+            elif max(est_rows, 1) / max(act_rows, 1) > 10 or max(act_rows, 1) / max(est_rows, 1) > 10:
+                tags.append("misestimate")
+
+            parents[depth] = tree.insert(parents[depth - 1], "end", open=True, tags=tags, text=node.get("Node Type"),
+                                         values=[node.get("Relation Name", node.get("Index Name", "")), est_rows,
+                                                 act_rows, node.get("Actual Loops", 1),
+                                                 f"{node.get('Actual Total Time', 0):.3f}", f"{self_time:.3f}",
+                                                 f"{node.get('Shared Hit Blocks', 0)}/"
+                                                 f"{node.get('Shared Read Blocks', 0)}"])
 
 
 """ ###################################################################################################################
@@ -1061,7 +3266,12 @@ class PostgreSQLTab(ttk.Frame):
 
 
 class MongoDBTab(ttk.Frame):
-    """Tab for MongoDB Control"""
+    """Tab for MongoDB Control
+    - browse databases and collections, query with filter/projection JSON (MongoDB extended JSON)
+    - documents are read page-wise from a cursor with find().batch_size() and rendered lazily: nested documents and
+      arrays are only expanded into tree items when they are opened"""
+
+    page_size = 50
 
     def __init__(self, parent, *args, **kwargs):
         global mongo
@@ -1069,32 +3279,351 @@ class MongoDBTab(ttk.Frame):
         self.root = parent
         self.build_mongo_tab()
 
-    def update_progress(self, value):
-        """Updates progress level of progressbar. Value can be from 0 to 100. """
-        mongo["progress"] = value
-        root.update()
-
     def build_mongo_tab(self):
         """Build MongoDB Tab"""
-        mongo["lbls"]["title"] = Label(self, text="MongoDB Managing stuff")
-        mongo["lbls"]["title"].grid(column=0, row=0, padx=5, sticky="W")
-        ttk.Separator(self, orient=HORIZONTAL).grid(row=9, column=0, columnspan=99, sticky="ew", pady=10)
+        self.columnconfigure(0, weight=1)
 
         # INIT (10+) ############################################################################################ #
-        mongo["lbls"]["init_title"] = Label(self, text="Initialize")
+        mongo["lbls"]["init_title"] = Label(self, text="Initialize", font=("arial", 10, "bold"))
         mongo["lbls"]["init_title"].grid(row=10, column=0, padx=5, sticky="W")
-        mongo["btns"]["init"] = Button(self, text="Initialize", command=self.init_mongodb)
+        mongo["btns"]["init"] = Button(self, text="Connect", command=self.init_mongodb)
         mongo["btns"]["init"].grid(row=11, column=0, padx=5, sticky="W")
 
+        ttk.Separator(self, orient=HORIZONTAL).grid(row=19, column=0, columnspan=99, sticky="ew", pady=10)
+
+        # BROWSER (20+) ######################################################################################### #
+        mongo["lbls"]["browse_title"] = Label(self, text="Browse", font=("arial", 10, "bold"))
+        mongo["lbls"]["browse_title"].grid(row=20, column=0, padx=5, sticky="W")
+
+        mongo["frms"]["select"] = Frame(self)
+        mongo["frms"]["select"].grid(row=21, column=0, padx=5, pady=5, sticky="W")
+        Label(mongo["frms"]["select"], text="Select DB:").grid(row=0, column=0, padx=2, pady=2, sticky="W")
+        mongo["oths"]["select_db"] = ttk.Combobox(mongo["frms"]["select"], state="readonly")
+        mongo["oths"]["select_db"].bind("<<ComboboxSelected>>", self.change_db)
+        mongo["oths"]["select_db"].grid(row=0, column=1, padx=2, pady=2, sticky="W")
+        Label(mongo["frms"]["select"], text="Select Collection:").grid(row=1, column=0, padx=2, pady=2, sticky="W")
+        mongo["oths"]["select_collection"] = ttk.Combobox(mongo["frms"]["select"], state="readonly")
+        mongo["oths"]["select_collection"].bind("<<ComboboxSelected>>", self.change_collection)
+        mongo["oths"]["select_collection"].grid(row=1, column=1, padx=2, pady=2, sticky="W")
+        mongo["vars"]["count"] = StringVar(value="")
+        Label(mongo["frms"]["select"], textvariable=mongo["vars"]["count"]).grid(row=1, column=2, padx=2, sticky="W")
+
+        Label(mongo["frms"]["select"], text="Filter:").grid(row=2, column=0, padx=2, pady=2, sticky="W")
+        mongo["ents"]["filter"] = Entry(mongo["frms"]["select"], width=60)
+        mongo["ents"]["filter"].insert(0, "{}")
+        mongo["ents"]["filter"].grid(row=2, column=1, columnspan=3, padx=2, pady=2, sticky="W")
+        create_tooltip(mongo["ents"]["filter"], 'Extended JSON, e.g. {"device": "pi-1", "_id": {"$oid": "..."}}')
+        Label(mongo["frms"]["select"], text="Projection:").grid(row=3, column=0, padx=2, pady=2, sticky="W")
+        mongo["ents"]["projection"] = Entry(mongo["frms"]["select"], width=60)
+        mongo["ents"]["projection"].grid(row=3, column=1, columnspan=3, padx=2, pady=2, sticky="W")
+        create_tooltip(mongo["ents"]["projection"], 'Optional, e.g. {"device": 1, "value": 1}')
+        Label(mongo["frms"]["select"], text="Batch size:").grid(row=4, column=0, padx=2, pady=2, sticky="W")
+        mongo["vars"]["batch_size"] = StringVar(value="100")
+        mongo["oths"]["batch_size"] = ttk.Combobox(mongo["frms"]["select"], textvariable=mongo["vars"]["batch_size"],
+                                                   values=["50", "100", "500", "1000"], width=6)
+        mongo["oths"]["batch_size"].grid(row=4, column=1, padx=2, pady=2, sticky="W")
+        for key in ["filter", "projection"]:
+            mongo["ents"][key].bind("<Return>", lambda e: self.find_documents())
+
+        mongo["frms"]["actions"] = Frame(self)
+        mongo["frms"]["actions"].grid(row=22, column=0, padx=5, pady=2, sticky="W")
+        mongo["btns"]["find"] = Button(mongo["frms"]["actions"], text="Find", command=self.find_documents)
+        mongo["btns"]["import"] = Button(mongo["frms"]["actions"], text="Import", command=self.import_collection)
+        create_tooltip(mongo["btns"]["import"], "Import a .jsonl or .csv file with insert_many in batches")
+        mongo["btns"]["export"] = Button(mongo["frms"]["actions"], text="Export", command=self.export_collection)
+        mongo["btns"]["replicate"] = Button(mongo["frms"]["actions"], text="Replicate", command=self.replicate)
+        create_tooltip(mongo["btns"]["replicate"], "Copy a table of the PostgreSQL DB selected in the PostgreSQL tab "
+                                                   "to a collection or back")
+        create_tooltip(mongo["btns"]["export"], "Export documents matching filter/projection to .jsonl or .csv")
+        mongo["btns"]["prev"] = Button(mongo["frms"]["actions"], text="<", width=3,
+                                       command=partial(self.change_page, -1))
+        mongo["btns"]["next"] = Button(mongo["frms"]["actions"], text=">", width=3,
+                                       command=partial(self.change_page, 1))
+        for key in ["find", "prev", "next", "import", "export", "replicate"]:
+            mongo["btns"][key].pack(side="left", padx=2)
+        mongo["oths"]["progress"] = ttk.Progressbar(mongo["frms"]["actions"], length=150, mode="determinate",
+                                                    orient="horizontal")
+        mongo["oths"]["progress"].pack(side="left", padx=5)
+        mongo["vars"]["status"] = StringVar(value="Not connected")
+        Label(mongo["frms"]["actions"], textvariable=mongo["vars"]["status"]).pack(side="left", padx=5)
+
+        # document tree, children are created when a node is opened
+        mongo["frms"]["documents"] = Frame(self)
+        mongo["frms"]["documents"].grid(row=23, column=0, padx=5, pady=5, sticky="nsew")
+        mongo["oths"]["documents"] = ttk.Treeview(mongo["frms"]["documents"], columns=["value", "type"], height=15)
+        mongo["oths"]["documents"].heading("#0", text="Key")
+        mongo["oths"]["documents"].heading("value", text="Value")
+        mongo["oths"]["documents"].heading("type", text="Type")
+        mongo["oths"]["documents"].column("#0", width=200)
+        mongo["oths"]["documents"].column("value", width=500)
+        mongo["oths"]["documents"].column("type", width=80)
+        mongo["oths"]["documents"].bind("<<TreeviewOpen>>", self.expand_node)
+        scrollbar = Scrollbar(mongo["frms"]["documents"], orient="vertical",
+                              command=mongo["oths"]["documents"].yview)
+        mongo["oths"]["documents"].config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        mongo["oths"]["documents"].pack(side="left", fill="both", expand=True)
+
     """ ########################################### MongoDB Functions ########################################### """
 
+    def run_in_background(self, function, callback, status):
+        """Submit function to the executor and call callback(result, elapsed) or show the error on the Tk thread"""
+        mongo["vars"]["status"].set(status)
+        start = time.perf_counter()
+        future = executor.submit(function)
+
+        def poll():
+            if not future.done():
+                self.after(50, poll)
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                mongo["vars"]["status"].set(f"Error: {e}")
+                return
+            callback(result, time.perf_counter() - start)
+
+        self.after(50, poll)
+
+    def run_bulk(self, function, title):
+        """Run a bulk import/export in the executor; progress is written to mongo["progress"] by the worker thread
+        and shown by polling, so no Tk call happens outside the Tk thread"""
+        mongo["progress"] = (0, 0)
+        start = time.perf_counter()
+
+        def progress(percent, count):
+            mongo["progress"] = (percent, count)
+
+        def poll():
+            percent, count = mongo["progress"]
+            mongo["oths"]["progress"]["value"] = percent
+            mongo["vars"]["status"].set(f"{title}: {count} documents "
+                                        f"({count / max(time.perf_counter() - start, 1e-9):.0f} docs/s)")
+            if not future.done():
+                self.after(200, poll)
+                return
+            try:
+                stats = future.result()
+            except Exception as e:
+                mongo["vars"]["status"].set(f"{title} failed: {e}")
+                return
+            count = stats.get("inserted", stats.get("exported"))
+            report = f"{title}: {count} documents in {stats['seconds']:.2f}s " \
+                     f"({count / max(stats['seconds'], 1e-9):.0f} docs/s)"
+            if stats.get("skipped"):
+                report += f", {stats['skipped']} duplicates skipped"
+            if stats.get("failed"):
+                report += f", {stats['failed']} failed"
+            if stats.get("invalid"):
+                report += f", {len(stats['invalid'])} invalid lines skipped"
+                for line_no, error in stats["invalid"][:10]:
+                    print(f"Line {line_no}: {error}")
+            mongo["oths"]["progress"]["value"] = 100
+            mongo["vars"]["status"].set(report)
+            print(report)
+
+        future = executor.submit(partial(function, progress=progress))
+        self.after(200, poll)
+
+    def import_collection(self):
+        """Bulk import a .jsonl/.csv file into the selected collection"""
+        if mongo["collection"] is None:
+            return
+        path = filedialog.askopenfilename(title=f"Import into {mongo['collection'].name}",
+                                          filetypes=(("Data files", "*.jsonl *.ndjson *.json *.csv"),
+                                                     ("All files", "*.*")))
+        if not path:
+            return
+        self.run_bulk(partial(import_documents, mongo["collection"], path,
+                              batch_size=int(mongo["vars"]["batch_size"].get())), "Import")
+
+    def export_collection(self):
+        """Export documents matching the current filter/projection to .jsonl/.csv"""
+        if mongo["collection"] is None:
+            return
+        try:
+            query = json_util.loads(mongo["ents"]["filter"].get() or "{}")
+            projection = json_util.loads(mongo["ents"]["projection"].get()) if mongo["ents"]["projection"].get() \
+                else None
+        except ValueError as e:
+            messagebox.showerror(title="Export", message=f"Invalid filter or projection:\n{e}")
+            return
+        path = filedialog.asksaveasfilename(title=f"Export {mongo['collection'].name}",
+                                            initialfile=f"{mongo['collection'].name}.jsonl",
+                                            filetypes=(("JSON lines", "*.jsonl"), ("CSV", "*.csv")))
+        if not path:
+            return
+        self.run_bulk(partial(export_documents, mongo["collection"], path, query=query, projection=projection,
+                              batch_size=int(mongo["vars"]["batch_size"].get())), "Export")
+
+    def replicate(self):
+        """Copy between the selected PostgreSQL database and the selected MongoDB database"""
+        if mongo["db"] is None or not psql["connection"] or psql["connection"].closed:
+            messagebox.showerror(title="Replicate", message="Connect to PostgreSQL and MongoDB first.")
+            return
+        catalog = psql["schema"].load(psql["connection"])
+        prompt = DialogReplicate(self, title="Replicate", tables=list(catalog),
+                                 collection=mongo["oths"]["select_collection"].get())
+        if not prompt.result or not prompt.result["table"] or not prompt.result["collection"]:
+            return
+
+        table, result = prompt.result["table"], prompt.result
+        prim_key = psql["schema"].primary_key(psql["connection"], table)
+        connect = partial(psql["engine"].connect, psql["connection"].info.dbname)
+        collection = mongo["db"][result["collection"]]
+
+        if result["direction"] == "to_mongo":
+            function = partial(replicate_table_to_collection, connect, table, prim_key, collection,
+                               mapper=row_mappers.get(result["mapper"], default_row_mapper),
+                               workers=result["workers"], batch_size=int(mongo["vars"]["batch_size"].get()),
+                               checkpoint_path=result["checkpoint"])
+        else:
+            function = partial(replicate_collection_to_table, collection, connect, table, catalog[table]["columns"],
+                               prim_key, mapper=document_mappers.get(result["mapper"], default_document_mapper),
+                               batch_size=int(mongo["vars"]["batch_size"].get()), checkpoint_path=result["checkpoint"])
+        self.run_bulk(function, "Replicate")
+
     def init_mongodb(self):
+        """Connect to MongoDB with the credentials from config.ini and list databases"""
         print("Initializing MongoDB Connection ..")
         cfg = read_config(section="mongodb")
-        client = MongoClient(f"{cfg['user']}:{cfg['pass']}@{cfg['server']}:{cfg['port']}")
-        print(f"Created client connection: {client}")
-        # mongodb + srv: // readonly: readonly @ [demodata.rgl39.mongodb.net / demo?retryWrites = true & w = majority](
-        #     http: // demodata.rgl39.mongodb.net / demo?retryWrites=true & w=majority)
+
+        def work():
+            client = MongoClient(host=cfg["server"], port=int(cfg["port"]), username=cfg["user"],
+                                 password=cfg["pass"], serverSelectionTimeoutMS=5000)
+            return client, client.list_database_names()
+
+        def done(result, elapsed):
+            mongo["conn"], db_names = result
+            print(f"Created client connection: {mongo['conn']}")
+            mongo["oths"]["select_db"].config(values=db_names)
+            mongo["vars"]["status"].set(f"Connected ({len(db_names)} DBs)")
+            if db_names:
+                mongo["oths"]["select_db"].current(0)
+                self.change_db(None)
+
+        self.run_in_background(work, done, "Connecting ..")
+
+    def change_db(self, event):
+        """Select database, list its collections"""
+        mongo["db"] = mongo["conn"][mongo["oths"]["select_db"].get()]
+
+        def done(names, elapsed):
+            names = sorted(names)
+            mongo["oths"]["select_collection"].config(values=names)
+            if names:
+                mongo["oths"]["select_collection"].current(0)
+                self.change_collection(None)
+            else:
+                mongo["oths"]["select_collection"].set("")
+                mongo["vars"]["status"].set("No collections")
+
+        self.run_in_background(mongo["db"].list_collection_names, done, "Listing collections ..")
+
+    def change_collection(self, event):
+        """Select collection, show estimated document count (from collection metadata, no scan)"""
+        mongo["collection"] = mongo["db"][mongo["oths"]["select_collection"].get()]
+
+        def done(count, elapsed):
+            mongo["vars"]["count"].set(f"~{count} documents")
+            mongo["vars"]["status"].set("")
+
+        self.run_in_background(mongo["collection"].estimated_document_count, done, "Counting ..")
+
+    def find_documents(self):
+        """Open a cursor for filter/projection and show the first page"""
+        if mongo["collection"] is None:
+            return
+        try:
+            query = json_util.loads(mongo["ents"]["filter"].get() or "{}")
+            projection = json_util.loads(mongo["ents"]["projection"].get()) if mongo["ents"]["projection"].get() \
+                else None
+            batch_size = int(mongo["vars"]["batch_size"].get())
+        except ValueError as e:
+            messagebox.showerror(title="Find", message=f"Invalid filter, projection or batch size:\n{e}")
+            return
+
+        if mongo["cursor"]:
+            mongo["cursor"].close()
+        mongo["cursor"] = mongo["collection"].find(query, projection).batch_size(batch_size)
+        mongo["pages"], mongo["page"] = [], 0
+
+        def done(docs, elapsed):
+            mongo["pages"] = [docs]
+            self.show_documents(docs)
+            mongo["vars"]["status"].set(f"Page 1 ({len(docs)} documents) in {elapsed * 1000:.0f} ms")
+
+        self.run_in_background(self.fetch_page, done, "Querying ..")
+
+    def fetch_page(self):
+        """Read the next page_size documents from the cursor (the driver fetches them in batches of batch_size)"""
+        docs = []
+        for doc in mongo["cursor"]:
+            docs.append(doc)
+            if len(docs) >= self.page_size:
+                break
+        return docs
+
+    def change_page(self, step):
+        """Show previous page from memory or read the next page from the cursor"""
+        page = mongo["page"] + step
+        if page < 0 or not mongo["pages"]:
+            return
+
+        if page < len(mongo["pages"]):
+            mongo["page"] = page
+            self.show_documents(mongo["pages"][page])
+            mongo["vars"]["status"].set(f"Page {page + 1} ({len(mongo['pages'][page])} documents)")
+            return
+
+        if len(mongo["pages"][-1]) < self.page_size or not mongo["cursor"].alive:
+            return  # no more documents
+
+        def done(docs, elapsed):
+            if not docs:
+                return
+            mongo["pages"].append(docs)
+            mongo["page"] = page
+            self.show_documents(docs)
+            mongo["vars"]["status"].set(f"Page {page + 1} ({len(docs)} documents) in {elapsed * 1000:.0f} ms")
+
+        self.run_in_background(self.fetch_page, done, "Fetching ..")
+
+    def insert_node(self, parent, key, value):
+        """Insert one tree item; documents and arrays get a placeholder child and are expanded on open"""
+        tree = mongo["oths"]["documents"]
+        if isinstance(value, dict):
+            text = f"{{{len(value)} fields}}"
+        elif isinstance(value, list):
+            text = f"[{len(value)} items]"
+        else:
+            text = str(value)[:200]
+
+        iid = tree.insert(parent, "end", text=key, values=[text, type(value).__name__])
+        if isinstance(value, (dict, list)) and value:
+            mongo["nodes"][iid] = value
+            tree.insert(iid, "end", text="..")
+        return iid
+
+    def show_documents(self, docs):
+        """Render top-level items for a page of documents"""
+        tree = mongo["oths"]["documents"]
+        tree.delete(*tree.get_children())
+        mongo["nodes"] = {}
+        for doc in docs:
+            self.insert_node("", str(doc.get("_id", "")), doc)
+
+    def expand_node(self, event):
+        """Replace the placeholder of an opened document/array with its fields"""
+        tree = mongo["oths"]["documents"]
+        iid = tree.focus()
+        value = mongo["nodes"].pop(iid, None)
+        if value is None:
+            return
+        tree.delete(*tree.get_children(iid))
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        for key, child in items:
+            self.insert_node(iid, str(key), child)
 
 
 """ ###################################################################################################################
@@ -1109,8 +3638,10 @@ if __name__ == '__main__':
     # tab management
     tab_root = ttk.Notebook(root)
     tab_psql = PostgreSQLTab(tab_root, style="Black.TLabel", relief="sunken", borderwidth=5)
+    tab_console = QueryConsoleTab(tab_root, style="Black.TLabel", relief="sunken", borderwidth=5)
     tab_mongo = MongoDBTab(tab_root, style="Black.TLabel", relief="sunken", borderwidth=5)
     tab_root.add(tab_psql, text="PostgreSQL")
+    tab_root.add(tab_console, text="Console")
     tab_root.add(tab_mongo, text="MongoDB")
     tab_root.pack(expand=1, fill="both")
 
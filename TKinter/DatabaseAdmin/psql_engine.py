@@ -0,0 +1,1138 @@
+"""
+Headless PostgreSQL core of DatabaseAdmin
+- PSQLEngine bundles the database operations (connect, list dbs/tables, fetch, insert, update, delete, create/drop)
+  with the schema cache, the prepared statement cache and edit sessions; PostgreSQLTab (gui.py) drives it, but it
+  runs without a display, e.g. from scripts or benchmarks
+- command line interface, e.g.:
+    python psql_engine.py dbs
+    python psql_engine.py --db mydb fetch mytable --where "id > %s" --param 10 --limit 5
+    python psql_engine.py --db mydb update mytable 3 name=Matzl
+    python psql_engine.py --help
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+import time
+import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+
+# statements which change the catalog and invalidate the schema and statement caches
+ddl_pattern = re.compile(r"^\s*(CREATE|DROP|ALTER|TRUNCATE|RENAME|COMMENT)\b", re.IGNORECASE)
+
+# tables written by a modifying statement, used to invalidate the result cache
+write_pattern = re.compile(r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE|DROP\s+TABLE"
+                           r"(?:\s+IF\s+EXISTS)?|COPY)\s+(?:ONLY\s+)?\"?(\w+)\"?", re.IGNORECASE)
+
+
+class SchemaCache(object):
+    """Catalog cache for PostgreSQLTab
+    - columns, types, primary keys, indexes and foreign keys of all tables are read with one pg_catalog query per
+      database and kept until invalidate() is called (DDL through the tool, database change, reconnect)
+    - call with psql["schema"].columns(connection, table) etc."""
+
+    catalog_sql = """
+        SELECT c.relname,
+               (SELECT json_agg(json_build_array(a.attname, format_type(a.atttypid, a.atttypmod), t.typname)
+                                ORDER BY a.attnum)
+                  FROM pg_attribute a JOIN pg_type t ON t.oid = a.atttypid
+                 WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped) AS columns,
+               (SELECT json_agg(json_build_object(
+                           'name', i.relname, 'method', am.amname, 'unique', x.indisunique, 'primary', x.indisprimary,
+                           'valid', x.indisvalid,
+                           'columns', (SELECT json_agg(a.attname ORDER BY k.ord)
+                                         FROM unnest(x.indkey) WITH ORDINALITY k(attnum, ord)
+                                         JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum)))
+                  FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid JOIN pg_am am ON am.oid = i.relam
+                 WHERE x.indrelid = c.oid) AS indexes,
+               (SELECT json_agg(json_build_object(
+                           'name', con.conname, 'ref_table', con.confrelid::regclass::text,
+                           'columns', (SELECT json_agg(a.attname ORDER BY k.ord)
+                                         FROM unnest(con.conkey) WITH ORDINALITY k(attnum, ord)
+                                         JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum),
+                           'ref_columns', (SELECT json_agg(a.attname ORDER BY k.ord)
+                                             FROM unnest(con.confkey) WITH ORDINALITY k(attnum, ord)
+                                             JOIN pg_attribute a ON a.attrelid = con.confrelid
+                                                                AND a.attnum = k.attnum)))
+                  FROM pg_constraint con
+                 WHERE con.conrelid = c.oid AND con.contype = 'f') AS foreign_keys
+          FROM pg_class c
+         WHERE c.relkind = 'r' AND c.relname !~ '^(pg_|sql_)' AND pg_table_is_visible(c.oid)
+         ORDER BY c.relname"""
+
+    def __init__(self):
+        self.catalogs = {}  # {database name: {table name: {"columns": [], "types": {}, "pk": [], ...}}}
+        self.loads = 0  # number of catalog queries issued, shown in get_info()
+
+    def load(self, connection):
+        """Return the catalog of the database behind connection, query pg_catalog once if not cached"""
+        db_name = connection.info.dbname
+        if db_name in self.catalogs:
+            return self.catalogs[db_name]
+
+        with connection.cursor() as cursor:
+            cursor.execute(self.catalog_sql)
+            rows = cursor.fetchall()
+        self.loads += 1
+
+        catalog = {}
+        for table, columns, indexes, foreign_keys in rows:
+            columns, indexes = columns or [], indexes or []
+            primary = [f for f in indexes if f["primary"]]
+            catalog[table] = {
+                "columns": [f[0] for f in columns],
+                "types": {f[0]: f[1] for f in columns},
+                "base_types": {f[0]: f[2] for f in columns},
+                "pk": primary[0]["columns"] if primary else [],
+                "indexes": indexes,
+                "fks": foreign_keys or []
+            }
+
+        self.catalogs[db_name] = catalog
+        return catalog
+
+    def table(self, connection, table):
+        """Cached catalog entry of a single table; reloads once if the table is unknown (created outside the tool)"""
+        catalog = self.load(connection)
+        if table not in catalog:
+            self.invalidate(connection)
+            catalog = self.load(connection)
+        return catalog.get(table, {"columns": [], "types": {}, "base_types": {}, "pk": [], "indexes": [], "fks": []})
+
+    def columns(self, connection, table):
+        """Column names of table in ordinal order"""
+        return self.table(connection, table)["columns"]
+
+    def types(self, connection, table):
+        """Formatted data types of table (e.g. 'character varying(20)'), ordered like columns()"""
+        entry = self.table(connection, table)
+        return [entry["types"][f] for f in entry["columns"]]
+
+    def primary_key(self, connection, table):
+        """Primary key column of table; falls back to the first column if no primary key is defined"""
+        entry = self.table(connection, table)
+        if entry["pk"]:
+            return entry["pk"][0]
+        return entry["columns"][0] if entry["columns"] else None
+
+    def indexed_columns(self, connection, table):
+        """Set of columns which are the leading column of a valid index"""
+        return {f["columns"][0] for f in self.table(connection, table)["indexes"] if f["columns"] and f["valid"]}
+
+    def invalidate(self, connection=None):
+        """Drop cached catalog of the database behind connection, or all catalogs if connection is None"""
+        if connection is None:
+            self.catalogs = {}
+        else:
+            self.catalogs.pop(connection.info.dbname, None)
+
+
+class StatementCache(object):
+    """Server-side prepared statements for the repeated operations of the tool (update/insert/delete/select per table)
+    - sql is PREPAREd once per (connection, key) and afterwards sent as EXECUTE name (...), so the server parses and
+      plans it only once per session; key is e.g. ("update", table, (changed columns))
+    - statements of invalidated keys are DEALLOCATEd on the server, right away or (if the transaction is aborted)
+      before the next PREPARE on that connection
+    - hits/misses are shown in get_info()"""
+
+    # errors of an EXECUTE whose prepared statement is gone or outdated after ALTER TABLE by another client
+    # ("cached plan must not change result type", or parameter types fixed at PREPARE which no longer match the
+    # column types), the statement is prepared again once
+    stale_errors = (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.FeatureNotSupported,
+                    psycopg2.errors.DatatypeMismatch, psycopg2.DataError)
+
+    def __init__(self):
+        self.prepared = {}  # {(id(connection), backend pid): {key: statement name}}
+        self.connections = {}  # {(id(connection), backend pid): connection}
+        self.stale = {}  # {(id(connection), backend pid): [statement names to DEALLOCATE]}
+        self.counter = 0
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, cursor, key, sql):
+        """Return 'EXECUTE name (%s, ..)' for sql (with %s placeholders), PREPARE it on the connection of cursor on
+        the first call; the PREPARE runs behind a savepoint, so a failing statement does not abort the transaction"""
+        connection = cursor.connection
+        conn_key = (id(connection), connection.info.backend_pid)
+        self.connections[conn_key] = connection
+        statements = self.prepared.setdefault(conn_key, {})
+        placeholders = sql.count("%s")
+        if key in statements:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.counter += 1
+            name = f"dbadmin_{self.counter}"
+            numbered = iter(range(1, placeholders + 1))
+            prepare = f"PREPARE {name} AS " + re.sub(r"%s", lambda m: f"${next(numbered)}", sql)
+            stale = self.stale.pop(conn_key, [])
+            prepare = "".join(f"DEALLOCATE {f}; " for f in stale) + prepare
+            if connection.autocommit:
+                cursor.execute(prepare)
+            else:
+                try:
+                    cursor.execute(f"SAVEPOINT dbadmin_prepare; {prepare}; RELEASE SAVEPOINT dbadmin_prepare")
+                except Exception:
+                    cursor.execute("ROLLBACK TO SAVEPOINT dbadmin_prepare; RELEASE SAVEPOINT dbadmin_prepare")
+                    raise
+                # (prepared statements are not transactional, rolling back the savepoint keeps them)
+            statements[key] = name
+        name = statements[key]
+        return f"EXECUTE {name} ({', '.join(['%s'] * placeholders)})" if placeholders else f"EXECUTE {name}"
+
+    def invalidate(self, connection=None, table=None, key=None):
+        """Drop the statements of key, of table or all on connection (or all connections), e.g. after DDL;
+        they are DEALLOCATEd and PREPAREd again under a new name on next use"""
+        for conn_key, statements in self.prepared.items():
+            if connection is not None and conn_key[0] != id(connection):
+                continue
+            keys = [f for f in statements if (key is None or f == key) and (table is None or f[1] == table)]
+            if keys:
+                self.stale.setdefault(conn_key, []).extend(statements.pop(f) for f in keys)
+                self.deallocate(conn_key)
+
+    def deallocate(self, conn_key):
+        """DEALLOCATE the stale statements of a connection; deferred to the next PREPARE if its transaction is
+        aborted (or the DEALLOCATE fails)"""
+        connection = self.connections.get(conn_key)
+        if connection is None or connection.closed:
+            self.stale.pop(conn_key, None)
+            return
+        if connection.info.transaction_status not in (psycopg2.extensions.TRANSACTION_STATUS_IDLE,
+                                                      psycopg2.extensions.TRANSACTION_STATUS_INTRANS):
+            return
+        names = self.stale.pop(conn_key, [])
+        deallocate = "".join(f"DEALLOCATE {f}; " for f in names)
+        try:
+            with connection.cursor() as cursor:
+                if connection.autocommit:
+                    cursor.execute(deallocate)
+                else:
+                    try:
+                        cursor.execute(f"SAVEPOINT dbadmin_prepare; {deallocate}RELEASE SAVEPOINT dbadmin_prepare")
+                    except Exception:
+                        cursor.execute("ROLLBACK TO SAVEPOINT dbadmin_prepare; RELEASE SAVEPOINT dbadmin_prepare")
+                        raise
+        except Exception:
+            self.stale.setdefault(conn_key, []).extend(names)
+
+    def forget(self, connection):
+        """Drop the bookkeeping of a closed connection (the server drops its prepared statements itself)"""
+        self.prepared = {k: v for k, v in self.prepared.items() if k[0] != id(connection)}
+        self.connections = {k: v for k, v in self.connections.items() if k[0] != id(connection)}
+        self.stale = {k: v for k, v in self.stale.items() if k[0] != id(connection)}
+
+
+class ResultCache(object):
+    """LRU cache of query results, keyed by (database, normalized sql, params)
+    - every entry knows the tables it was read from; entries are dropped when the tool writes to one of them
+      (PSQLEngine.run), when a change is notified (LiveTableView) or when the n_tup_ins/upd/del counters of
+      pg_stat_user_tables changed (written by other clients), checked at most every check_interval seconds
+    - the estimated size of all cached rows is kept below max_bytes, least recently used entries are evicted first"""
+
+    counters_sql = """SELECT pg_stat_clear_snapshot();
+                      SELECT relname, n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, check_interval=2.0):
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.entries = OrderedDict()  # {(db, sql, params): (rows, tables, size)}, least recently used first
+        self.size = 0
+        self.counters = {}  # {db: {table: n_tup_ins + n_tup_upd + n_tup_del}}
+        self.checked = {}  # {db: time of the last counter check}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(db_name, sql, params):
+        """Cache key; whitespace of sql is normalized, params must be hashable after conversion to a tuple"""
+        params = tuple(tuple(f) if isinstance(f, list) else f for f in params) if params else ()
+        return db_name, " ".join(sql.split()), params
+
+    @staticmethod
+    def estimate_size(rows):
+        """Rough size of rows in bytes (row tuples and their values)"""
+        return sys.getsizeof(rows) + sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in rows)
+
+    def get(self, key):
+        """Cached rows of key or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, rows, tables):
+        """Cache rows read from tables; results bigger than a quarter of max_bytes are not cached"""
+        size = self.estimate_size(rows)
+        if size > self.max_bytes // 4:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[2]
+        self.entries[key] = (rows, tuple(tables), size)
+        self.size += size
+        while self.size > self.max_bytes and self.entries:
+            self.size -= self.entries.popitem(last=False)[1][2]
+
+    def invalidate(self, db_name=None, tables=None):
+        """Drop the entries of db_name (or all databases) which were read from one of tables (or all entries)"""
+        for key in [k for k, v in self.entries.items() if (db_name is None or k[0] == db_name)
+                    and (tables is None or set(tables) & set(v[1]))]:
+            self.size -= self.entries.pop(key)[2]
+            self.invalidations += 1
+
+    def check_counters(self, connection, force=False):
+        """Invalidate entries of tables whose write counters changed since the last check (by other clients)"""
+        db_name = connection.info.dbname
+        if not force and time.monotonic() - self.checked.get(db_name, 0) < self.check_interval:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(self.counters_sql)
+            counters = dict(cursor.fetchall())
+        self.checked[db_name] = time.monotonic()
+        previous = self.counters.get(db_name)
+        if previous is not None:
+            changed = [f for f in set(counters) | set(previous) if counters.get(f) != previous.get(f)]
+            if changed:
+                self.invalidate(db_name, changed)
+        self.counters[db_name] = counters
+
+
+class EditSession(object):
+    """Groups inserts/updates/deletes on a connection into one transaction which is committed once
+    - every statement runs behind its own savepoint, sent in the same round trip as the statement; a failing
+      statement is rolled back to its savepoint while the other pending changes stay intact
+    - undo() rolls back the last statement, rollback() discards all pending changes
+    - reads get a shared savepoint (edit_read) so a failing query does not abort the session either"""
+
+    read_savepoint = "edit_read"
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.pending = []  # [(savepoint, description)], oldest first
+        self.counter = 0
+        self.read_open = False  # edit_read is the newest savepoint
+
+    def _prefix(self, savepoint):
+        """SQL prefix creating savepoint; releases edit_read first so it never ends up below a write savepoint"""
+        release = f"RELEASE SAVEPOINT {self.read_savepoint}; " if self.read_open else ""
+        return f"{release}SAVEPOINT {savepoint}; "
+
+    def execute(self, sql, params=None, description=None, cursor=None):
+        """Execute a modifying statement behind a new savepoint and add it to the pending changes, returns rowcount
+        - on failure the statement is rolled back to its savepoint and the exception is raised"""
+        self.counter += 1
+        savepoint = f"edit_{self.counter}"
+        own_cursor = cursor is None
+        cursor = cursor or self.connection.cursor()
+        try:
+            cursor.execute(self._prefix(savepoint) + sql, params)
+        except Exception:
+            self.read_open = False
+            with self.connection.cursor() as rollback:
+                rollback.execute(f"ROLLBACK TO SAVEPOINT {savepoint}; RELEASE SAVEPOINT {savepoint}")
+            raise
+        finally:
+            if own_cursor:
+                cursor.close()
+        self.read_open = False
+        description = description or " ".join(sql.split())[:80]
+        self.pending.append((savepoint, f"{description} ({cursor.rowcount} row(s))"))
+        return cursor.rowcount
+
+    def query(self, cursor, sql, params=None):
+        """Execute a read on cursor behind edit_read, a failing query only rolls back to edit_read"""
+        release = f"RELEASE SAVEPOINT {self.read_savepoint}; " if self.read_open else ""
+        try:
+            cursor.execute(f"{release}SAVEPOINT {self.read_savepoint}; " + sql, params)
+            self.read_open = True
+        except Exception:
+            with self.connection.cursor() as rollback:
+                rollback.execute(f"ROLLBACK TO SAVEPOINT {self.read_savepoint}")
+            self.read_open = True
+            raise
+
+    @contextmanager
+    def statement(self, description):
+        """Context manager for multi-statement changes (e.g. execute_values), yields a cursor;
+        all statements of the block are pending as one change"""
+        self.counter += 1
+        savepoint = f"edit_{self.counter}"
+        with self.connection.cursor() as cursor:
+            cursor.execute(self._prefix(savepoint).rstrip("; "))
+            self.read_open = False
+            try:
+                yield cursor
+            except Exception:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}; RELEASE SAVEPOINT {savepoint}")
+                raise
+        self.pending.append((savepoint, description))
+
+    def undo(self):
+        """Roll back the newest pending change, returns its description or None"""
+        if not self.pending:
+            return None
+        savepoint, description = self.pending.pop()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}; RELEASE SAVEPOINT {savepoint}")
+        self.read_open = False
+        return description
+
+    def commit(self):
+        """Commit all pending changes at once, returns the number of committed changes"""
+        count = len(self.pending)
+        self.connection.commit()
+        self.pending, self.read_open = [], False
+        return count
+
+    def rollback(self):
+        """Discard all pending changes"""
+        self.connection.rollback()
+        self.pending, self.read_open = [], False
+
+
+class ExportSink(object):
+    """File-like target for cursor.copy_expert(COPY ... TO STDOUT)
+    - writes the chunks handed over by psycopg2 straight to the (optionally gzipped) file, memory stays constant
+    - counts lines and calls callback(lines) every callback_rows lines to report progress; for csv this is only
+      approximate (a quoted value containing a newline spans several lines), the exact number of rows is
+      cursor.rowcount after the COPY"""
+
+    def __init__(self, file, callback=None, callback_rows=10000):
+        self.file = file
+        self.callback = callback
+        self.callback_rows = callback_rows
+        self.rows = 0
+        self.bytes = 0
+        self._next_callback = callback_rows
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.file.write(data)
+        self.bytes += len(data)
+        self.rows += data.count(b"\n")
+        if self.callback and self.rows >= self._next_callback:
+            self._next_callback = self.rows + self.callback_rows
+            self.callback(self.rows)
+        return len(data)
+
+
+class PSQLEngine(object):
+    """PostgreSQL operations on one main connection (self.connection)
+    - modifying statements are committed immediately, or kept pending while an edit session is active
+      (begin_session(), see EditSession); errors are raised, the failed statement is rolled back
+    - table metadata comes from SchemaCache, repeated operations are run as prepared statements (StatementCache)"""
+
+    def __init__(self, config="config.ini", verbose=True):
+        self.config = config
+        self.verbose = verbose
+        self.connection = None
+        self.schema = SchemaCache()
+        self.statements = StatementCache()
+        self.results = ResultCache()
+        self.session = None
+
+    """ ########################################### Connections ########################################### """
+
+    def connect(self, db_name=None):
+        """Open an additional connection to db_name (default: current database), e.g. for background threads"""
+        if not db_name and self.connection:
+            db_name = self.connection.info.dbname
+        return connect_postgresql(db_name, config=self.config, verbose=self.verbose)
+
+    def open(self, db_name=None):
+        """(Re)open the main connection to db_name (None: default database of the user)"""
+        self.close()
+        self.connection = connect_postgresql(db_name, config=self.config, verbose=self.verbose)
+        return self.connection
+
+    def close(self):
+        """Close the main connection, pending changes of an edit session are discarded"""
+        if self.connection and not self.connection.closed:
+            self.statements.forget(self.connection)
+            self.connection.close()
+        self.connection = None
+        self.session = None
+
+    """ ########################################### Statements ########################################### """
+
+    def query(self, sql, params=None, prepare_key=None, cache_tables=None):
+        """Execute query (with optional bound params) and return all rows
+        - with prepare_key the query is run as prepared statement (see StatementCache)
+        - with cache_tables (the tables the query reads) the result is cached (see ResultCache); not used while an
+          edit session is active, pending changes are only visible to this connection"""
+        if cache_tables and not self.session:
+            key = self.results.key(self.connection.info.dbname, sql, params)
+            self.results.check_counters(self.connection)
+            rows = self.results.get(key)
+            if rows is None:
+                rows = self.query(sql, params, prepare_key=prepare_key)
+                self.results.put(key, rows, cache_tables)
+            return rows
+
+        try:
+            return self.query_once(sql, params, prepare_key)
+        except StatementCache.stale_errors:
+            if not prepare_key:
+                raise
+            self.reprepare(prepare_key)
+            return self.query_once(sql, params, prepare_key)
+
+    def query_once(self, sql, params=None, prepare_key=None):
+        """Execute query and return all rows (see query(), without cache and retry)"""
+        with self.connection.cursor() as cursor:
+            if prepare_key:
+                sql = self.statements.prepare(cursor, prepare_key, sql)
+            if self.session:
+                self.session.query(cursor, sql, params)  # keep the edit session alive if the query fails
+            else:
+                cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def reprepare(self, prepare_key):
+        """Drop the outdated prepared statement of prepare_key (table changed by another client) and everything
+        cached about its table, so the next call prepares it again; ends the failed read transaction"""
+        if not self.session:
+            self.connection.rollback()
+        self.statements.invalidate(self.connection, key=prepare_key)
+        self.schema.invalidate(self.connection)
+        self.invalidate_results(tables=[prepare_key[1]])
+
+    def run(self, cursor, sql, params=None, description=None, prepare_key=None):
+        """Execute a modifying statement on cursor and commit it, or keep it pending if an edit session is active;
+        rolls back the statement and raises on failure
+        - with prepare_key the statement is run as prepared statement (see StatementCache), an outdated prepared
+          statement is prepared again once"""
+        statement = sql
+        try:
+            try:
+                self.run_once(cursor, statement, params, description, prepare_key)
+            except StatementCache.stale_errors:
+                if not prepare_key:
+                    raise
+                self.reprepare(prepare_key)
+                self.run_once(cursor, statement, params, description, prepare_key)
+        finally:
+            # catalog changed, refetch on next access
+            if ddl_pattern.match(statement):
+                self.schema.invalidate(self.connection)
+                self.statements.invalidate(self.connection)
+            self.invalidate_results(statement)
+
+    def run_once(self, cursor, sql, params=None, description=None, prepare_key=None):
+        """Execute a modifying statement (see run(), without retry and cache invalidation)"""
+        if prepare_key:
+            try:
+                sql = self.statements.prepare(cursor, prepare_key, sql)
+            except Exception:
+                if not self.session:
+                    self.connection.rollback()
+                raise
+
+        if self.session:
+            self.session.execute(sql, params, description=description, cursor=cursor)
+            return
+
+        try:
+            cursor.execute(sql, params)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+    def invalidate_results(self, sql=None, tables=None):
+        """Drop cached results of the tables written by sql (or of tables), of all tables of the current database if
+        none can be determined"""
+        tables = tables or write_pattern.findall(sql or "") or None
+        self.results.invalidate(self.connection.info.dbname if self.connection else None, tables)
+
+    def execute(self, sql, params=None, description=None, prepare_key=None):
+        """Execute a modifying statement (see run()), returns the number of affected rows"""
+        with self.connection.cursor() as cursor:
+            self.run(cursor, sql, params, description=description, prepare_key=prepare_key)
+            return cursor.rowcount
+
+    def run_autocommit(self, sql, params=None):
+        """Execute a statement which can not run inside a transaction block (CREATE/DROP DATABASE)"""
+        if self.session:
+            raise RuntimeError("Commit or discard the pending changes of the edit session first.")
+        self.connection.rollback()
+        self.connection.autocommit = True
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql, params)
+        finally:
+            self.connection.autocommit = False
+
+    """ ########################################### Edit sessions ########################################### """
+
+    def begin_session(self):
+        """Start an edit session, modifying statements stay pending until commit_session()"""
+        if not self.session:
+            self.connection.rollback()  # start from a clean transaction
+            self.session = EditSession(self.connection)
+        return self.session
+
+    def commit_session(self):
+        """Commit all pending changes at once and end the session, returns the number of committed changes;
+        on failure everything is rolled back and the exception is raised"""
+        session, self.session = self.session, None
+        if not session:
+            return 0
+        try:
+            return session.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+    def undo(self):
+        """Roll back the last pending change of the edit session, returns its description or None"""
+        if not self.session:
+            return None
+        description = self.session.undo()
+        if description:
+            self.schema.invalidate(self.connection)  # the change might have been DDL
+            self.statements.invalidate(self.connection)
+            self.invalidate_results()
+        return description
+
+    def discard_session(self):
+        """Roll back all pending changes and end the session, returns the number of discarded changes"""
+        session, self.session = self.session, None
+        if not session:
+            return 0
+        count = len(session.pending)
+        session.rollback()
+        self.schema.invalidate(self.connection)
+        self.statements.invalidate(self.connection)
+        self.invalidate_results()
+        return count
+
+    """ ########################################### Operations ########################################### """
+
+    def version(self):
+        """Server version string and current user"""
+        return self.query("SELECT version(), current_user")[0]
+
+    def list_databases(self):
+        """Names of all databases of the server"""
+        return [f[0] for f in self.query("SELECT datname FROM pg_database ORDER BY datname")]
+
+    def list_tables(self):
+        """Names of all tables of the current database"""
+        return list(self.schema.load(self.connection))
+
+    def available_types(self):
+        """Data type names of pg_catalog.pg_type, without array types"""
+        return [f[0] for f in self.query("SELECT typname FROM pg_catalog.pg_type") if not f[0].startswith("_")]
+
+    def columns(self, table):
+        """Column names of table"""
+        return self.schema.columns(self.connection, table)
+
+    def primary_key(self, table):
+        """Primary key column of table (first column if there is none)"""
+        return self.schema.primary_key(self.connection, table)
+
+    def keys_condition(self, table, pk_values):
+        """'"pk" = ANY(..)' condition and its parameter for pk_values; the keys are sent as text[] and cast to the
+        key type on the server, so str keys (command line arguments, uuid values) match every key type, also in
+        prepared statements whose parameter types are fixed at PREPARE"""
+        prim_key = self.primary_key(table)
+        pk_type = self.schema.table(self.connection, table)["types"][prim_key]
+        return f'"{prim_key}" = ANY(%s::text[]::{pk_type}[])', [None if f is None else str(f) for f in pk_values]
+
+    def fetch(self, table, where=None, params=None, limit=None):
+        """Rows of table, optionally filtered by a WHERE clause (with %s placeholders for params) and limited;
+        returns (columns, rows)
+        - columns are selected by name, so the prepared statement keeps its result type if columns are added"""
+        columns = self.columns(table)
+        names = ", ".join(f'"{f}"' for f in columns)
+        sql = f'SELECT {names} FROM "{table}"'
+        if where:
+            sql += f" WHERE {where}"
+        params = list(params or [])
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        # only prepare statements without free text
+        key = None if where else ("select", table, tuple(columns), limit is not None)
+        return columns, self.query(sql, params or None, prepare_key=key, cache_tables=(table, ))
+
+    def fetch_by_keys(self, table, pk_values):
+        """Rows of table whose primary key is in pk_values (columns in the order of columns())"""
+        columns = self.columns(table)
+        condition, keys = self.keys_condition(table, pk_values)
+        sql = f"""SELECT {', '.join(f'"{f}"' for f in columns)} FROM "{table}" WHERE {condition}"""
+        return self.query(sql, (keys, ), prepare_key=("select_pks", table, tuple(columns)))
+
+    def insert(self, table, values, columns=None):
+        """Insert one row (values in the order of columns, default: all columns), returns the row count"""
+        columns = list(columns or self.columns(table)[:len(values)])
+        names = ", ".join(f'"{f}"' for f in columns)
+        sql = f"""INSERT INTO "{table}" ({names}) VALUES ({', '.join(['%s'] * len(values))})"""
+        return self.execute(sql, list(values), description=f"INSERT INTO {table}",
+                            prepare_key=("insert", table, tuple(columns)))
+
+    def update(self, table, pk_value, changes):
+        """Update the columns in changes ({column: value}) of the row with primary key pk_value, returns the row count"""
+        prim_key = self.primary_key(table)
+        columns = list(changes)
+        sql = f"""UPDATE "{table}" SET {', '.join(f'"{f}"=(%s)' for f in columns)} WHERE "{prim_key}"=(%s)"""
+        return self.execute(sql, (*[changes[f] for f in columns], pk_value),
+                            description=f"UPDATE {table} {prim_key}={pk_value}",
+                            prepare_key=("update", table, tuple(columns)))
+
+    def delete(self, table, pk_values):
+        """Delete the rows whose primary key is in pk_values, returns the row count"""
+        condition, keys = self.keys_condition(table, pk_values)
+        sql = f"""DELETE FROM "{table}" WHERE {condition}"""
+        return self.execute(sql, (keys, ), description=f"DELETE FROM {table} ({len(pk_values)} key(s))",
+                            prepare_key=("delete", table))
+
+    def row_estimate(self, table):
+        """Estimated number of rows of table from pg_class.reltuples (no count(*) over the whole table)"""
+        estimate = self.query("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", (f'"{table}"', ))
+        return max(int(estimate[0][0]), 0) if estimate else 0
+
+    def export(self, table, path, columns=None, where=None, fmt="csv", compress=False, progress=None,
+               connection=None):
+        """Stream columns (default: all) of table, optionally filtered by a WHERE clause, to a .csv/.tsv file
+        (gzipped if compress) via COPY ... TO STDOUT, rows are never held in memory
+        - progress(lines) is called every 10000 lines (approximate rows); returns (rows, bytes written)
+        - connection: run on another connection (e.g. opened with connect() for a background thread) instead of
+          the main connection"""
+        connection = connection or self.connection
+        if self.session and connection is self.connection:
+            raise RuntimeError("Commit or discard the pending changes of the edit session first.")
+        names = ", ".join(f'"{f}"' for f in columns) if columns else "*"
+        where = f" WHERE {where}" if where else ""
+        delimiter = ", DELIMITER E'\\t'" if fmt == "tsv" else ""
+        sql = f"""COPY (SELECT {names} FROM "{table}"{where}) TO STDOUT WITH (FORMAT csv, HEADER true{delimiter})"""
+
+        opener = gzip.open if compress else open
+        try:
+            with opener(path, "wb") as file, connection.cursor() as cursor:
+                sink = ExportSink(file, callback=progress)
+                cursor.copy_expert(sql, sink)
+                rows = cursor.rowcount if cursor.rowcount >= 0 else max(sink.rows - 1, 0)  # without header line
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return rows, sink.bytes
+
+    def create_table(self, sql):
+        """Create a table from a CREATE TABLE statement"""
+        self.execute(sql)
+
+    def drop_table(self, table):
+        """Drop table if it exists"""
+        self.execute(f'DROP TABLE IF EXISTS "{table}"')
+
+    def create_database(self, db_name):
+        """Create a new database"""
+        self.run_autocommit(f'CREATE DATABASE "{db_name}"')
+
+    def drop_database(self, db_name):
+        """Drop a database: revoke new connections, terminate the open ones (the main connection must not be
+        connected to it)"""
+        self.run_autocommit(f"""REVOKE CONNECT ON DATABASE "{db_name}" FROM PUBLIC""")
+        self.run_autocommit("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s "
+                            "AND pid <> pg_backend_pid()", (db_name, ))
+        self.run_autocommit(f'DROP DATABASE IF EXISTS "{db_name}"')
+        self.schema.invalidate()
+        self.results.invalidate(db_name)
+
+
+def read_config(filename="config.ini", section=None, verbose=True):
+    """Parse DB config from .ini file"""
+    parser = ConfigParser()
+    if not os.path.isfile(filename):
+        print(f"Couldnt find {os.path.abspath(filename)}. Creating default config ..")
+        with open(filename, "w") as f:
+            f.write("""[postgresql]
+server=0.0.0.0
+port=5432
+user=postgresadmin
+pass=123
+sslmode=require
+
+[mongodb]
+server=0.0.0.0
+port=27017
+user=mongoadmin
+pass=123
+""")
+
+    ret = parser.read(filename)
+    if verbose:
+        print("Parsed:", ret)
+
+    content = {}
+    if parser.has_section(section):
+        params = parser.items(section)
+        for param in params:
+            content[param[0]] = param[1]
+    else:
+        raise Exception(f'Section {section} not found in {filename}')
+
+    return content
+
+
+def connect_postgresql(db_name, config="config.ini", verbose=True):
+    """Open a new PostgreSQL connection to db_name (None: default database of the user) with the parameters from
+    config"""
+    cfg = read_config(filename=config, section="postgresql", verbose=verbose)
+    return psycopg2.connect(dbname=db_name, user=cfg["user"], password=cfg["pass"],
+                            host=cfg["server"], port=cfg["port"], sslmode=cfg["sslmode"])
+
+
+backup_catalog_sql = """
+SELECT c.relname, c.reltuples::bigint,
+       (SELECT json_agg(json_build_object('name', a.attname, 'type', format_type(a.atttypid, a.atttypmod),
+                                          'not_null', a.attnotnull, 'identity', a.attidentity,
+                                          'default', pg_get_expr(d.adbin, d.adrelid)) ORDER BY a.attnum)
+          FROM pg_attribute a LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+         WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped),
+       (SELECT json_agg(json_build_object('name', con.conname, 'type', con.contype,
+                                          'definition', pg_get_constraintdef(con.oid)))
+          FROM pg_constraint con WHERE con.conrelid = c.oid AND con.contype IN ('p', 'u', 'c', 'f')),
+       (SELECT json_agg(pg_get_indexdef(i.indexrelid)) FROM pg_index i
+         WHERE i.indrelid = c.oid AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid))
+  FROM pg_class c
+ WHERE c.relkind = 'r' AND c.relnamespace = 'public'::regnamespace
+ ORDER BY pg_total_relation_size(c.oid) DESC"""
+
+backup_sequences_sql = """
+SELECT s.sequencename, s.last_value, s.start_value, s.increment_by,
+       EXISTS (SELECT 1 FROM pg_depend d WHERE d.objid = format('%I', s.sequencename)::regclass AND d.deptype = 'i')
+  FROM pg_sequences s
+ WHERE s.schemaname = 'public'"""
+
+
+def backup_database(connect, directory, workers=4, compresslevel=3, progress=None):
+    """Back up the tables of the public schema in parallel from one consistent snapshot (replaces pg_dump)
+    - a coordinator transaction (REPEATABLE READ) exports its snapshot with pg_export_snapshot(), the worker
+      connections import it with SET TRANSACTION SNAPSHOT, so every table is dumped as of the same point in time
+    - workers take the tables largest first and stream them with COPY ... TO STDOUT into <table>.copy.gz
+    - columns, constraints, indexes and sequences are written to manifest.json for restore_database()
+    - progress(percent, text) is called from the worker threads; returns the manifest"""
+    start = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    coordinator = connect()
+    coordinator.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    try:
+        with coordinator.cursor() as cursor:
+            cursor.execute("SELECT pg_export_snapshot()")
+            snapshot = cursor.fetchone()[0]
+            cursor.execute(backup_catalog_sql)
+            tables = [{"name": f[0], "estimate": max(f[1], 0), "columns": f[2] or [], "constraints": f[3] or [],
+                       "indexes": f[4] or []} for f in cursor.fetchall()]
+            cursor.execute(backup_sequences_sql)
+            sequences = [{"name": f[0], "last_value": f[1], "start_value": f[2], "increment_by": f[3],
+                          "identity": f[4]} for f in cursor.fetchall()]
+
+        pending = queue.Queue()
+        for table in tables:
+            pending.put(table)
+        total = max(sum(f["estimate"] for f in tables), 1)
+        dumped = {}  # {table: rows}, updated by all workers
+        lock = threading.Lock()
+
+        def report(name, rows):
+            with lock:
+                dumped[name] = rows
+                if progress:
+                    count = sum(dumped.values())
+                    progress(min(count / total * 100, 99), f"{count} rows, {len(dumped)}/{len(tables)} tables")
+
+        def dump():
+            connection = connect()
+            connection.set_session(isolation_level="REPEATABLE READ", readonly=True)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot, ))
+                    while True:
+                        try:
+                            table = pending.get_nowait()
+                        except queue.Empty:
+                            return
+                        table["file"] = f"{table['name']}.copy.gz"
+                        path = os.path.join(directory, table["file"])
+                        with gzip.open(path, "wb", compresslevel=compresslevel) as file:
+                            sink = ExportSink(file, callback=lambda rows, name=table["name"]: report(name, rows))
+                            cursor.copy_expert(f'COPY "{table["name"]}" TO STDOUT', sink)
+                        table["rows"], table["bytes"] = cursor.rowcount, os.path.getsize(path)
+                        report(table["name"], sink.rows)
+            finally:
+                connection.close()
+
+        # the coordinator transaction stays open until all workers are done, the snapshot is only valid until then
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(dump) for _ in range(min(workers, len(tables)) or 1)]:
+                future.result()
+
+        manifest = {"database": coordinator.info.dbname, "server_version": coordinator.server_version,
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "snapshot": snapshot, "tables": tables,
+                    "sequences": sequences, "seconds": time.perf_counter() - start}
+    finally:
+        coordinator.rollback()
+        coordinator.close()
+
+    with open(os.path.join(directory, "manifest.json.tmp"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(directory, "manifest.json.tmp"), os.path.join(directory, "manifest.json"))
+    return manifest
+
+
+def column_definition(column):
+    """Column clause of CREATE TABLE from a column of the backup manifest"""
+    definition = f'"{column["name"]}" {column["type"]}'
+    if column["identity"] in ("a", "d"):
+        definition += f" GENERATED {'ALWAYS' if column['identity'] == 'a' else 'BY DEFAULT'} AS IDENTITY"
+    elif column["default"]:
+        definition += f" DEFAULT {column['default']}"
+    if column["not_null"]:
+        definition += " NOT NULL"
+    return definition
+
+
+def restore_database(connect, directory, workers=4, progress=None):
+    """Restore a backup of backup_database() into the (empty) database of connect
+    - sequences and tables are created first, the table files are then loaded in parallel with COPY FROM STDIN
+    - primary keys, unique/check constraints and indexes are created after loading (faster than maintaining them
+      row by row), in parallel per table; foreign keys and sequence values last
+    - progress(percent, text) is called from the worker threads; returns {"tables", "rows", "seconds"}"""
+    start = time.perf_counter()
+    with open(os.path.join(directory, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+    tables, sequences = manifest["tables"], manifest["sequences"]
+
+    def run(statements):
+        connection = connect()
+        try:
+            with connection.cursor() as cursor:
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+            connection.commit()
+        finally:
+            connection.close()
+
+    # structure
+    run([(f'CREATE SEQUENCE IF NOT EXISTS "{f["name"]}" INCREMENT BY %s START WITH %s',
+          (f["increment_by"], f["start_value"])) for f in sequences if not f["identity"]] +
+        [(f'CREATE TABLE "{f["name"]}" ({", ".join(column_definition(c) for c in f["columns"])})', None)
+         for f in tables])
+
+    # data
+    total = max(sum(f.get("rows", 0) for f in tables), 1)
+    loaded = {"rows": 0, "tables": 0}
+    lock = threading.Lock()
+
+    def load(table):
+        connection = connect()
+        try:
+            with gzip.open(os.path.join(directory, table["file"]), "rb") as file, connection.cursor() as cursor:
+                cursor.copy_expert(f'COPY "{table["name"]}" FROM STDIN', file)
+            connection.commit()
+        finally:
+            connection.close()
+        with lock:
+            loaded["rows"] += table.get("rows", 0)
+            loaded["tables"] += 1
+            if progress:
+                progress(min(loaded["rows"] / total * 90, 90), f"{loaded['rows']} rows, "
+                                                               f"{loaded['tables']}/{len(tables)} tables loaded")
+
+    def constraints(table, foreign):
+        statements = [(f'ALTER TABLE "{table["name"]}" ADD CONSTRAINT "{f["name"]}" {f["definition"]}', None)
+                      for f in sorted(table["constraints"], key=lambda f: "pucf".index(f["type"]))
+                      if (f["type"] == "f") == foreign]
+        if not foreign:
+            statements += [(f, None) for f in table["indexes"]]
+        run(statements)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(load, tables))
+        if progress:
+            progress(90, "Creating constraints and indexes ..")
+        list(pool.map(lambda table: constraints(table, foreign=False), tables))
+    for table in tables:
+        constraints(table, foreign=True)
+    run([("SELECT setval(%s, %s)", (f'"{f["name"]}"', f["last_value"])) for f in sequences
+         if f["last_value"] is not None])
+
+    return {"tables": len(tables), "rows": loaded["rows"], "seconds": time.perf_counter() - start}
+
+
+def render_table(columns, rows, sink, title=None, max_width=None, chunk_rows=1000):
+    """Write rows as text table (cells centered, separated by ' | ') to sink (anything with write(str): sys.stdout,
+    a file, io.StringIO, a widget wrapper)
+    - every cell is converted to str exactly once, column widths are computed from the converted cells
+    - cells longer than max_width are truncated with '..'
+    - lines are written in chunks of chunk_rows rows instead of one write per line
+    - title adds '*** start of title ***' / '*** end of title ***' lines; returns the number of rows written"""
+    def convert(value):
+        text = str(value)
+        if max_width and len(text) > max_width:
+            text = text[:max(max_width - 2, 1)] + ".."
+        return text
+
+    cells = [tuple(map(convert if max_width else str, row)) for row in rows]
+    widths = [len(f) for f in columns]
+    for idx in range(len(columns)):
+        widths[idx] = max(widths[idx], max((len(row[idx]) for row in cells), default=0))
+
+    def line(row):
+        return " | ".join([cell.center(width) for cell, width in zip(row, widths)])
+
+    separator_length = sum(widths) + (len(columns) - 1) * 3
+    frame_length = max(separator_length, 40)
+
+    head = []
+    if title:
+        head.append(f" start of {title} ".center(frame_length, "*"))
+    head.extend([line(columns), "-" * separator_length])
+    sink.write("\n".join(head) + "\n")
+
+    for start in range(0, len(cells), chunk_rows):
+        sink.write("\n".join(map(line, cells[start:start + chunk_rows])) + "\n")
+
+    if title:
+        sink.write(f" end of {title} ".center(frame_length, "*") + "\n")
+    return len(cells)
+
+
+def parse_value(text):
+    """CLI values: NULL becomes None, everything else is handed to the server as text literal"""
+    return None if text == "NULL" else text
+
+
+def main(argv=None):
+    """Command line interface of PSQLEngine"""
+    parser = argparse.ArgumentParser(description="Headless DatabaseAdmin PostgreSQL operations")
+    parser.add_argument("--config", default="config.ini", help="config file with a [postgresql] section")
+    parser.add_argument("--db", default=None, help="database (default: default database of the user)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("dbs", help="list databases")
+    commands.add_parser("tables", help="list tables")
+    fetch = commands.add_parser("fetch", help="print rows of a table as csv (or json lines)")
+    fetch.add_argument("table")
+    fetch.add_argument("--where", help="WHERE clause, use %%s for --param values")
+    fetch.add_argument("--param", action="append", default=[])
+    fetch.add_argument("--limit", type=int)
+    fetch.add_argument("--json", action="store_true", help="print json lines instead of csv")
+    export = commands.add_parser("export", help="stream a table to a .csv/.tsv(.gz) file via COPY")
+    export.add_argument("table")
+    export.add_argument("path")
+    export.add_argument("--where", help="WHERE clause")
+    export.add_argument("--tsv", action="store_true")
+    export.add_argument("--gzip", action="store_true")
+    insert = commands.add_parser("insert", help="insert a row, values in column order (NULL for null)")
+    insert.add_argument("table")
+    insert.add_argument("values", nargs="+")
+    update = commands.add_parser("update", help="update a row by primary key: column=value ...")
+    update.add_argument("table")
+    update.add_argument("pk")
+    update.add_argument("changes", nargs="+")
+    delete = commands.add_parser("delete", help="delete rows by primary key")
+    delete.add_argument("table")
+    delete.add_argument("pks", nargs="+")
+    create_db = commands.add_parser("create-db", help="create a database")
+    create_db.add_argument("name")
+    drop_db = commands.add_parser("drop-db", help="drop a database")
+    drop_db.add_argument("name")
+    create_table = commands.add_parser("create-table", help="run a CREATE TABLE statement")
+    create_table.add_argument("sql")
+    drop_table = commands.add_parser("drop-table", help="drop a table")
+    drop_table.add_argument("table")
+    sql = commands.add_parser("sql", help="run a statement, rows are printed as csv")
+    sql.add_argument("sql")
+    backup = commands.add_parser("backup", help="parallel snapshot backup of --db into a directory")
+    backup.add_argument("directory")
+    backup.add_argument("--workers", type=int, default=4)
+    restore = commands.add_parser("restore", help="restore a backup directory into the (new, empty) database --db")
+    restore.add_argument("directory")
+    restore.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    engine = PSQLEngine(config=args.config, verbose=False)
+    engine.open(args.db)
+    try:
+        if args.command == "dbs":
+            print("\n".join(engine.list_databases()))
+        elif args.command == "tables":
+            print("\n".join(engine.list_tables()))
+        elif args.command == "fetch":
+            columns, rows = engine.fetch(args.table, where=args.where, params=args.param, limit=args.limit)
+            if args.json:
+                for row in rows:
+                    print(json.dumps(dict(zip(columns, row)), default=str))
+            else:
+                writer = csv.writer(sys.stdout)
+                writer.writerow(columns)
+                writer.writerows(rows)
+        elif args.command == "export":
+            rows, size = engine.export(args.table, args.path, where=args.where, fmt="tsv" if args.tsv else "csv",
+                                       compress=args.gzip)
+            print(f"{rows} rows exported ({size / 1e6:.1f} MB)")
+        elif args.command == "insert":
+            print(f"{engine.insert(args.table, [parse_value(f) for f in args.values])} row(s) inserted")
+        elif args.command == "update":
+            changes = dict(f.split("=", 1) for f in args.changes)
+            count = engine.update(args.table, args.pk, {k: parse_value(v) for k, v in changes.items()})
+            print(f"{count} row(s) updated")
+        elif args.command == "delete":
+            print(f"{engine.delete(args.table, [parse_value(f) for f in args.pks])} row(s) deleted")
+        elif args.command == "create-db":
+            engine.create_database(args.name)
+        elif args.command == "drop-db":
+            engine.drop_database(args.name)
+        elif args.command == "create-table":
+            engine.create_table(args.sql)
+        elif args.command == "drop-table":
+            engine.drop_table(args.table)
+        elif args.command == "sql":
+            with engine.connection.cursor() as cursor:
+                cursor.execute(args.sql)
+                if cursor.description:
+                    writer = csv.writer(sys.stdout)
+                    writer.writerow([f[0] for f in cursor.description])
+                    writer.writerows(cursor.fetchall())
+                else:
+                    print(f"{cursor.statusmessage}")
+            engine.connection.commit()
+        elif args.command == "backup":
+            manifest = backup_database(engine.connect, args.directory, workers=args.workers)
+            print(f"{sum(f['rows'] for f in manifest['tables'])} rows of {len(manifest['tables'])} tables backed up "
+                  f"in {manifest['seconds']:.1f} s")
+        elif args.command == "restore":
+            result = restore_database(engine.connect, args.directory, workers=args.workers)
+            print(f"{result['rows']} rows of {result['tables']} tables restored in {result['seconds']:.1f} s")
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
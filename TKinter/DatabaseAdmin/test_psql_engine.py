@@ -0,0 +1,45 @@
+"""
+Tests of PSQLEngine against a PostgreSQL server, configured with a config.ini ([postgresql] section)
+    DBADMIN_TEST_CONFIG=/path/to/config.ini python -m pytest test_psql_engine.py
+"""
+import os
+import uuid
+
+import pytest
+
+from psql_engine import PSQLEngine, main
+
+config = os.environ.get("DBADMIN_TEST_CONFIG")
+pytestmark = pytest.mark.skipif(not config, reason="DBADMIN_TEST_CONFIG is not set")
+
+
+@pytest.fixture
+def engine():
+    engine = PSQLEngine(config=config, verbose=False)
+    engine.open()
+    yield engine
+    engine.connection.rollback()
+    engine.drop_table("test_keys")
+    engine.close()
+
+
+def test_cli_delete_integer_keys(engine, capsys):
+    engine.create_table('CREATE TABLE "test_keys" (id integer PRIMARY KEY, name text)')
+    for key in range(1, 5):
+        engine.insert("test_keys", [key, f"row {key}"])
+    engine.connection.rollback()  # end the read transaction of the engine, the CLI uses its own connection
+
+    main(["--config", config, "--db", engine.connection.info.dbname, "delete", "test_keys", "3"])
+    main(["--config", config, "--db", engine.connection.info.dbname, "delete", "test_keys", "1", "4"])
+    assert capsys.readouterr().out.splitlines() == ["1 row(s) deleted", "2 row(s) deleted"]
+    assert [f[0] for f in engine.query('SELECT id FROM "test_keys"')] == [2]
+
+
+def test_uuid_keys_as_str(engine):
+    keys = [uuid.uuid4() for _ in range(3)]
+    engine.create_table('CREATE TABLE "test_keys" (id uuid PRIMARY KEY)')
+    for key in keys:
+        engine.insert("test_keys", [str(key)])
+    assert len(engine.fetch_by_keys("test_keys", [str(keys[0]), str(keys[1])])) == 2
+    assert engine.delete("test_keys", [str(keys[0])]) == 1
+    assert engine.delete("test_keys", [str(keys[1]), str(keys[2])]) == 2  # same prepared statement
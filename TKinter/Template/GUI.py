@@ -19,6 +19,10 @@ import sys
 import getpass
 import random
 import time
+import threading
+import mmap
+import re
+from collections.abc import MutableMapping
 from concurrent.futures import ThreadPoolExecutor
 import platform
 if platform.system() == "Windows":
@@ -164,6 +168,646 @@ class RCListbox(Listbox):
             print(f"You selected index {index} with the value {data}")
 
 
+class LazyJsonDocument(MutableMapping):
+    """Top-level json object of a (large) file whose values are only parsed when accessed
+    - the file is memory-mapped and scanned once for the byte offsets of the top-level values (index), only
+      strings and brackets are matched, so large number lists are skipped quickly
+    - content[key] parses the value (json.loads of its bytes) and keeps it; edited values are kept in memory too
+    - dump() writes the document, values which were never parsed are copied byte for byte from the mapped file
+    """
+    token_pattern = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+    colon_pattern = re.compile(rb'\s*:')
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()  # mapped file access, the file is replaced in the background (JsonWriter)
+        self.values = {}  # parsed or edited values
+        self.index = {}  # key: (start, end) offsets of the raw value, None for keys added at runtime
+        self.file = None
+        self.mmap = None
+        self.open()
+
+    def open(self):
+        """Map the file and build the index of the top-level values"""
+        start = time.perf_counter()
+        self.file = open(self.path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        index = self.scan()
+        # keep keys added at runtime (not written yet)
+        self.index = {**index, **{k: None for k, v in self.index.items() if v is None and k in self.values}}
+        print(f"Indexed {len(self.index)} keys of {self.path} ({len(self.mmap) / 1e6:.1f} MB) in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def close(self):
+        if self.mmap:
+            self.mmap.close()
+            self.file.close()
+            self.mmap, self.file = None, None
+
+    def scan(self):
+        """Offsets of the top-level values, raises ValueError if the file is not a json object"""
+        data = self.mmap
+        first = re.compile(rb"\s*\{").match(data)
+        if not first:
+            raise ValueError(f"{self.path} does not contain a json object")
+
+        index, depth, key, value_start = {}, 0, None, None
+        for match in self.token_pattern.finditer(data, first.end() - 1):
+            token = match.group()
+            if token in (b"{", b"["):
+                depth += 1
+            elif token in (b"}", b"]"):
+                depth -= 1
+                if depth == 0:  # end of the document
+                    if key is not None:
+                        index[key] = (value_start, match.start())
+                    return index
+            elif depth == 1:
+                colon = self.colon_pattern.match(data, match.end())
+                if colon:  # a string followed by a colon is a key, the previous value ends at the last comma
+                    if key is not None:
+                        index[key] = (value_start, data.rfind(b",", value_start, match.start()))
+                    key, value_start = json.loads(token), colon.end()
+        raise ValueError(f"{self.path} is not complete")
+
+    def raw(self, key):
+        """Bytes of the value of key in the file; the offsets are read under the lock, replace_file() swaps the
+        mapping and the index together"""
+        with self.lock:
+            start, end = self.index[key]
+            return self.mmap[start:end]
+
+    def is_loaded(self, key):
+        return key in self.values
+
+    def value_size(self, key):
+        """Size of the value of key in the file in bytes (0 for keys added at runtime)"""
+        offsets = self.index[key]
+        return offsets[1] - offsets[0] if offsets else 0
+
+    def __getitem__(self, key):
+        if key not in self.values:
+            self.values[key] = json.loads(self.raw(key))
+        return self.values[key]
+
+    def __setitem__(self, key, value):
+        self.values[key] = value
+        self.index.setdefault(key, None)
+
+    def __delitem__(self, key):
+        del self.index[key]
+        self.values.pop(key, None)
+
+    def __iter__(self):
+        return iter(list(self.index))
+
+    def __len__(self):
+        return len(self.index)
+
+    def dump(self, f):
+        """Write the document like json.dump(indent=4) to the text file f"""
+        f.write("{")
+        for i, key in enumerate(self):
+            if key in self.values:
+                value = json.dumps(self.values[key], ensure_ascii=False, indent=4).replace("\n", "\n    ")
+            else:
+                value = self.raw(key).decode("utf-8").strip()
+            f.write(("," if i else "") + f"\n    {json.dumps(key, ensure_ascii=False)}: {value}")
+        f.write("\n}")
+
+    def replace_file(self, tmp_path):
+        """Replace the mapped file by tmp_path (written with dump) and index it again"""
+        with self.lock:
+            self.close()
+            os.replace(tmp_path, self.path)
+            self.open()
+
+
+def format_path(path):
+    """Readable path of a json value, e.g. ('someNestedList', 1, 0) > someNestedList[1][0]"""
+    return f"{path[0]}" + "".join(f"[{p!r}]" if isinstance(p, str) else f"[{p}]" for p in path[1:])
+
+
+def diff_json(old, new, path=()):
+    """Differences between two json trees as list of (operation, path), operation is "add", "remove" or "change"
+    - only the smallest differing subtrees are reported, a change of type (e.g. list > number) is a "change" of
+      the whole value"""
+    if type(old) is not type(new):
+        return [("change", path)]
+    if isinstance(old, dict):
+        changes = [("remove", path + (k, )) for k in old if k not in new]
+        changes += [("add", path + (k, )) for k in new if k not in old]
+        for k in old:
+            if k in new:
+                changes += diff_json(old[k], new[k], path + (k, ))
+        return changes
+    if isinstance(old, list):
+        changes = []
+        for i in range(min(len(old), len(new))):
+            changes += diff_json(old[i], new[i], path + (i, ))
+        changes += [("remove", path + (i, )) for i in range(len(new), len(old))]
+        changes += [("add", path + (i, )) for i in range(len(old), len(new))]
+        return changes
+    return [] if old == new else [("change", path)]
+
+
+def json_get(content, path):
+    """Value at path (tuple of keys and indices) in content"""
+    for key in path:
+        content = content[key]
+    return content
+
+
+def json_path_exists(content, path):
+    """True if path (tuple of keys and indices) exists in content"""
+    for key in path:
+        if isinstance(content, dict) and key in content:
+            content = content[key]
+        elif isinstance(content, list) and isinstance(key, int) and key < len(content):
+            content = content[key]
+        else:
+            return False
+    return True
+
+
+class JsonModel(object):
+    """Row model of a json document for VirtualJsonEditor
+    - the document is flattened into rows; a row has a label, a depth and cells, a cell is the path (tuple of
+      keys and indices) of a single value. Lists of single values are split into rows of up to columns cells
+    - dicts and lists which need more than one row get a header row and can be collapsed (self.collapsed)
+    - values are changed in place (set), so content is always the edited document
+    - drafts holds typed but not yet committed cell text (path: text), so edits survive scrolling
+    - top-level values of a LazyJsonDocument bigger than lazy_bytes are shown as collapsed headers without being
+      parsed, expanding them parses the value
+    """
+
+    def __init__(self, content, columns=8, lazy_bytes=1024):
+        self.content = content
+        self.columns = columns
+        self.lazy_bytes = lazy_bytes
+        self.collapsed = set()
+        self.drafts = {}
+        self.rows = []
+        self.flatten()
+
+    def flatten(self):
+        """(Re)build self.rows from content, skipping children of collapsed headers"""
+        rows = []
+        for key in self.content:
+            if self.is_lazy(key):
+                rows.append({"label": str(key), "depth": 0, "path": (key, ), "cells": [], "header": True,
+                             "size": None, "bytes": self.content.value_size(key), "expanded": False})
+            else:
+                self._flatten(rows, self.content[key], (key, ), str(key), 0)
+        self.rows = rows
+
+    def is_lazy(self, key):
+        """True if the top-level value of key is not parsed yet (and too big to parse while flattening)"""
+        return isinstance(self.content, LazyJsonDocument) and not self.content.is_loaded(key) and \
+            self.content.value_size(key) > self.lazy_bytes
+
+    def _flatten(self, rows, value, path, label, depth):
+        if not isinstance(value, (list, dict)):
+            rows.append({"label": label, "depth": depth, "path": path, "cells": [path]})
+            return
+
+        single_values = isinstance(value, list) and not any(isinstance(f, (list, dict)) for f in value)
+        if single_values and len(value) <= self.columns:
+            rows.append({"label": label, "depth": depth, "path": path,
+                         "cells": [path + (i, ) for i in range(len(value))]})
+            return
+
+        expanded = path not in self.collapsed
+        rows.append({"label": label, "depth": depth, "path": path, "cells": [], "header": True,
+                     "size": len(value), "expanded": expanded})
+        if not expanded:
+            return
+        if single_values:
+            for start in range(0, len(value), self.columns):
+                end = min(start + self.columns, len(value))
+                rows.append({"label": f"[{start}:{end}]", "depth": depth + 1, "path": path,
+                             "cells": [path + (i, ) for i in range(start, end)]})
+        else:
+            for key, child in (value.items() if isinstance(value, dict) else enumerate(value)):
+                self._flatten(rows, child, path + (key, ), str(key) if isinstance(value, dict) else f"[{key}]",
+                              depth + 1)
+
+    def update(self, content):
+        """Replace the document by content (e.g. after reloading the file), returns the changes (see diff_json)
+        - rows are only rebuilt if the structure changed, collapsed headers are kept if they still exist and
+          drafts of changed values are dropped (the new value wins)"""
+        changes = diff_json(self.content, content)
+        structural = any(op != "change" or isinstance(self.get(path), (list, dict)) or
+                         isinstance(json_get(content, path), (list, dict)) for op, path in changes)
+        self.content = content
+        for op, path in changes:
+            for draft in [f for f in self.drafts if f[:len(path)] == path]:
+                del self.drafts[draft]
+        self.collapsed = {f for f in self.collapsed if json_path_exists(content, f)}
+        if structural:
+            self.flatten()
+        return changes
+
+    def toggle(self, path):
+        """Collapse or expand the header at path (parses not yet loaded values)"""
+        if len(path) == 1 and self.is_lazy(path[0]):
+            self.content[path[0]]
+            self.collapsed.discard(path)
+        else:
+            self.collapsed.symmetric_difference_update({path})
+        self.flatten()
+
+    def get(self, path):
+        return json_get(self.content, path)
+
+    def set(self, path, value):
+        """Set the value at path, returns the previous value"""
+        parent = self.get(path[:-1])
+        old_value, parent[path[-1]] = parent[path[-1]], value
+        return old_value
+
+    def convert(self, path, text):
+        """Convert cell text to the type of the current value at path, raises ValueError"""
+        old_value = self.get(path)
+        if isinstance(old_value, bool):  # checked first, bool is a subclass of int
+            if text.strip().lower() not in ("true", "false", "1", "0"):
+                raise ValueError(f"{text} is not a boolean")
+            return text.strip().lower() in ("true", "1")
+        elif isinstance(old_value, int):
+            return int(text)
+        elif isinstance(old_value, float):
+            return float(text)
+        elif isinstance(old_value, str):
+            return text
+        return json.loads(text)
+
+    @staticmethod
+    def display(value):
+        """Cell text of a value"""
+        return value if isinstance(value, str) else str(value) if isinstance(value, (int, float)) else \
+            json.dumps(value)
+
+
+class VirtualJsonEditor(Frame):
+    """Editor for a JsonModel which only has widgets for visible_rows rows
+    - the row widgets (label, columns entries, checkbutton) are created once and reused on scroll, scrolling
+      only changes which model rows they show
+    - <Return> in an entry (or clicking a checkbutton) commits the value: on_change(path, old_value, new_value)
+      is called after the model was changed, on_invalid(path, text, error) if the text can not be converted
+    - clicking the label of a header row collapses/expands it
+    - the widgets are only reconfigured if what they show changed (self.updates counts reconfigured widgets), so
+      update() with a reloaded document only touches the changed values
+    """
+
+    def __init__(self, parent, on_change, on_invalid=None, visible_rows=25, columns=8, cell_width=14,
+                 label_width=30, font_bold=None):
+        Frame.__init__(self, parent)
+        self.model = None
+        self.top = 0  # index of the first visible model row
+        self.updates = 0  # number of reconfigured widgets
+        self.on_change = on_change
+        self.on_invalid = on_invalid
+        self.colors = {"Red": "red", "Green": "green", "Blue": "blue"}  # color coded top-level keys
+
+        self.scrollbar = Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=0, column=1, rowspan=visible_rows, sticky="ns")
+        self.pool = []
+        for i in range(visible_rows):
+            # what the widgets currently show, compared in show() to skip unchanged widgets
+            widgets = {"frame": Frame(self), "cells": [], "check_shown": False, "visible": True, "label_shown": None,
+                       "check_value": None, "entries_shown": columns}
+            widgets["label"] = Label(widgets["frame"], width=label_width, font=font_bold)
+            widgets["label"].grid(row=0, column=0, padx=2, sticky="w")
+            widgets["label"].bind("<Button-1>", partial(self.toggle, i))
+            widgets["entries"] = [Entry(widgets["frame"], width=cell_width) for _ in range(columns)]
+            for j, entry in enumerate(widgets["entries"]):
+                entry.grid(row=0, column=j + 1, padx=2, pady=1)
+                entry.bind("<Return>", partial(self.commit, i, j))
+            widgets["boolvar"] = BooleanVar(value=False)
+            widgets["check"] = Checkbutton(widgets["frame"], variable=widgets["boolvar"],
+                                           command=partial(self.commit_bool, i))
+            for widget in [widgets["frame"], widgets["label"], widgets["check"]] + widgets["entries"]:
+                widget.bind("<MouseWheel>", self._on_mousewheel)
+                widget.bind("<Button-4>", self._on_mousewheel)
+                widget.bind("<Button-5>", self._on_mousewheel)
+            widgets["frame"].grid(row=i, column=0, sticky="w")
+            self.pool.append(widgets)
+
+    def load(self, model):
+        """Show model from the top"""
+        self.model = model
+        self.top = 0
+        for widgets in self.pool:  # cells of the previous model
+            widgets["cells"], widgets["check_shown"] = [], False
+        self.updates = 0
+        self.refresh()
+
+    def update(self, content):
+        """Show a new version of the document (see JsonModel.update), keeps the scroll position; returns the
+        changes"""
+        self.save_drafts()
+        changes = self.model.update(content)
+        for widgets in self.pool:  # paths and text of the previous content, must not be saved as drafts again
+            widgets["cells"] = []
+        self.updates = 0
+        self.refresh()
+        return changes
+
+    def refresh(self):
+        """Show the model rows from self.top in the pooled row widgets"""
+        if not self.model:
+            return
+        self.save_drafts()
+        rows = self.model.rows
+        self.top = max(0, min(self.top, len(rows) - len(self.pool)))
+        for i, widgets in enumerate(self.pool):
+            if self.top + i < len(rows):
+                self.show(widgets, rows[self.top + i])
+            elif widgets["visible"]:
+                widgets["cells"], widgets["visible"] = [], False
+                widgets["frame"].grid_remove()
+                self.updates += 1
+        if rows:
+            self.scrollbar.set(self.top / len(rows), min(self.top + len(self.pool), len(rows)) / len(rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def show(self, widgets, row):
+        """Configure the widgets of one pooled row for a model row"""
+        widgets["cells"] = row["cells"]
+        text = "  " * row["depth"] + row["label"]
+        if row.get("header"):
+            text = "  " * row["depth"] + ("\u25BE " if row["expanded"] else "\u25B8 ") + row["label"] + \
+                   ("" if row["expanded"] else f" ({row['size']} items)" if row["size"] is not None else
+                    f" (not loaded, {row['bytes'] / 1e3:.1f} kB)")
+        color = next((v for k, v in self.colors.items() if k in str(row["path"][0])), "")
+
+        # single boolean: checkbutton instead of entry
+        values = [self.model.get(f) for f in row["cells"]]
+        check_shown = len(values) == 1 and isinstance(values[0], bool)
+        entries = 0 if check_shown else len(values)
+
+        if not widgets["visible"]:
+            widgets["frame"].grid()
+            widgets["visible"] = True
+            self.updates += 1
+        if widgets["label_shown"] != (text, color):
+            widgets["label"].config(text=text, foreground=color)
+            widgets["label_shown"] = (text, color)
+            self.updates += 1
+        if check_shown and widgets["check_value"] is None:
+            widgets["check"].grid(row=0, column=1, padx=2, pady=1, sticky="w")
+            self.updates += 1
+        elif not check_shown and widgets["check_value"] is not None:
+            widgets["check"].grid_remove()
+            self.updates += 1
+        if check_shown and widgets["boolvar"].get() != values[0]:
+            widgets["boolvar"].set(values[0])
+            self.updates += 1
+        widgets["check_shown"], widgets["check_value"] = check_shown, values[0] if check_shown else None
+
+        for j, entry in enumerate(widgets["entries"]):
+            if j >= entries:
+                if j < widgets["entries_shown"]:
+                    entry.grid_remove()
+                    self.updates += 1
+                continue
+            if j >= widgets["entries_shown"]:
+                entry.grid()
+                self.updates += 1
+            cell_text = self.model.drafts.get(row["cells"][j], self.model.display(values[j]))
+            if entry.get() != cell_text:
+                entry.delete(0, "end")
+                entry.insert(0, cell_text)
+                self.updates += 1
+        widgets["entries_shown"] = entries
+
+    def save_drafts(self):
+        """Keep changed but not committed text of the visible entries in model.drafts"""
+        for widgets in self.pool:
+            if widgets["check_shown"]:
+                continue
+            for path, entry in zip(widgets["cells"], widgets["entries"]):
+                if entry.get() != self.model.display(self.model.get(path)):
+                    self.model.drafts[path] = entry.get()
+                else:
+                    self.model.drafts.pop(path, None)
+
+    def yview(self, *args):
+        """Scrollbar command ("moveto", fraction) or ("scroll", number, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.model.rows)) if self.model else 0)
+        elif args[0] == "scroll":
+            self.scroll_to(self.top + int(args[1]) * (len(self.pool) if args[2] == "pages" else 1))
+
+    def scroll_to(self, top):
+        if self.model and top != self.top:
+            self.top = top
+            self.refresh()
+
+    def _on_mousewheel(self, event):
+        """Scroll the editor instead of the tab canvas"""
+        self.scroll_to(self.top + (-3 if event.num == 4 or event.delta > 0 else 3))
+        return "break"
+
+    def toggle(self, i, event=None):
+        """Collapse/expand the header shown in pooled row i"""
+        row_index = self.top + i
+        if self.model and row_index < len(self.model.rows) and self.model.rows[row_index].get("header"):
+            self.save_drafts()
+            self.model.toggle(self.model.rows[row_index]["path"])
+            self.refresh()
+
+    def commit(self, i, j, event=None):
+        """Commit the text of entry j of pooled row i"""
+        path = self.pool[i]["cells"][j]
+        text = self.pool[i]["entries"][j].get()
+        try:
+            new_value = self.model.convert(path, text)
+        except ValueError as e:
+            if self.on_invalid:
+                self.on_invalid(path, text, e)
+            return
+        self.model.drafts.pop(path, None)
+        old_value = self.model.set(path, new_value)
+        self.refresh()
+        self.on_change(path, old_value, new_value)
+
+    def commit_bool(self, i):
+        """Commit the checkbutton of pooled row i"""
+        path = self.pool[i]["cells"][0]
+        new_value = self.pool[i]["boolvar"].get()
+        old_value = self.model.set(path, new_value)
+        self.on_change(path, old_value, new_value)
+
+
+def json_pointer(path):
+    """JSON Pointer (RFC 6901) of a path, e.g. ('someNestedList', 1, 0) > /someNestedList/1/0"""
+    return "".join("/" + str(p).replace("~", "~0").replace("/", "~1") for p in path)
+
+
+def apply_json_patch(content, operations):
+    """Apply JSON Patch (RFC 6902) operations "replace", "add" and "remove" to content in place"""
+    for operation in operations:
+        keys = [f.replace("~1", "/").replace("~0", "~") for f in operation["path"].split("/")[1:]]
+        parent = content
+        for key in keys[:-1]:
+            parent = parent[int(key) if isinstance(parent, list) else key]
+        key = keys[-1]
+        if isinstance(parent, list):
+            key = len(parent) if key == "-" else int(key)
+        if operation["op"] == "replace":
+            parent[key] = operation["value"]
+        elif operation["op"] == "add":
+            parent.insert(key, operation["value"]) if isinstance(parent, list) else \
+                parent.__setitem__(key, operation["value"])
+        elif operation["op"] == "remove":
+            del parent[key]
+        else:
+            raise ValueError(f"Unsupported JSON Patch operation {operation['op']}")
+    return content
+
+
+def write_json_atomic(path, content):
+    """Write content to a temporary file next to path and replace path with it, so path is never half written"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if isinstance(content, LazyJsonDocument):
+            content.dump(f)
+        else:
+            json.dump(content, f, ensure_ascii=False, indent=4, separators=None)
+        f.flush()
+        os.fsync(f.fileno())
+    if isinstance(content, LazyJsonDocument) and os.path.abspath(content.path) == os.path.abspath(path):
+        content.replace_file(tmp_path)  # remaps the file (a mapped file can not be replaced on Windows)
+    else:
+        os.replace(tmp_path, path)
+
+
+class JsonWriter(object):
+    """Debounced, atomic json persistence in the background
+    - schedule() is called for every edit; the file is written once no edit came in for delay ms, so a burst of
+      edits results in one write
+    - files are written in the executor via write_json_atomic (temp file + os.replace), one write at a time
+    - files of at least journal_min_bytes (0: never) and lazily loaded files (LazyJsonDocument) are not
+      rewritten per edit: the edits are appended as
+      JSON Patch operations (one per line) to <file>.journal, which is merged into the file (compacted) once it
+      exceeds compact_ratio of the file size; loading has to apply the journal (see apply_json_patch)
+    - edits only replace single values in place while a write may be running in the background, the following
+      write (scheduled by that edit) contains the new value in any case
+    - failed writes are reported with on_error(message) on the Tk thread; the next write rewrites the whole file,
+      so no edit of the failed write is lost
+    """
+
+    def __init__(self, widget, executor, delay=500, journal_min_bytes=0, compact_ratio=0.1, on_error=print):
+        self.widget = widget  # for after()
+        self.on_error = on_error
+        self.executor = executor
+        self.delay = delay
+        self.journal_min_bytes = journal_min_bytes
+        self.compact_ratio = compact_ratio
+        self.lock = threading.Lock()
+        self.timer = None
+        self.path = None
+        self.content = None
+        self.operations = []  # JSON Patch operations since the last write
+        self.future = None
+        self.rewrite = False  # set after a failed write
+
+    def schedule(self, path, content, changed_path=None, value=None):
+        """Write content to path after delay ms without further calls; changed_path/value describe the edit for
+        the journal (without, the whole file is rewritten)"""
+        if self.path is not None and path != self.path:
+            self.close()
+        self.path, self.content = path, content
+        self.operations.append({"op": "replace", "path": json_pointer(changed_path), "value": value}
+                               if changed_path else None)
+        if self.timer:
+            self.widget.after_cancel(self.timer)
+        self.timer = self.widget.after(self.delay, self.flush)
+
+    def flush(self):
+        """Hand the pending write over to the executor (Tk thread); while the previous write is still running the
+        timer is re-armed, so writes (and journal appends) never overlap or run out of order"""
+        self.timer = None
+        if self.path is None:
+            return
+        if self.future is not None:
+            if not self.future.done():
+                self.timer = self.widget.after(self.delay, self.flush)
+                return
+            self.result()  # report a failure before the future is replaced
+        path, content, operations = self.take_pending()
+        self.future = self.executor.submit(self.write, path, content, operations)
+        self.widget.after(100, self.poll)
+
+    def take_pending(self):
+        """Pending (path, content, operations), afterwards nothing is pending"""
+        operations = self.operations + ([None] if self.rewrite else [])
+        pending = self.path, self.content, operations
+        self.path, self.content, self.operations, self.rewrite = None, None, [], False
+        return pending
+
+    def poll(self):
+        """Wait for the background write without blocking and report its failure (Tk thread)"""
+        if self.future is None:
+            return
+        if not self.future.done():
+            self.widget.after(100, self.poll)
+            return
+        self.result()
+
+    def result(self):
+        """Wait for the last background write, report a failure via on_error; never raises"""
+        future, self.future = self.future, None
+        if future is None:
+            return
+        try:
+            future.result()
+        except Exception as e:
+            self.on_error(f"Writing json failed: {e}")
+
+    def close(self):
+        """Write pending edits immediately and wait for running writes (e.g. before exit or loading another
+        file); failures are reported via on_error, never raised"""
+        if self.timer:
+            self.widget.after_cancel(self.timer)
+            self.timer = None
+        self.result()
+        if self.path is not None:
+            try:
+                self.write(*self.take_pending())
+            except Exception as e:
+                self.on_error(f"Writing json failed: {e}")
+
+    def write(self, path, content, operations):
+        """Write path (journal or whole file), runs in the executor"""
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                journal = f"{path}.journal"
+                size = os.path.getsize(path) if os.path.isfile(path) else 0
+                large = (self.journal_min_bytes and size >= self.journal_min_bytes) or \
+                    isinstance(content, LazyJsonDocument)
+                if large and None not in operations:
+                    with open(journal, "a", encoding="utf-8") as f:
+                        f.write("".join(json.dumps(op, ensure_ascii=False) + "\n" for op in operations))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    if os.path.getsize(journal) < size * self.compact_ratio:
+                        print(f"Appended {len(operations)} change(s) to {journal} "
+                              f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+                        return
+                write_json_atomic(path, content)
+                if os.path.isfile(journal):
+                    os.remove(journal)  # merged into the file
+                print(f"Wrote {path} ({len(operations)} change(s), {(time.perf_counter() - start) * 1000:.1f} ms)")
+        except Exception as e:
+            print(f"Writing {path} failed: {e}")
+            self.rewrite = True
+            raise
+
+
 def create_tooltip(widget, text):
     """
     Create tooltip for any widget.
@@ -186,7 +830,8 @@ def create_tooltip(widget, text):
 
 
 def restart_ui(obj):
-    """Restart the application. Runtime environment is lost!"""
+    """Restart the application. Runtime environment is lost (pending json edits are written first)!"""
+    obj.json_writer.close()
     python = sys.executable
     os.execl(python, python, *sys.argv)
 
@@ -207,6 +852,7 @@ class UI(ThemedTk):
 
     def __init__(self):
         global btn, lbl, ent, frm, var, oth, env
+        startup = time.perf_counter()
 
         # threadpool executor
         self.executor = ThreadPoolExecutor(max_workers=4)
@@ -215,6 +861,12 @@ class UI(ThemedTk):
         self.cfg = ConfigParser()
         self.cfg.read("config.ini")
 
+        # json persistence (debounced, atomic, in the executor)
+        self.json_writer = JsonWriter(self, self.executor,
+                                      delay=int(self.cfg["json"].get("json_write_delay", "500")),
+                                      journal_min_bytes=int(float(self.cfg["json"].get("json_journal_mb", "0")) * 1e6),
+                                      on_error=lambda message: self.change_status(message, error=True))
+
         ThemedTk.__init__(self, theme=self.cfg["style"]["theme"])
 
         # perform firstrun-check
@@ -222,8 +874,8 @@ class UI(ThemedTk):
 
         # define class-wide variables
         self.current_tab = None  # current tab name (e.g. "Json")
-        self.cal_widgets = None  # list with empty dict for each entry in file.json for widgets (Calibration tab)
-        self.tab_widgets = []  # contains canvas, scrollbars and frames of tabs
+        self.tab_widgets = {}  # contains canvas, scrollbars and frames of built tabs (key: widget path of tab frame)
+        self.tabs = {}  # tab name: {"frame", "builder", "built", "seconds"}, see add_tab()
 
         # set font
         self.default_font = font.nametofont("TkDefaultFont")
@@ -270,6 +922,9 @@ class UI(ThemedTk):
         # build menu bar
         self.build_menu()
 
+        # write pending json edits when the window is closed
+        self.protocol("WM_DELETE_WINDOW", self.exit_ui)
+
         # build bottom status bar & progress indicator
         self.status_bar = Frame(self)
         self.status_bar.pack(side="bottom", fill="x")
@@ -284,19 +939,14 @@ class UI(ThemedTk):
         self.tab_root.columnconfigure(0, weight=1)
         self.tab_root.bind("<<NotebookTabChanged>>", self.callback_tab_changed)
 
-        # build notebook & tabs
-        self.tab_database = Frame(self.tab_root, style="Black.TLabel", relief="sunken", borderwidth=2)  # Database
-        self.tab_json = Frame(self.tab_root, style="Black.TLabel", relief="sunken", borderwidth=2)  # Json
-        self.tab_debug = Frame(self.tab_root, style="Black.TLabel", relief="sunken", borderwidth=2)  # Debug
-        self.tab_root.add(self.tab_database, text="Database")
-        self.tab_root.add(self.tab_json, text="Json")
-        self.tab_root.add(self.tab_debug, text="Debug")
+        # build notebook & tabs (content is built by the builder on first selection, see callback_tab_changed)
+        self.tab_database = self.add_tab("Database", self.build_database_ui)
+        self.tab_json = self.add_tab("Json", self.build_json_ui)
+        self.tab_debug = self.add_tab("Debug", self.build_debug_ui)
         self.tab_root.pack(expand=1, fill="both")
 
-        # build uis for different tabs
-        self.build_database_ui()
-        self.build_json_ui()
-        self.build_debug_ui()
+        # build ui of the visible tab only
+        self.build_tab(self.tab_root.tab("current")["text"])
 
         # get console
         if platform.system() == "Windows":
@@ -304,6 +954,10 @@ class UI(ThemedTk):
             if self.cfg["general"]["console"] == "False":
                 self.hide_console(overwrite=False)
 
+        # startup time until the window is drawn (idle)
+        self.startup_seconds = None
+        self.after_idle(self.log_startup_time, startup)
+
     # *************************************************************************************************************** *
     # *************************************************************************************************************** *
     # ****************************************** UI BUILDING STARTS HERE ******************************************** *
@@ -313,6 +967,43 @@ class UI(ThemedTk):
     # ############################################################################################################### #
     # ########################################## TOP MENU ########################################################### #
     # ############################################################################################################### #
+    def add_tab(self, name, builder):
+        """Add an empty tab to the notebook; its content is built by builder() when the tab is selected the first
+        time (see build_tab)
+
+        Parameters
+        ----------
+        name : string
+            Text of the tab, used as key in self.tabs
+        builder : function
+            Builds the tab content into the returned frame, usually via build_scrollable_frame(frame)
+
+        Returns
+        -------
+        frame : tk.Frame"""
+        frame = Frame(self.tab_root, style="Black.TLabel", relief="sunken", borderwidth=2)
+        self.tab_root.add(frame, text=name)
+        self.tabs[name] = {"frame": frame, "builder": builder, "built": False, "seconds": None}
+        return frame
+
+    def build_tab(self, name):
+        """Run the builder of tab name if it was not built yet, build time is logged
+
+        Returns
+        -------
+        built : bool
+            True if the tab was built by this call"""
+        tab = self.tabs.get(name)
+        if not tab or tab["built"]:
+            return False
+
+        start = time.perf_counter()
+        tab["built"] = True
+        tab["builder"]()
+        tab["seconds"] = time.perf_counter() - start
+        print(f"Built tab {name} in {tab['seconds'] * 1000:.1f} ms")
+        return True
+
     def build_scrollable_frame(self, root_frame):
         """Builds a scrollable frame. Utilizes AutoScrollbar class.
 
@@ -340,54 +1031,57 @@ class UI(ThemedTk):
 
         # # inner function
         def _on_mousewheel(event):
-            tab_index = self.tab_root.index(self.tab_root.select())  # index of currently selected tab
-            self.tab_widgets[tab_index]["canvas"].yview_scroll(int(-1 * (event.delta / 120)), "units")
+            widgets = self.tab_widgets.get(self.tab_root.select())  # widgets of currently selected tab
+            if widgets:
+                widgets["canvas"].yview_scroll(int(-1 * (event.delta / 120)), "units")
 
         # define rootframe
         root = root_frame
 
-        # append dict to tab_widgets to store widgets
-        self.tab_widgets.append({})
+        # add dict to tab_widgets to store widgets (tabs are built in order of selection, so keyed by tab frame)
+        self.tab_widgets[str(root)] = {}
+        widgets = self.tab_widgets[str(root)]
 
         # create autoscrollbars
-        self.tab_widgets[-1]["vert_scrollbar"] = AutoScrollbar(root)
-        self.tab_widgets[-1]["vert_scrollbar"].grid(row=0, column=1, sticky="ns")
-        self.tab_widgets[-1]["hor_scrollbar"] = AutoScrollbar(root, orient="horizontal")
-        self.tab_widgets[-1]["hor_scrollbar"].grid(row=1, column=0, sticky="ew")
+        widgets["vert_scrollbar"] = AutoScrollbar(root)
+        widgets["vert_scrollbar"].grid(row=0, column=1, sticky="ns")
+        widgets["hor_scrollbar"] = AutoScrollbar(root, orient="horizontal")
+        widgets["hor_scrollbar"].grid(row=1, column=0, sticky="ew")
 
         # create scrolled canvas (highlightthickness removes white border, bg sets color to current theme background)
-        self.tab_widgets[-1]["canvas"] = Canvas(root,
-                                                yscrollcommand=self.tab_widgets[-1]["vert_scrollbar"].set,
-                                                xscrollcommand=self.tab_widgets[-1]["hor_scrollbar"].set,
+        widgets["canvas"] = Canvas(root,
+                                                yscrollcommand=widgets["vert_scrollbar"].set,
+                                                xscrollcommand=widgets["hor_scrollbar"].set,
                                                 bg=self._get_bg_color(),
                                                 highlightthickness=0)
-        self.tab_widgets[-1]["canvas"].grid(row=0, column=0, sticky="nsew")
-        self.tab_widgets[-1]["vert_scrollbar"].config(command=self.tab_widgets[-1]["canvas"].yview)
-        self.tab_widgets[-1]["hor_scrollbar"].config(command=self.tab_widgets[-1]["canvas"].xview)
+        widgets["canvas"].grid(row=0, column=0, sticky="nsew")
+        widgets["vert_scrollbar"].config(command=widgets["canvas"].yview)
+        widgets["hor_scrollbar"].config(command=widgets["canvas"].xview)
 
         # make canvas expandable
         root.rowconfigure(0, weight=1)
         root.columnconfigure(0, weight=1)
 
         # create canvas content
-        self.tab_widgets[-1]["frame"] = Frame(self.tab_widgets[-1]["canvas"])
-        self.tab_widgets[-1]["frame"].rowconfigure(1, weight=1)
-        self.tab_widgets[-1]["frame"].columnconfigure(1, weight=1)
+        widgets["frame"] = Frame(widgets["canvas"])
+        widgets["frame"].rowconfigure(1, weight=1)
+        widgets["frame"].columnconfigure(1, weight=1)
 
         # bind mousewheel
-        self.tab_widgets[-1]["frame"].bind_all("<MouseWheel>", _on_mousewheel)
+        widgets["frame"].bind_all("<MouseWheel>", _on_mousewheel)
 
         # return frame to pack with widgets; after UI building, call build_scrollable_frame_post()
-        return self.tab_widgets[-1]["frame"]
+        return widgets["frame"]
 
     def build_scrollable_frame_post(self):
         """Supplementary function for build_scrollable_frame
         - After creating frame content, call this function to create canvas window, call update_idletasks and to
           configure canvas
         """
-        self.tab_widgets[-1]["canvas"].create_window(0, 0, anchor="nw", window=self.tab_widgets[-1]["frame"])
-        self.tab_widgets[-1]["frame"].update_idletasks()
-        self.tab_widgets[-1]["canvas"].config(scrollregion=self.tab_widgets[-1]["canvas"].bbox("all"))
+        widgets = list(self.tab_widgets.values())[-1]  # last built scrollable frame
+        widgets["canvas"].create_window(0, 0, anchor="nw", window=widgets["frame"])
+        widgets["frame"].update_idletasks()
+        widgets["canvas"].config(scrollregion=widgets["canvas"].bbox("all"))
 
     def build_menu(self):
         """Build menu bar"""
@@ -399,7 +1093,7 @@ class UI(ThemedTk):
         systemmenu.add_command(label="Connect to MongoDB", command=self.establish_db_connection)
         systemmenu.add_separator()
         systemmenu.add_command(label="Restart UI", command=partial(restart_ui, self))
-        systemmenu.add_command(label="Exit UI", command=self.quit)
+        systemmenu.add_command(label="Exit UI", command=self.exit_ui)
 
         menubar.add_cascade(label="System", menu=systemmenu)
 
@@ -575,105 +1269,34 @@ class UI(ThemedTk):
         self.build_scrollable_frame_post()
 
     def build_json_parameter_fields(self):
-        """Builds parameter fields based on file.json file
+        """Shows the parameters of the file.json file in the virtualized editor (VirtualJsonEditor)
         - Triggered from tab-handler or when loading a new file.json file while being in the tab Json
+        - only the visible rows have widgets, so the build time does not depend on the size of the file
         """
 
         # return if no file.json file is selected
         if not env["json_path"]:
             return
 
-        # clear all previous widgets in frame
-        for widget in frm["json_params"].winfo_children():
-            widget.destroy()
-
-        # create list with empty dict for each entry in json file to store widgets
-        self.cal_widgets = [{} for _ in range(len(env["json_content"].items()))]
-
-        # iterate over current parameters read from json file
-        for idx, (key, val) in enumerate(env["json_content"].items()):
-
-            # create headers
-            label = Label(frm["json_params"], text=key, font=self.font_bold)
-            label.grid(row=idx, column=0, sticky="w")
-
-            # color code certain headers
-            label.config(foreground="red") if "Red" in key else 0
-            label.config(foreground="green") if "Green" in key else 0
-            label.config(foreground="blue") if "Blue" in key else 0
-
-            # create top frame for widgets (some values are single items, some are lists etc)
-            self.cal_widgets[idx]["top_frame"] = Frame(frm["json_params"])
-
-            # check if value for current key is list
-            if isinstance(val, list):
-
-                # create sub_frame for current key
-                self.cal_widgets[idx]["sub_frame"] = Frame(self.cal_widgets[idx]["top_frame"])
-
-                # create list for current key
-                self.cal_widgets[idx]["list"] = []
-
-                # iterate over list elements
-                for list_idx, list_val in enumerate(val):
-
-                    # check if list contains anything but lists (= list with single values) (bools etc not covered)
-                    if not isinstance(list_val, list):
-                        self.cal_widgets[idx]["list"].append(Entry(self.cal_widgets[idx]["sub_frame"], width=20))
-                        self.cal_widgets[idx]["list"][-1].grid(row=0, column=list_idx, padx=2)
-                        self.cal_widgets[idx]["list"][-1].insert(0, list_val)
-                        self.cal_widgets[idx]["list"][-1].bind("<Return>", partial(self.callback_cal, "list",
-                                                                                   idx, key, val, list_idx))
-
-                    # check if list contains nested lists
-                    if isinstance(list_val, list):
-                        self.cal_widgets[idx]["list"].append([])
-                        for sub_list_idx, sub_list in enumerate(list_val):
-                            self.cal_widgets[idx]["list"][-1].append(Entry(self.cal_widgets[idx]["sub_frame"],
-                                                                           width=20))
-                            self.cal_widgets[idx]["list"][-1][-1].grid(row=list_idx, column=sub_list_idx,
-                                                                       padx=2, pady=2)
-                            self.cal_widgets[idx]["list"][-1][-1].insert(0, sub_list)
-                            self.cal_widgets[idx]["list"][-1][-1].bind("<Return>", partial(self.callback_cal,
-                                                                                           "nested_list",
-                                                                                           idx, key, val,
-                                                                                           list_idx, sub_list_idx))
-
-                # attach subframe to grid
-                self.cal_widgets[idx]["sub_frame"].grid(row=idx, column=1, sticky="w", pady=2)
-
-            # check if value for current key is a bool (has to be checked first, conflicts with int > elif necessary)
-            if isinstance(val, bool):
-                self.cal_widgets[idx]["boolvar"] = BooleanVar(value=val)
-                self.cal_widgets[idx]["checkbutton"] = Checkbutton(self.cal_widgets[idx]["top_frame"],
-                                                                   variable=self.cal_widgets[idx]["boolvar"],
-                                                                   command=partial(self.callback_cal, "boolvar",
-                                                                                   idx, key, val))
-
-                self.cal_widgets[idx]["checkbutton"].grid(row=idx, column=1, padx=2, pady=2, sticky="w")
-
-            # check if value for current key is a int or float (TODO: not isinstance(val, bool) ? just else ?)
-            elif isinstance(val, int) or isinstance(val, float):
-                self.cal_widgets[idx]["single_number"] = Entry(self.cal_widgets[idx]["top_frame"], width=20)
-                self.cal_widgets[idx]["single_number"].grid(row=idx, column=1, padx=2, pady=2, sticky="w")
-                self.cal_widgets[idx]["single_number"].insert(0, val)
-                self.cal_widgets[idx]["single_number"].bind("<Return>", partial(self.callback_cal, "single_number",
-                                                                                idx, key, val))
-
-            # check if value for current key is a string
-            if isinstance(val, str):
-                self.cal_widgets[idx]["single_text"] = Entry(self.cal_widgets[idx]["top_frame"], width=20)
-                self.cal_widgets[idx]["single_text"].grid(row=idx, column=1, padx=2, pady=2, sticky="w")
-                self.cal_widgets[idx]["single_text"].insert(0, val)
-                self.cal_widgets[idx]["single_text"].bind("<Return>", partial(self.callback_cal, "single_text",
-                                                                              idx, key, val))
-
-            # add separator below (TODO: limited by frame-size)
-            Separator(self.cal_widgets[idx]["top_frame"], orient="horizontal").grid(row=999, column=0, columnspan=99,
-                                                                                    pady=2, sticky="ew")
-
-            # add top_frame to grid
-            self.cal_widgets[idx]["top_frame"].grid(row=idx, column=1, pady=2, sticky="w")
+        # create editor once
+        if "json_editor" not in oth:
+            oth["json_editor"] = VirtualJsonEditor(frm["json_params"], on_change=self.callback_cal,
+                                                   on_invalid=self.callback_cal_invalid, font_bold=self.font_bold)
+            oth["json_editor"].pack(anchor="w")
+        editor = oth["json_editor"]
+
+        # nothing to do if the content was not replaced since the last build (edits go through the model)
+        if editor.model is not None and editor.model.content is env["json_content"]:
+            return
+
+        # reloaded file: diff against the shown document, only changed widgets are updated (not for lazily loaded
+        # files, the diff would parse all values)
+        if editor.model is not None and not isinstance(env["json_content"], LazyJsonDocument) and \
+                not isinstance(editor.model.content, LazyJsonDocument):
+            changes = editor.update(env["json_content"])
+            print(f"Json parameters reloaded: {len(changes)} changes, {editor.updates} widgets updated")
+        else:
+            editor.load(JsonModel(env["json_content"]))
 
         # refresh frame (scrollbar)
         frm["json_params"].update_idletasks()
@@ -762,11 +1385,20 @@ class UI(ThemedTk):
         tab_name = event.widget.tab("current")["text"]
         self.current_tab = tab_name
 
+        # build tab content on first selection
+        self.build_tab(tab_name)
+
         if tab_name == "Json":
             self.build_json_parameter_fields()  # call build Json parameters
         # print(event)
         print(f"Changing to tab {tab_name}")
 
+    def log_startup_time(self, start):
+        """Log time from UI init until the window is idle (drawn) and the build times of the tabs built so far"""
+        self.startup_seconds = time.perf_counter() - start
+        built = ", ".join(f"{k} {v['seconds'] * 1000:.1f} ms" for k, v in self.tabs.items() if v["built"])
+        print(f"UI started in {self.startup_seconds * 1000:.1f} ms (built tabs: {built})")
+
     def callback_cal_options(self, mode):
         if mode == "overwrite_json":
             change_val = var["json_overwrite_json"].get()
@@ -775,44 +1407,15 @@ class UI(ThemedTk):
             change_val = var["json_send_on_enter"].get()
             self.write_cfg(section="json", option="json_callback", value=change_val)
 
-    def callback_cal(self, mode, idx, key, orig_value, list_idx=None, sub_list_idx=None, event=None):
-        """Callback from Json - write to json & execute stuff."""
-        if mode == "list":
-            new_value = self.cal_widgets[idx][mode][list_idx].get()
-            orig_value = orig_value[list_idx]
-            return_text = f"Changing {key}[{list_idx}] from {orig_value} to {new_value}"
+    def callback_cal(self, path, orig_value, new_value):
+        """Callback from Json editor after a value was changed in env["json_content"] - write to json & execute
+        stuff."""
+        return_text = f"Changing {format_path(path)} from {orig_value} to {new_value}"
 
-        elif mode == "nested_list":
-            new_value = self.cal_widgets[idx]["list"][list_idx][sub_list_idx].get()
-            orig_value = orig_value[list_idx][sub_list_idx]
-            return_text = f"Changing {key}[{list_idx}][{sub_list_idx}] from {orig_value} to {new_value}"
-
-        else:
-            new_value = self.cal_widgets[idx][mode].get()
-            return_text = f"Changing {key} from {orig_value} to {new_value}"
-
-        # format from string to original value
-        if isinstance(orig_value, bool):
-            new_value = bool(new_value)
-        elif isinstance(orig_value, int):
-            new_value = int(new_value)
-        elif isinstance(orig_value, float):
-            new_value = float(new_value)
-        elif isinstance(orig_value, str):
-            new_value = str(new_value)
-
-        # overwrite parameters in env
-        if mode == "list":
-            env["json_content"][key][list_idx] = new_value
-        elif mode == "nested_list":
-            env["json_content"][key][list_idx][sub_list_idx] = new_value
-        else:
-            env["json_content"][key] = new_value
-
-        # overwrite json file
+        # overwrite json file (debounced, in the background)
         if self.cfg["json"]["json_overwrite"] == "True":
-            self.__write_json()
-            return_text += " | .json updated"
+            self.json_writer.schedule(env["json_path"], env["json_content"], path, new_value)
+            return_text += " | .json update scheduled"
 
         # TODO: program callback here to send commands
         if self.cfg["json"]["json_callback"] == "True":
@@ -820,15 +1423,17 @@ class UI(ThemedTk):
             print(f"""### JSON callback triggered! Available arguments: ###
 {'arg-name':<20} | {'current_value'}
 {'------' * 6:}
-{'mode':<20} | {mode}
-{'idx':<20} | {idx}
-{'key':<20} | {key}
+{'path':<20} | {path}
+{'key':<20} | {path[0]}
 {'orig_value':<20} | {orig_value}
-{'list_idx':<20} | {list_idx}
-{'sub_list_idx':<20} | {sub_list_idx}
+{'new_value':<20} | {new_value}
 """)
         self.change_status(return_text)
 
+    def callback_cal_invalid(self, path, text, error):
+        """Callback from Json editor if the entered text does not match the type of the value"""
+        self.change_status(f"Invalid value for {format_path(path)}: {text} ({error})", warning=True)
+
     def write_cfg(self, section=None, option=None, value=None, silent=False):
         """Overwrite config.ini
 
@@ -901,6 +1506,9 @@ class UI(ThemedTk):
                                           initialdir=self.cfg["json"]["json_folder"])
 
         if path:
+            # write pending edits of the previous file
+            self.json_writer.close()
+
             # update runtime env
             env["json_path"] = path
 
@@ -910,8 +1518,9 @@ class UI(ThemedTk):
             # update status
             self.change_status(status=f"Set parameters path (runtime env): {path}")
 
-            # change StringVar for display
-            var["file.json"].set(value=env['json_path'])
+            # change StringVar for display (only exists once the Json tab was built)
+            if "file.json" in var:
+                var["file.json"].set(value=env['json_path'])
 
             # if currently in tab Json, build parameter fields
             if self.current_tab == "Json":
@@ -937,7 +1546,7 @@ class UI(ThemedTk):
 
         if path:
             self.write_cfg(section="json", option="json_folder", value=path, silent=silent)
-            if not silent:
+            if not silent and "json_folder" in var:
                 var["json_folder"].set(path)
 
     def __load_json(self):
@@ -945,14 +1554,37 @@ class UI(ThemedTk):
         - after setting the parameter path with set_parameter_path
         - or during open_connection when an EEPROM id is available
           (open_connection has to write path into env["json_path"]
+        - files of at least json_lazy_mb (config.ini) are opened as LazyJsonDocument
         """
-        with open(env["json_path"], "r") as f:
-            env["json_content"] = json.load(f)
-
-    def __write_json(self):
-        """Overwrite current file.json"""
-        with open(env["json_path"], 'w', encoding='utf-8') as f:
-            json.dump(env["json_content"], f, ensure_ascii=False, indent=4, separators=None)
+        # large files are loaded lazily (values are parsed when expanded in the editor)
+        lazy_bytes = float(self.cfg["json"].get("json_lazy_mb", "50")) * 1e6
+        if isinstance(env["json_content"], LazyJsonDocument):
+            env["json_content"].close()
+        if os.path.getsize(env["json_path"]) >= lazy_bytes:
+            env["json_content"] = LazyJsonDocument(env["json_path"])
+        else:
+            with open(env["json_path"], "r") as f:
+                env["json_content"] = json.load(f)
+
+        # apply edits of the journal (see JsonWriter), a half written last line is skipped
+        journal = f"{env['json_path']}.journal"
+        if os.path.isfile(journal):
+            operations = []
+            with open(journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        operations.append(json.loads(line))
+                    except ValueError:
+                        break
+            apply_json_patch(env["json_content"], operations)
+            print(f"Applied {len(operations)} change(s) from {journal}")
+
+    def exit_ui(self):
+        """Write pending json edits and exit"""
+        try:
+            self.json_writer.close()
+        finally:
+            self.quit()
 
     def open_file(self, filename):
         """Try to open a local file
@@ -1271,6 +1903,9 @@ window_size = 0.75
 json_folder = None
 json_overwrite = True
 json_callback = False
+json_write_delay = 500
+json_journal_mb = 0
+json_lazy_mb = 50
 
 [mongodb]
 user = None
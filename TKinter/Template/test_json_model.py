@@ -0,0 +1,156 @@
+"""
+Tests for the json model of the Json tab (diff_json, JsonModel.update, VirtualJsonEditor.update, JsonWriter)
+    python -m pytest test_json_model.py
+"""
+import copy
+import json
+import threading
+import tkinter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from GUI import diff_json, JsonModel, JsonWriter, VirtualJsonEditor
+
+document = {"a": 1, "b": [1, 2, 3], "c": {"d": "x", "e": [[1, 2], [3, 4]]}, "f": True}
+
+
+def test_diff_json_unchanged():
+    assert diff_json(document, copy.deepcopy(document)) == []
+
+
+def test_diff_json_add_remove_shrink_type_change():
+    new = copy.deepcopy(document)
+    new["g"] = 5  # add
+    del new["f"]  # remove
+    new["b"] = [1, 2]  # shrink
+    new["c"]["e"][1][0] = 7  # nested change
+    new["a"] = [1, 2]  # scalar > list
+    assert sorted(diff_json(document, new)) == sorted([("add", ("g", )), ("remove", ("f", )),
+                                                       ("remove", ("b", 2)), ("change", ("c", "e", 1, 0)),
+                                                       ("change", ("a", ))])
+
+
+def test_diff_json_bool_is_not_int():
+    assert diff_json({"a": 1}, {"a": True}) == [("change", ("a", ))]
+
+
+def test_update_value_change_keeps_rows():
+    model = JsonModel(copy.deepcopy(document))
+    rows = model.rows
+    new = copy.deepcopy(document)
+    new["a"] = 2
+    assert model.update(new) == [("change", ("a", ))]
+    assert model.rows is rows
+    assert model.get(("a", )) == 2
+
+
+def test_update_drops_drafts_of_changed_values():
+    model = JsonModel(copy.deepcopy(document))
+    model.drafts = {("a", ): "5", ("c", "d"): "y"}
+    new = copy.deepcopy(document)
+    new["a"] = 2
+    model.update(new)
+    assert model.drafts == {("c", "d"): "y"}
+
+
+def test_update_remove_and_shrink():
+    model = JsonModel(copy.deepcopy(document), columns=2)
+    model.collapsed.add(("c", "e"))
+    new = copy.deepcopy(document)
+    del new["c"]
+    new["b"] = [1]
+    model.update(new)
+    assert model.collapsed == set()
+    assert [f["label"] for f in model.rows] == ["a", "b", "f"]
+    assert model.rows[1]["cells"] == [("b", 0)]
+
+
+def test_update_scalar_to_list_is_structural():
+    model = JsonModel({"a": 5})
+    model.update({"a": [1, 2]})
+    assert model.rows[0]["cells"] == [("a", 0), ("a", 1)]
+
+
+def test_update_list_to_scalar_is_structural():
+    model = JsonModel({"a": [1, 2]})
+    model.update({"a": 5})
+    assert model.rows[0]["cells"] == [("a", )]
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        pytest.skip("no display")
+    yield root
+    root.destroy()
+
+
+def test_editor_update_shows_new_values(root):
+    editor = VirtualJsonEditor(root, on_change=lambda *args: None, visible_rows=5)
+    editor.load(JsonModel({"a": 1, "b": [1, 2, 3]}))
+    editor.update({"a": 2, "b": [1]})
+    assert editor.pool[0]["entries"][0].get() == "2"
+    assert editor.model.drafts == {}
+    assert editor.pool[1]["entries_shown"] == 1
+
+
+class AfterStub:
+    """Widget replacement which runs after() callbacks on demand"""
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def after(self, ms, callback):
+        self.callbacks[len(self.callbacks)] = callback
+        return len(self.callbacks) - 1
+
+    def after_cancel(self, timer):
+        self.callbacks.pop(timer, None)
+
+    def run(self):
+        while self.callbacks:
+            self.callbacks.pop(min(self.callbacks))()
+
+
+def test_writer_failed_write_is_reported_once_and_rewritten(tmp_path):
+    errors = []
+    widget = AfterStub()
+    writer = JsonWriter(widget, ThreadPoolExecutor(max_workers=1), on_error=errors.append)
+    writer.schedule(str(tmp_path / "missing" / "a.json"), {"a": 1}, ("a", ), 1)
+    widget.run()
+    assert len(errors) == 1 and writer.future is None
+    writer.close()  # does not raise or report the old failure again
+    assert len(errors) == 1
+    path = tmp_path / "a.json"
+    writer.schedule(str(path), {"a": 2}, ("a", ), 2)
+    assert writer.take_pending()[2][-1] is None  # whole file after the failure
+    writer.schedule(str(path), {"a": 2}, ("a", ), 2)
+    writer.close()
+    assert json.loads(path.read_text()) == {"a": 2}
+
+
+def test_writer_does_not_overlap_writes(tmp_path):
+    widget, started, release, calls = AfterStub(), threading.Event(), threading.Event(), []
+    writer = JsonWriter(widget, ThreadPoolExecutor(max_workers=4), on_error=print)
+
+    def write(path, content, operations):
+        calls.append(content["a"])
+        started.set()
+        release.wait(5)
+
+    writer.write = write
+    path = str(tmp_path / "a.json")
+    writer.schedule(path, {"a": 1}, ("a", ), 1)
+    writer.flush()
+    started.wait(5)
+    writer.schedule(path, {"a": 2}, ("a", ), 2)
+    writer.flush()  # first write still running: re-armed instead of submitted
+    assert calls == [1] and writer.timer is not None and writer.path == path
+    release.set()
+    writer.future.result()
+    writer.flush()
+    writer.future.result()
+    assert calls == [1, 2]